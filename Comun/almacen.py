@@ -0,0 +1,211 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from datetime import date
+from glob import escape, glob
+from Comun import metricas, ttml
+
+# Un solo almacén en la raíz del proyecto, compartido por Canal, Playlist y Video.
+CARPETA_ALMACEN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "almacen")
+RAW = "raw"
+LIMPIO = "limpio"
+COMENTARIOS = "comentarios"
+# youtube_dl cambia ":" por U+F03A donde el sistema de archivos no lo admite.
+SEPARADORES_ID = ("_ID:", "_ID\uf03a")
+# Los archivos se leen de a bloques: un video con muchos comentarios no se carga completo en memoria.
+BLOQUE = 1 << 20
+
+def huella(contenido: bytes):
+    return hashlib.sha256(contenido).hexdigest()
+
+def huella_archivo(ruta: str):
+    calculada = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(BLOQUE), b""):
+            calculada.update(bloque)
+    return calculada.hexdigest()
+
+def video_id_desde_archivo(ruta: str):
+    nombre_archivo = os.path.splitext(os.path.basename(ruta))[0]
+    for separador in SEPARADORES_ID:
+        if separador in nombre_archivo:
+            nombre_archivo = nombre_archivo.split(separador)[-1]
+            break
+    return nombre_archivo.split('.es')[0]
+
+def archivos_video(carpeta: str, video_id: str):
+    # Los archivos que youtube_dl dejó en `carpeta` para el video, con cualquiera de los separadores.
+    return [ruta for separador in SEPARADORES_ID for ruta in glob(os.path.join(escape(carpeta), f"*{separador}{escape(video_id)}.*"))]
+
+class Almacen:
+    # Cada contenido (TTML, texto limpio, comentarios) se guarda una sola vez en objetos/<huella>,
+    # y un índice SQLite dice qué huella tiene cada video y de qué día es. Los árboles de cada
+    # fuente (./YouTube/<canal>, ./Youtube/<canal>/<playlist>) son vistas: enlaces duros a esos
+    # objetos, anotados en la tabla `vistas`. Lo que ya se obtuvo hoy no se vuelve a pedir.
+    def __init__(self, carpeta: str = None):
+        self.carpeta = carpeta or CARPETA_ALMACEN
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(self.carpeta, "objetos"), exist_ok=True)
+
+        self.conexion = sqlite3.connect(os.path.join(self.carpeta, "indice.sqlite3"), check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS contenidos ("
+            "video_id TEXT NOT NULL, tipo TEXT NOT NULL, huella TEXT NOT NULL, nombre TEXT, "
+            "origen TEXT, tamano INTEGER NOT NULL, dia TEXT NOT NULL, PRIMARY KEY (video_id, tipo))"
+        )
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS vistas ("
+            "ruta TEXT PRIMARY KEY, video_id TEXT NOT NULL, tipo TEXT NOT NULL, huella TEXT NOT NULL)"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS vistas_video ON vistas (video_id)")
+        self.conexion.commit()
+
+    def ruta_objeto(self, huella_objeto: str):
+        return os.path.join(self.carpeta, "objetos", huella_objeto[:2], huella_objeto)
+
+    def guardar(self, video_id: str, tipo: str, contenido: bytes, nombre: str = None, origen: str = None):
+        # `origen` es la huella de la que se derivó el contenido (el TTML de un texto limpio).
+        huella_objeto = huella(contenido)
+        self._escribir_objeto(huella_objeto, lambda destino: destino.write(contenido))
+        self._registrar(video_id, tipo, huella_objeto, nombre, origen, len(contenido))
+        return huella_objeto
+
+    def guardar_archivo(self, video_id: str, tipo: str, ruta: str, nombre: str = None):
+        # Como guardar(), pero copiando el archivo de a bloques.
+        huella_objeto = huella_archivo(ruta)
+        with open(ruta, 'rb') as origen:
+            self._escribir_objeto(huella_objeto, lambda destino: shutil.copyfileobj(origen, destino, BLOQUE))
+        self._registrar(video_id, tipo, huella_objeto, nombre, None, os.path.getsize(ruta))
+        return huella_objeto
+
+    def _escribir_objeto(self, huella_objeto: str, escribir):
+        ruta = self.ruta_objeto(huella_objeto)
+        if os.path.exists(ruta):
+            return
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, 'wb') as archivo:
+            escribir(archivo)
+        os.replace(temporal, ruta)
+
+    def _registrar(self, video_id: str, tipo: str, huella_objeto: str, nombre: str, origen: str, tamano: int):
+        with self.lock:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO contenidos (video_id, tipo, huella, nombre, origen, tamano, dia) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, tipo, huella_objeto, nombre, origen, tamano, date.today().isoformat())
+            )
+            self.conexion.commit()
+
+    def entrada(self, video_id: str, tipo: str):
+        with self.lock:
+            fila = self.conexion.execute(
+                "SELECT huella, nombre, origen, tamano, dia FROM contenidos WHERE video_id = ? AND tipo = ?", (video_id, tipo)
+            ).fetchone()
+        if fila is None:
+            return None
+        return dict(zip(("huella", "nombre", "origen", "tamano", "dia"), fila))
+
+    def vigente(self, video_id: str, tipo: str):
+        # La entrada sólo sirve si es de hoy: los subtítulos y comentarios cambian de un día a otro.
+        entrada = self.entrada(video_id, tipo)
+        if entrada and entrada["dia"] == date.today().isoformat() and os.path.exists(self.ruta_objeto(entrada["huella"])):
+            return entrada
+        return None
+
+    def leer(self, video_id: str, tipo: str):
+        entrada = self.entrada(video_id, tipo)
+        if entrada is None:
+            return None
+        with open(self.ruta_objeto(entrada["huella"]), 'rb') as archivo:
+            return archivo.read()
+
+    def enlazar(self, huella_objeto: str, destino: str):
+        # El enlace se crea aparte y se mueve encima del destino: nunca se escribe a través de un enlace
+        # existente, que modificaría el objeto compartido. Sin enlaces duros (otro disco) se copia.
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(self.ruta_objeto(huella_objeto), temporal)
+        except OSError:
+            shutil.copyfile(self.ruta_objeto(huella_objeto), temporal)
+        os.replace(temporal, destino)
+
+    def registrar_vista(self, ruta: str, video_id: str, tipo: str, huella_objeto: str):
+        with self.lock:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO vistas (ruta, video_id, tipo, huella) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(ruta), video_id, tipo, huella_objeto)
+            )
+            self.conexion.commit()
+
+    def importar(self, video_id: str, tipo: str, ruta: str):
+        # Guarda un archivo recién escrito por una fuente y lo cambia por un enlace al objeto.
+        huella_objeto = self.guardar_archivo(video_id, tipo, ruta, os.path.basename(ruta))
+        self.enlazar(huella_objeto, ruta)
+        self.registrar_vista(ruta, video_id, tipo, huella_objeto)
+        return huella_objeto
+
+    def materializar(self, video_id: str, tipo: str, carpeta: str, nombre: str = None):
+        # Si hay una copia de hoy, la pone en `carpeta` (con su nombre original o `nombre`) y devuelve la ruta.
+        entrada = self.vigente(video_id, tipo)
+        if entrada is None:
+            return None
+        destino = os.path.join(carpeta, nombre or entrada["nombre"])
+        self.enlazar(entrada["huella"], destino)
+        self.registrar_vista(destino, video_id, tipo, entrada["huella"])
+        metricas.contar("almacen_aciertos_total", tipo=tipo)
+        return destino
+
+    def vistas(self, video_id: str):
+        with self.lock:
+            return [fila[0] for fila in self.conexion.execute("SELECT ruta FROM vistas WHERE video_id = ? ORDER BY ruta", (video_id,))]
+
+    def video_de_vista(self, ruta: str):
+        with self.lock:
+            fila = self.conexion.execute("SELECT video_id FROM vistas WHERE ruta = ?", (os.path.abspath(ruta),)).fetchone()
+        return fila[0] if fila else None
+
+    def limpiar_lote(self, rutas_archivos: list[str], procesos: int = ttml.PROCESOS):
+        # Como ttml.limpiar_lote, pero un TTML que ya se limpió (misma huella) no se vuelve a procesar.
+        huellas = [huella_archivo(ruta) for ruta in rutas_archivos]
+        video_ids = [video_id_desde_archivo(ruta) for ruta in rutas_archivos]
+        return self._limpiar(video_ids, huellas, lambda indices: ttml.limpiar_lote([rutas_archivos[indice] for indice in indices], procesos))
+
+    def limpiar_contenidos(self, video_ids: list[str], contenidos: list[bytes], procesos: int = ttml.PROCESOS):
+        # Lo mismo para TTML que ya están en memoria (leídos de un paquete).
+        huellas = [huella(contenido) for contenido in contenidos]
+        return self._limpiar(video_ids, huellas, lambda indices: ttml.limpiar_contenidos([contenidos[indice] for indice in indices], procesos))
+
+    def _limpiar(self, video_ids: list[str], huellas: list[str], limpiar):
+        textos = [None] * len(video_ids)
+        faltantes = []
+        for indice, (video_id, huella_raw) in enumerate(zip(video_ids, huellas)):
+            entrada = self.entrada(video_id, LIMPIO)
+            if entrada and entrada["origen"] == huella_raw:
+                textos[indice] = self.leer(video_id, LIMPIO).decode('utf-8')
+                metricas.contar("almacen_aciertos_total", tipo=LIMPIO)
+            else:
+                faltantes.append(indice)
+
+        for indice, texto in zip(faltantes, limpiar(faltantes)):
+            textos[indice] = texto
+            self.guardar(video_ids[indice], LIMPIO, texto.encode('utf-8'), origen=huellas[indice])
+        return textos
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+def limpiar_lote(almacen, rutas_archivos: list[str], procesos: int = ttml.PROCESOS):
+    if almacen is None:
+        return ttml.limpiar_lote(rutas_archivos, procesos)
+    return almacen.limpiar_lote(rutas_archivos, procesos)
+
+def limpiar_contenidos(almacen, video_ids: list[str], contenidos: list[bytes], procesos: int = ttml.PROCESOS):
+    if almacen is None:
+        return ttml.limpiar_contenidos(contenidos, procesos)
+    return almacen.limpiar_contenidos(video_ids, contenidos, procesos)
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import threading
+
+CARPETA_BITACORAS = "./bitacoras"
+
+def ruta_bitacora(fuente: str, carpeta: str = CARPETA_BITACORAS):
+    return os.path.join(carpeta, re.sub(r"[^\w-]+", "_", fuente) + ".json")
+
+def existe(fuente: str, carpeta: str = CARPETA_BITACORAS):
+    return os.path.exists(ruta_bitacora(fuente, carpeta))
+
+class Bitacora:
+    # Punto de control de una fuente. Cada página encontrada se anota junto con el token de la
+    # siguiente en una sola escritura atómica, así que avanzar el token nunca pierde una página;
+    # las etapas anotan los videos que terminan y la página se borra cuando pasa por todas.
+    # Al reiniciar, primero se terminan las páginas anotadas y luego se sigue desde el token.
+    def __init__(self, fuente: str, fecha_inicio: str, fecha_fin: str, carpeta: str = CARPETA_BITACORAS):
+        self.fuente = fuente
+        self.ruta = ruta_bitacora(fuente, carpeta)
+        self.lock = threading.Lock()
+        ventana = [fecha_inicio, fecha_fin]
+        self.estado = {"fuente": fuente, "ventana": ventana, "siguiente": "", "posicion": 0, "terminada": False, "contador": 0, "paginas": {}}
+
+        if os.path.exists(self.ruta):
+            with open(self.ruta, 'r', encoding='utf-8') as archivo_json:
+                anterior = json.load(archivo_json)
+            if anterior.get("ventana") == ventana:
+                self.estado = anterior
+                print(f"Retomando {fuente}: {len(anterior['paginas'])} páginas sin terminar. \n")
+            else:
+                print(f"Las fechas de {fuente} cambiaron; se empieza de nuevo. \n")
+
+    def _guardar(self):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo_json:
+            json.dump(self.estado, archivo_json, ensure_ascii=False, indent=4)
+            archivo_json.flush()
+            os.fsync(archivo_json.fileno())
+        os.replace(temporal, self.ruta)
+
+    @property
+    def siguiente(self):
+        return self.estado["siguiente"]
+
+    @property
+    def posicion(self):
+        return self.estado["posicion"]
+
+    @property
+    def terminada(self):
+        return self.estado["terminada"]
+
+    def pendientes(self):
+        # Páginas anotadas en una corrida anterior que no pasaron por todas las etapas.
+        with self.lock:
+            return [(int(numero), json.loads(json.dumps(pagina))) for numero, pagina in sorted(self.estado["paginas"].items(), key=lambda par: int(par[0]))]
+
+    def registrar_pagina(self, video_ids: dict, siguiente: str, posicion: int = 0):
+        with self.lock:
+            numero = self.estado["contador"]
+            self.estado["contador"] = numero + 1
+            self.estado["paginas"][str(numero)] = {"video_ids": video_ids, "completadas": {}}
+            self.estado["siguiente"] = siguiente
+            self.estado["posicion"] = posicion
+            self.estado["terminada"] = not siguiente
+            self._guardar()
+        return numero
+
+    def completar_etapa(self, numero: int, etapa: str, video_ids):
+        with self.lock:
+            pagina = self.estado["paginas"].get(str(numero))
+            if pagina is None:
+                return
+            completadas = pagina["completadas"].setdefault(etapa, [])
+            completadas.extend(video_id for video_id in video_ids if video_id not in completadas)
+            self._guardar()
+
+    def completadas(self, numero: int, etapa: str):
+        with self.lock:
+            pagina = self.estado["paginas"].get(str(numero), {})
+            return set(pagina.get("completadas", {}).get(etapa, []))
+
+    def cerrar_pagina(self, numero: int):
+        with self.lock:
+            self.estado["paginas"].pop(str(numero), None)
+            self._guardar()
+
+    def finalizar(self):
+        # La fuente terminó: sin páginas pendientes ni token siguiente ya no hace falta la bitácora.
+        with self.lock:
+            if self.estado["terminada"] and not self.estado["paginas"] and os.path.exists(self.ruta):
+                os.remove(self.ruta)
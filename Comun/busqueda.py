@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from glob import glob
+from Comun import almacen, metricas, paquetes, salida
+
+# Un solo índice en la raíz del proyecto con los subtítulos limpios y los comentarios de todas las fuentes.
+RUTA_INDICE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "busqueda.sqlite3")
+SUBTITULOS = "subtitulos"
+COMENTARIOS = "comentarios"
+TIPOS = (SUBTITULOS, COMENTARIOS)
+LIMITE = 20
+
+def frase(texto: str):
+    # Convierte el texto en una frase exacta de FTS5 (las comillas internas se duplican).
+    return '"' + texto.replace('"', '""') + '"'
+
+def _titulo_desde_archivo(archivo: str):
+    # "<título>_ID:<video_id>.es" -> "<título>", para lo recolectado antes del índice.
+    for separador in almacen.SEPARADORES_ID:
+        if separador in archivo:
+            return archivo.split(separador)[0]
+    return None
+
+def _fecha(valor: str):
+    # Valida AAAA-MM-DD; date.fromisoformat lanza ValueError si no lo es.
+    return date.fromisoformat(valor).isoformat() if valor else None
+
+class IndiceTexto:
+    # Índice invertido (SQLite FTS5) de los textos recolectados. Cada subtítulo es un documento y cada
+    # comentario otro; la tabla `documentos` guarda el video, el canal y la fecha de publicación de cada
+    # uno y su id es el rowid del texto en `textos`. Volver a indexar un video reemplaza sus documentos.
+    def __init__(self, ruta: str = None):
+        self.ruta = ruta or RUTA_INDICE
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS documentos ("
+            "id INTEGER PRIMARY KEY, video_id TEXT NOT NULL, tipo TEXT NOT NULL, parte INTEGER NOT NULL, "
+            "canal TEXT, titulo TEXT, fecha TEXT, hora TEXT, UNIQUE (video_id, tipo, parte))"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS documentos_fecha ON documentos (fecha)")
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS documentos_canal ON documentos (canal COLLATE NOCASE, fecha)")
+        # Sin acentos ni mayúsculas: "educacion" encuentra "Educación".
+        self.conexion.execute("CREATE VIRTUAL TABLE IF NOT EXISTS textos USING fts5(texto, tokenize='unicode61 remove_diacritics 2')")
+        self.conexion.commit()
+
+    def _reemplazar(self, video_id: str, tipo: str, textos: list[str], info: dict):
+        ids = [fila[0] for fila in self.conexion.execute("SELECT id FROM documentos WHERE video_id = ? AND tipo = ?", (video_id, tipo))]
+        self.conexion.executemany("DELETE FROM textos WHERE rowid = ?", [(id_documento,) for id_documento in ids])
+        self.conexion.execute("DELETE FROM documentos WHERE video_id = ? AND tipo = ?", (video_id, tipo))
+
+        # `textos` puede ser un generador (los comentarios se leen del archivo sin cargarlo completo).
+        partes = 0
+        for parte, texto in enumerate(texto for texto in textos if texto):
+            cursor = self.conexion.execute(
+                "INSERT INTO documentos (video_id, tipo, parte, canal, titulo, fecha, hora) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, tipo, parte, info.get("nombre_canal"), info.get("titulo"), info.get("fecha_publicacion"), info.get("hora_publicacion"))
+            )
+            self.conexion.execute("INSERT INTO textos (rowid, texto) VALUES (?, ?)", (cursor.lastrowid, texto))
+            partes += 1
+        return partes
+
+    def indexar(self, video_id: str, tipo: str, textos: list[str], info: dict):
+        self.indexar_lote([(video_id, tipo, textos, info)])
+
+    def indexar_lote(self, documentos: list[tuple]):
+        # documentos: (video_id, tipo, lista de textos, info del video); todo en una sola transacción.
+        desconocidos = {tipo for _, tipo, _, _ in documentos} - set(TIPOS)
+        if desconocidos:
+            raise ValueError(f"Tipo de documento desconocido: {', '.join(desconocidos)}. Opciones: {', '.join(TIPOS)}.")
+
+        with metricas.medir("indice_segundos", operacion="indexar"), self.lock:
+            with self.conexion:
+                indexados = [(tipo, self._reemplazar(video_id, tipo, textos or [], info or {})) for video_id, tipo, textos, info in documentos]
+        for tipo, partes in indexados:
+            metricas.contar("indice_documentos_total", partes, tipo=tipo)
+
+    def buscar(self, consulta: str, desde: str = None, hasta: str = None, canal: str = None, tipo: str = None,
+               video_id: str = None, limite: int = LIMITE, exacta: bool = False, por_fecha: bool = False):
+        # `consulta` usa la sintaxis de FTS5 ("frase exacta", AND, OR, NOT, prefijo*); con `exacta` todo
+        # el texto es una frase. `desde`/`hasta` (AAAA-MM-DD) filtran por fecha de publicación.
+        condiciones = ["textos MATCH ?"]
+        parametros = [frase(consulta) if exacta else consulta]
+        for condicion, valor in (
+            ("d.fecha >= ?", _fecha(desde)),
+            ("d.fecha <= ?", _fecha(hasta)),
+            ("d.canal = ? COLLATE NOCASE", canal),
+            ("d.tipo = ?", tipo),
+            ("d.video_id = ?", video_id)
+        ):
+            if valor:
+                condiciones.append(condicion)
+                parametros.append(valor)
+
+        orden = "d.fecha DESC, d.hora DESC" if por_fecha else "bm25(textos)"
+        sql = (
+            "SELECT d.video_id, d.tipo, d.parte, d.canal, d.titulo, d.fecha, d.hora, "
+            "snippet(textos, 0, '[', ']', '…', 16), bm25(textos) "
+            f"FROM textos JOIN documentos d ON d.id = textos.rowid WHERE {' AND '.join(condiciones)} "
+            f"ORDER BY {orden} LIMIT ?"
+        )
+        parametros.append(limite)
+
+        with metricas.medir("indice_segundos", operacion="buscar"), self.lock:
+            try:
+                filas = self.conexion.execute(sql, parametros).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Consulta inválida: {consulta} ({e})")
+
+        campos = ("video_id", "tipo", "parte", "canal", "titulo", "fecha", "hora", "fragmento", "puntaje")
+        return [dict(zip(campos, fila)) for fila in filas]
+
+    def total(self):
+        with self.lock:
+            return dict(self.conexion.execute("SELECT tipo, COUNT(*) FROM documentos GROUP BY tipo").fetchall())
+
+    def importar_carpeta(self, carpeta: str, formato: str = salida.FORMATO_POR_DEFECTO):
+        # Carga lo que ya se recolectó antes de tener índice: cada carpeta `subtitulos` (con su clean/ en
+        # `formato`) y cada carpeta `comentarios` dentro de `carpeta`. Devuelve los videos indexados por tipo
+        # y, en "sin_id", los archivos de comentarios que no se indexaron porque no se supo de qué video son.
+        contados = {SUBTITULOS: 0, COMENTARIOS: 0, "sin_id": []}
+        vistas = almacen.Almacen() if os.path.exists(os.path.join(almacen.CARPETA_ALMACEN, "indice.sqlite3")) else None
+        cache = None
+
+        for raiz, carpetas, _ in os.walk(carpeta):
+            nombre = os.path.basename(raiz)
+            if nombre == SUBTITULOS and "clean" in carpetas:
+                lote = []
+                for registro in salida.leer_registros(raiz, formato):
+                    video_id = registro.get("video_id") or almacen.video_id_desde_archivo(registro["archivo"])
+                    info = {"titulo": _titulo_desde_archivo(registro["archivo"]), **registro}
+                    lote.append((video_id, SUBTITULOS, [registro.get("subtitulos")], info))
+                self.indexar_lote(lote)
+                contados[SUBTITULOS] += len(lote)
+                carpetas.remove("clean")
+            elif nombre == COMENTARIOS:
+                lote = []
+                subtitulos = paquetes.ids_de_subtitulos(raiz)
+                cache = paquetes.ids_de_cache() if cache is None else cache
+                for ruta in sorted(glob(os.path.join(raiz, "**", "*.json"), recursive=True)):
+                    if paquetes.TRABAJO in os.path.relpath(ruta, raiz).split(os.sep):
+                        continue
+                    with open(ruta, 'r', encoding='utf-8') as archivo:
+                        registro = json.load(archivo)
+                    # Los archivos de comentarios llevan el título, no el ID. Sin ID no se indexan: con el título en su
+                    # lugar el video quedaría dos veces en cuanto una corrida lo indexe con su ID real.
+                    video_id = paquetes.resolver_id_comentarios(ruta, registro, vistas, subtitulos, cache)
+                    if video_id is None:
+                        contados["sin_id"].append(ruta)
+                        continue
+                    info = {"titulo": os.path.splitext(os.path.basename(ruta))[0], **registro}
+                    lote.append((video_id, COMENTARIOS, registro.get("comentarios"), info))
+                # Y los que ya están en paquetes ("almacenamiento": "paquetes"), con su ID en el índice del paquete.
+                if os.path.exists(os.path.join(raiz, paquetes.INDICE)):
+                    empacados = paquetes.Paquetes(raiz, ".json", paquetes.ZLIB)
+                    for video_id in empacados.video_ids():
+                        registro = json.loads(empacados.leer(video_id))
+                        info = {"titulo": os.path.splitext(empacados.entrada(video_id)["nombre"] or video_id)[0], **registro}
+                        lote.append((video_id, COMENTARIOS, registro.get("comentarios"), info))
+                    empacados.cerrar()
+                self.indexar_lote(lote)
+                contados[COMENTARIOS] += len(lote)
+                carpetas.clear()
+
+        if vistas:
+            vistas.cerrar()
+        return contados
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+def indexar(indice, video_id: str, tipo: str, textos: list[str], info: dict):
+    # Las fuentes llaman esto sin importar si hay índice (None cuando se usan sus funciones por separado).
+    if indice is not None:
+        indice.indexar(video_id, tipo, textos, info)
+
+def indexar_lote(indice, documentos: list[tuple]):
+    if indice is not None and documentos:
+        indice.indexar_lote(documentos)
+
+def buscar(consulta: str, ruta: str = None, **filtros):
+    # Para usar desde Python o un notebook: busqueda.buscar("reforma judicial", exacta=True, desde="2024-08-01").
+    indice = IndiceTexto(ruta)
+    try:
+        return indice.buscar(consulta, **filtros)
+    finally:
+        indice.cerrar()
+
+def imprimir_resultados(resultados: list[dict], milisegundos: float):
+    for resultado in resultados:
+        print(f"{resultado['fecha']} {resultado['canal']} | {resultado['titulo']} ({resultado['video_id']}, {resultado['tipo']})")
+        print(f"    {resultado['fragmento']}")
+    print(f"{len(resultados)} resultados en {milisegundos:.1f} ms")
+
+def main():
+    # python -m Comun.busqueda buscar "reforma judicial" --exacta --desde 2024-08-01 --canal "El Universal"
+    # python -m Comun.busqueda indexar ./Canal/YouTube ./Playlist/Youtube
+    parser = argparse.ArgumentParser(description="Búsqueda de texto completo en subtítulos y comentarios.")
+    parser.add_argument("--indice", help="Archivo del índice (por omisión busqueda.sqlite3 en la raíz).")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    consulta = comandos.add_parser("buscar", help="Busca en el índice.")
+    consulta.add_argument("consulta", help='Sintaxis de FTS5: palabras, "frase exacta", AND/OR/NOT, prefijo*.')
+    consulta.add_argument("--exacta", action="store_true", help="Toma toda la consulta como una frase.")
+    consulta.add_argument("--desde", help="Fecha de publicación mínima (AAAA-MM-DD).")
+    consulta.add_argument("--hasta", help="Fecha de publicación máxima (AAAA-MM-DD).")
+    consulta.add_argument("--canal")
+    consulta.add_argument("--tipo", choices=TIPOS)
+    consulta.add_argument("--video")
+    consulta.add_argument("--limite", type=int, default=LIMITE)
+    consulta.add_argument("--por-fecha", action="store_true", help="Ordena por fecha en lugar de relevancia.")
+    consulta.add_argument("--json", action="store_true", help="Imprime los resultados como JSON.")
+
+    carga = comandos.add_parser("indexar", help="Indexa lo ya recolectado en estas carpetas.")
+    carga.add_argument("carpetas", nargs="+")
+    carga.add_argument("--formato", default=salida.FORMATO_POR_DEFECTO, choices=tuple(salida.SALIDAS))
+    args = parser.parse_args()
+
+    indice = IndiceTexto(args.indice)
+    try:
+        if args.comando == "indexar":
+            for carpeta in args.carpetas:
+                contados = indice.importar_carpeta(carpeta, args.formato)
+                print(f"{carpeta}: {contados[SUBTITULOS]} subtítulos y {contados[COMENTARIOS]} archivos de comentarios indexados")
+                if contados["sin_id"]:
+                    print(f"{len(contados['sin_id'])} archivos de comentarios no se indexaron porque no se encontró su videoId "
+                          "(ni en el almacén, ni en los TTML de la fuente, ni en la caché de metadatos):")
+                    for ruta in contados["sin_id"]:
+                        print(f"    {ruta}")
+            return
+
+        inicio = time.perf_counter()
+        resultados = indice.buscar(
+            args.consulta, desde=args.desde, hasta=args.hasta, canal=args.canal, tipo=args.tipo,
+            video_id=args.video, limite=args.limite, exacta=args.exacta, por_fecha=args.por_fecha
+        )
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        if args.json:
+            print(json.dumps(resultados, ensure_ascii=False, indent=4))
+        else:
+            imprimir_resultados(resultados, milisegundos)
+    except ValueError as e:
+        print(e)
+    finally:
+        indice.cerrar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Un solo archivo en la raíz del proyecto, compartido por Canal, Playlist y Video.
+RUTA_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache_metadatos.sqlite3")
+MAX_ENTRADAS = 100000
+TTL_POR_TIPO = {
+    "canal": 7 * 24 * 3600,
+    "playlist": 24 * 3600,
+    "video": 24 * 3600,
+}
+
+class CacheMetadatos:
+    def __init__(self, ruta: str = None, max_entradas: int = MAX_ENTRADAS, ttl_por_tipo: dict = None):
+        self.ruta = ruta or RUTA_CACHE
+        self.max_entradas = max_entradas
+        self.ttl_por_tipo = dict(TTL_POR_TIPO, **(ttl_por_tipo or {}))
+        self.lock = threading.Lock()
+
+        self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS metadatos ("
+            "tipo TEXT NOT NULL, clave TEXT NOT NULL, valor TEXT NOT NULL, "
+            "creado REAL NOT NULL, accedido REAL NOT NULL, PRIMARY KEY (tipo, clave))"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS metadatos_accedido ON metadatos (accedido)")
+        self.conexion.commit()
+
+    def obtener(self, tipo: str, clave: str):
+        return self.obtener_varios(tipo, [clave]).get(clave)
+
+    def obtener_varios(self, tipo: str, claves: list[str]):
+        ahora = time.time()
+        vigentes_desde = ahora - self.ttl_por_tipo.get(tipo, 0)
+        encontrados = {}
+
+        with self.lock:
+            for inicio in range(0, len(claves), 500):
+                lote = claves[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(lote))
+                filas = self.conexion.execute(
+                    f"SELECT clave, valor FROM metadatos WHERE tipo = ? AND creado >= ? AND clave IN ({marcadores})",
+                    [tipo, vigentes_desde, *lote]
+                ).fetchall()
+                encontrados.update((clave, json.loads(valor)) for clave, valor in filas)
+
+            if encontrados:
+                # Marca de acceso para el desalojo LRU.
+                self.conexion.executemany(
+                    "UPDATE metadatos SET accedido = ? WHERE tipo = ? AND clave = ?",
+                    [(ahora, tipo, clave) for clave in encontrados]
+                )
+                self.conexion.commit()
+
+        return encontrados
+
+    def todos(self, tipo: str):
+        # Todas las entradas de `tipo`, vencidas o no, sin marcarlas como usadas (p. ej. para saber
+        # el ID de un video por su título; eso no caduca).
+        with self.lock:
+            filas = self.conexion.execute("SELECT clave, valor FROM metadatos WHERE tipo = ?", (tipo,)).fetchall()
+        return {clave: json.loads(valor) for clave, valor in filas}
+
+    def guardar(self, tipo: str, clave: str, valor):
+        self.guardar_varios(tipo, {clave: valor})
+
+    def guardar_varios(self, tipo: str, valores: dict):
+        if not valores:
+            return
+
+        ahora = time.time()
+        with self.lock:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO metadatos (tipo, clave, valor, creado, accedido) VALUES (?, ?, ?, ?, ?)",
+                [(tipo, clave, json.dumps(valor, ensure_ascii=False), ahora, ahora) for clave, valor in valores.items()]
+            )
+            self._desalojar()
+            self.conexion.commit()
+
+    def _desalojar(self):
+        total = self.conexion.execute("SELECT COUNT(*) FROM metadatos").fetchone()[0]
+        if total <= self.max_entradas:
+            return
+
+        # Primero las entradas vencidas y después las menos usadas hasta respetar el tamaño máximo.
+        ahora = time.time()
+        for tipo, ttl in self.ttl_por_tipo.items():
+            self.conexion.execute("DELETE FROM metadatos WHERE tipo = ? AND creado < ?", (tipo, ahora - ttl))
+
+        total = self.conexion.execute("SELECT COUNT(*) FROM metadatos").fetchone()[0]
+        if total > self.max_entradas:
+            self.conexion.execute(
+                "DELETE FROM metadatos WHERE rowid IN (SELECT rowid FROM metadatos ORDER BY accedido LIMIT ?)",
+                (total - self.max_entradas,)
+            )
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
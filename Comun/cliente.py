@@ -0,0 +1,138 @@
+import threading
+import time
+from googleapiclient.errors import HttpError
+from Comun import metricas
+from Comun.cuota import CuotaAgotada, es_error_de_cuota
+from Comun.llaves import ConjuntoLlaves
+from Comun.resiliencia import FalloTransitorio, PoliticaReintentos, es_reintentable, leer_retry_after
+
+URL_BASE = "https://www.googleapis.com/youtube/v3"
+# Si se define, el servicio de descubrimiento también apunta ahí (p. ej. a la API falsa de benchmarks).
+URL_SERVICIO = None
+TAMANO_POOL = 10
+TIEMPO_ESPERA = 30
+
+def registrar_llamada(recurso: str, estado, inicio: float, tamano: int = 0):
+    metricas.contar("api_llamadas_total", endpoint=recurso, estado=estado)
+    metricas.observar("api_segundos", time.perf_counter() - inicio, endpoint=recurso)
+    if tamano:
+        metricas.contar("bytes_descargados_total", tamano, origen="api", endpoint=recurso)
+
+class ClienteYoutube:
+    def __init__(self, api_key, tamano_pool: int = TAMANO_POOL, limitador=None, cache=None, libro=None, presupuesto: int = None, politica: PoliticaReintentos = None):
+        # `api_key` puede ser una llave o una lista; con varias, al agotarse una se sigue con otra.
+        self.api_key = api_key
+        self.llaves = ConjuntoLlaves(api_key, libro, presupuesto)
+        self.tamano_pool = tamano_pool
+        self.limitador = limitador
+        self.cache = cache
+        self.libro = libro
+        self.presupuesto = presupuesto
+        # Reintentos con backoff y un circuito por endpoint para los errores transitorios.
+        self.politica = politica or PoliticaReintentos()
+        # httplib2 no es seguro entre hilos: cada hilo conserva su propio servicio.
+        self._local = threading.local()
+
+        # requests y el cliente de descubrimiento se importan aquí y no al cargar el módulo:
+        # los comandos que no llaman a la API (plan, status) arrancan sin pagar esa importación.
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.errores_red = (requests.ConnectionError, requests.Timeout)
+
+        # Una sola sesión con conexiones keep-alive para todas las llamadas REST de la corrida.
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def servicio(self, llave: str):
+        # El documento de descubrimiento se analiza una sola vez por hilo y llave, no en cada video.
+        servicios = getattr(self._local, "servicios", None)
+        if servicios is None:
+            servicios = self._local.servicios = {}
+        if llave not in servicios:
+            from googleapiclient.discovery import build
+            opciones = {"api_endpoint": URL_SERVICIO} if URL_SERVICIO else None
+            servicios[llave] = build('youtube', 'v3', developerKey=llave, cache_discovery=False, client_options=opciones)
+        return servicios[llave]
+
+    def _antes_de_llamar(self, recurso: str):
+        # Devuelve la llave con la que se hará la llamada; si el presupuesto local de una llave
+        # se termina se pasa a la siguiente, y sin llaves se lanza CuotaAgotada.
+        if self.limitador:
+            self.limitador.esperar()
+        while True:
+            llave = self.llaves.actual()
+            try:
+                self.llaves.reservar(llave, recurso)
+                return llave
+            except CuotaAgotada:
+                self.llaves.agotar(llave)
+
+    def listar(self, recurso: str, **params):
+        return self.politica.ejecutar(recurso, lambda: self._listar_una_vez(recurso, params))
+
+    def get(self, recurso: str, **params):
+        return self.politica.ejecutar(recurso, lambda: self._get_una_vez(recurso, params))
+
+    def _listar_una_vez(self, recurso: str, params: dict):
+        # La misma llamada (con su pageToken) se repite con otra llave si la API rechaza la actual por cuota.
+        while True:
+            llave = self._antes_de_llamar(recurso)
+            peticion = getattr(self.servicio(llave), recurso)().list(**params)
+            procesar = peticion.postproc
+            tamano = []
+
+            def medir_respuesta(resp, content):
+                tamano.append(len(content))
+                return procesar(resp, content)
+
+            # El cliente de descubrimiento sólo entrega la respuesta ya decodificada; el tamaño se toma antes.
+            peticion.postproc = medir_respuesta
+            inicio = time.perf_counter()
+            try:
+                respuesta = peticion.execute()
+                registrar_llamada(recurso, 200, inicio, sum(tamano))
+                return respuesta
+            except HttpError as e:
+                registrar_llamada(recurso, e.resp.status, inicio, len(e.content or b""))
+                if es_error_de_cuota(e.resp.status, e.content):
+                    self.llaves.agotar(llave)
+                elif es_reintentable(e.resp.status, e.content):
+                    raise FalloTransitorio(f"HTTP {e.resp.status}", leer_retry_after(e.resp.get("retry-after")), error=e)
+                else:
+                    raise
+            except (ConnectionError, TimeoutError) as e:
+                registrar_llamada(recurso, "error", inicio)
+                raise FalloTransitorio(f"{type(e).__name__}: {e}", error=e)
+
+    def _get_una_vez(self, recurso: str, params: dict):
+        while True:
+            llave = self._antes_de_llamar(recurso)
+            inicio = time.perf_counter()
+            try:
+                response = self.session.get(f"{URL_BASE}/{recurso}", params={**params, "key": llave}, timeout=TIEMPO_ESPERA)
+            except self.errores_red as e:
+                registrar_llamada(recurso, "error", inicio)
+                raise FalloTransitorio(f"{type(e).__name__}: {e}", error=e)
+            registrar_llamada(recurso, response.status_code, inicio, len(response.content))
+
+            if es_error_de_cuota(response.status_code, response.content):
+                self.llaves.agotar(llave)
+            elif es_reintentable(response.status_code, response.content):
+                raise FalloTransitorio(f"HTTP {response.status_code}", leer_retry_after(response.headers.get("Retry-After")), resultado=response)
+            else:
+                return response
+
+    def cerrar(self):
+        self.session.close()
+        if self.cache:
+            self.cache.cerrar()
+        if self.libro:
+            self.libro.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
@@ -0,0 +1,217 @@
+import json
+import os
+
+from Comun import metricas
+from Comun.concurrencia import ejecutar_en_paralelo
+
+MAX_RESULTADOS = 100
+# commentThreads.list trae como mucho 5 respuestas por hilo; las demás se piden con comments.list.
+RESPUESTAS_EN_LINEA = 5
+CONCURRENCIA_RESPUESTAS = 4
+
+def ya_visto(item: dict, ultimo: tuple):
+    comentario = item['snippet']['topLevelComment']
+    comentario_id, publicado = ultimo
+    return comentario['id'] == comentario_id or comentario['snippet']['publishedAt'] < publicado
+
+def paginas_hilos(cliente, video_id: str, ultimo: tuple = None, token: str = None):
+    # Genera (hilos de la página, token de la siguiente) desde `token`; el token es None en la última.
+    # Sin `ultimo` se recorren todas las páginas en el orden por defecto. Con `ultimo` (id, publishedAt)
+    # se piden del más nuevo al más viejo y se deja de paginar al llegar a lo ya recolectado.
+    # Las respuestas nuevas a hilos viejos no se detectan en este modo.
+    params = {
+        "part": 'snippet,replies',
+        "videoId": video_id,
+        "maxResults": MAX_RESULTADOS,
+        "textFormat": 'plainText'
+    }
+    if ultimo:
+        params["order"] = 'time'
+    if token:
+        params["pageToken"] = token
+
+    while True:
+        response = cliente.listar('commentThreads', **params)
+        hilos = []
+        for item in response['items']:
+            if ultimo and ya_visto(item, ultimo):
+                yield hilos, None
+                return
+            hilos.append(item)
+
+        token = response.get('nextPageToken')
+        yield hilos, token
+        if not token:
+            return
+        params["pageToken"] = token
+
+def recolectar_hilos(cliente, video_id: str, ultimo: tuple = None):
+    return [item for hilos, _ in paginas_hilos(cliente, video_id, ultimo) for item in hilos]
+
+def respuestas_faltantes(item: dict):
+    en_linea = len(item.get('replies', {}).get('comments', []))
+    return item['snippet'].get('totalReplyCount', 0) > en_linea
+
+def recolectar_respuestas(cliente, item: dict):
+    # Todas las respuestas del hilo con comments.list; se descartan las que ya venían en línea.
+    en_linea = item.get('replies', {}).get('comments', [])
+    vistos = {respuesta['id'] for respuesta in en_linea}
+    params = {
+        "part": 'snippet',
+        "parentId": item['id'],
+        "maxResults": MAX_RESULTADOS,
+        "textFormat": 'plainText'
+    }
+
+    nuevas = []
+    token = None
+    while True:
+        response = cliente.get('comments', pageToken=token, **params)
+        if response.status_code != 200:
+            raise ValueError(f"No se pudieron obtener las respuestas del hilo {item['id']}: HTTP {response.status_code}")
+        data = response.json()
+        for respuesta in data.get('items', []):
+            if respuesta['id'] not in vistos:
+                vistos.add(respuesta['id'])
+                nuevas.append(respuesta)
+
+        token = data.get('nextPageToken')
+        if not token:
+            break
+
+    item['replies'] = {'comments': en_linea + nuevas}
+    metricas.contar("respuestas_expandidas_total", len(nuevas))
+    return item
+
+def expandir_respuestas(cliente, hilos: list[dict], concurrencia: int = CONCURRENCIA_RESPUESTAS):
+    # Sólo los hilos con más respuestas que las que trajo commentThreads.list cuestan llamadas extra.
+    # Se piden por REST: los hilos del pool no construyen cada uno su cliente de descubrimiento.
+    incompletos = [item for item in hilos if respuestas_faltantes(item)]
+    ejecutar_en_paralelo(lambda item: recolectar_respuestas(cliente, item), incompletos, concurrencia)
+    return hilos
+
+def textos(hilos: list[dict]):
+    # Cada comentario seguido de las respuestas que vienen con su hilo.
+    resultado = []
+    for item in hilos:
+        resultado.append(item['snippet']['topLevelComment']['snippet']['textOriginal'])
+        for respuesta in item.get('replies', {}).get('comments', []):
+            resultado.append(respuesta['snippet']['textOriginal'])
+    return resultado
+
+def mas_reciente(hilos: list[dict], anterior: tuple = None):
+    candidatos = [(item['snippet']['topLevelComment']['snippet']['publishedAt'], item['snippet']['topLevelComment']['id']) for item in hilos]
+    if anterior:
+        candidatos.append((anterior[1], anterior[0]))
+    if not candidatos:
+        return None
+    publicado, comentario_id = max(candidatos)
+    return comentario_id, publicado
+
+def ultimo_guardado(registro, video_id: str, json_file_path: str):
+    # Sólo hay delta si existe el archivo con el que se van a fusionar los comentarios nuevos; el
+    # último comentario es el de ese archivo, no el que haya guardado otra fuente con el mismo video.
+    if registro is None or not os.path.exists(json_file_path):
+        return None
+    return registro.ultimo_comentario(video_id, json_file_path)
+
+def leer_comentarios(json_file_path: str):
+    # Recorre los comentarios de un archivo sin cargarlo completo. json.dump(indent=4) y
+    # EscritorComentarios dejan uno por línea entre `"comentarios": [` y `]`; si el archivo
+    # no tiene esa forma (p. ej. "comentarios": null) se lee entero.
+    with open(json_file_path, 'r', encoding='utf-8') as json_file:
+        for linea in json_file:
+            if linea.strip() == '"comentarios": [':
+                break
+        else:
+            json_file.seek(0)
+            yield from json.load(json_file).get("comentarios") or []
+            return
+
+        for linea in json_file:
+            linea = linea.strip()
+            if linea == ']':
+                return
+            yield json.loads(linea.rstrip(','))
+
+class EscritorComentarios:
+    # Escribe el JSON de comentarios de un video página por página, con la misma forma que
+    # json.dump(indent=4), así que la memoria no crece con el número de comentarios. Tras cada
+    # página se anota en `<archivo>.parcial.estado` el tamaño escrito y el token de la siguiente;
+    # si la corrida se cae, la siguiente recorta lo que quedó a medias y sigue desde ese token.
+    # El archivo final sólo aparece (os.replace) al terminar.
+    def __init__(self, json_file_path: str, video_id: str, encabezado: dict):
+        self.ruta = json_file_path
+        self.parcial = f"{json_file_path}.parcial"
+        self.ruta_estado = f"{self.parcial}.estado"
+        self.estado = {"video_id": video_id, "fecha_recoleccion": encabezado.get("fecha_recoleccion"), "siguiente": None,
+                       "terminado": False, "escritos": 0, "bytes": 0, "reciente": None}
+
+        # Sin fsync por página: si el sistema se cae y el parcial quedó más corto que lo anotado, se empieza de nuevo.
+        anterior = self._leer_estado()
+        if anterior and os.path.exists(self.parcial) and os.path.getsize(self.parcial) >= anterior["bytes"] \
+                and all(anterior.get(clave) == self.estado[clave] for clave in ("video_id", "fecha_recoleccion")):
+            self.estado = anterior
+            self.archivo = open(self.parcial, 'r+b')
+            self.archivo.truncate(anterior["bytes"])
+            self.archivo.seek(anterior["bytes"])
+            print(f"Retomando los comentarios del video {video_id}: {anterior['escritos']} ya escritos. \n")
+            return
+
+        self.archivo = open(self.parcial, 'wb')
+        lineas = ["{"] + [f"    {json.dumps(clave)}: {json.dumps(valor, ensure_ascii=False)}," for clave, valor in encabezado.items()]
+        self.archivo.write(("\n".join(lineas) + '\n    "comentarios": ').encode('utf-8'))
+        self._guardar()
+
+    def _leer_estado(self):
+        try:
+            with open(self.ruta_estado, 'r', encoding='utf-8') as archivo_json:
+                return json.load(archivo_json)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _guardar(self):
+        self.archivo.flush()
+        self.estado["bytes"] = self.archivo.tell()
+        temporal = f"{self.ruta_estado}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo_json:
+            json.dump(self.estado, archivo_json)
+        os.replace(temporal, self.ruta_estado)
+
+    @property
+    def siguiente(self):
+        return self.estado["siguiente"]
+
+    @property
+    def terminado(self):
+        return self.estado["terminado"]
+
+    @property
+    def reciente(self):
+        return tuple(self.estado["reciente"]) if self.estado["reciente"] else None
+
+    def _agregar(self, textos):
+        for texto in textos:
+            separador = ",\n        " if self.estado["escritos"] else "[\n        "
+            self.archivo.write((separador + json.dumps(texto, ensure_ascii=False)).encode('utf-8'))
+            self.estado["escritos"] += 1
+
+    def escribir_pagina(self, textos: list, siguiente: str, reciente: tuple = None):
+        # `siguiente` None marca la última página: al retomar ya no se pide nada a la API.
+        self._agregar(textos)
+        self.estado.update(siguiente=siguiente, terminado=siguiente is None, reciente=list(reciente) if reciente else None)
+        self._guardar()
+
+    def terminar(self, anteriores=()):
+        # `anteriores` (en modo delta, los del archivo previo) van después de los nuevos.
+        self._agregar(anteriores)
+        self.archivo.write(b"\n    ]\n}" if self.estado["escritos"] else b"null\n}")
+        self.archivo.close()
+        os.replace(self.parcial, self.ruta)
+        os.remove(self.ruta_estado)
+        return self.estado["escritos"]
+
+    def cerrar(self):
+        # Sin terminar: el parcial y su estado se quedan para la siguiente corrida.
+        if not self.archivo.closed:
+            self.archivo.close()
@@ -0,0 +1,43 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CONCURRENCIA = 8
+PETICIONES_POR_SEGUNDO = 10
+
+class LimitadorTasa:
+    # Cubeta de fichas compartida por todos los hilos: cada llamada a la API consume fichas
+    # y éstas se recargan a `tasa` por segundo hasta `capacidad`.
+    def __init__(self, tasa: float = PETICIONES_POR_SEGUNDO, capacidad: float = None):
+        if tasa <= 0:
+            raise ValueError("La tasa del limitador debe ser mayor que cero.")
+
+        self.tasa = tasa
+        self.capacidad = capacidad if capacidad is not None else tasa
+        self.fichas = self.capacidad
+        self.ultima_recarga = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self, fichas: float = 1):
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultima_recarga) * self.tasa)
+                self.ultima_recarga = ahora
+
+                if self.fichas >= fichas:
+                    self.fichas -= fichas
+                    return
+
+                espera = (fichas - self.fichas) / self.tasa
+            time.sleep(espera)
+
+def ejecutar_en_paralelo(funcion, elementos, concurrencia: int = CONCURRENCIA):
+    # Devuelve los resultados en el mismo orden que los elementos; si alguno falla,
+    # la excepción se propaga igual que en el recorrido secuencial.
+    elementos = list(elementos)
+    if concurrencia <= 1 or len(elementos) <= 1:
+        return [funcion(elemento) for elemento in elementos]
+
+    with ThreadPoolExecutor(max_workers=min(concurrencia, len(elementos))) as ejecutor:
+        return list(ejecutor.map(funcion, elementos))
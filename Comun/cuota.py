@@ -0,0 +1,196 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+RUTA_LIBRO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cuota.sqlite3")
+CUOTA_DIARIA = 10000
+# La cuota diaria de la API se reinicia a medianoche, hora del Pacífico.
+ZONA_CUOTA = ZoneInfo("America/Los_Angeles")
+
+# Unidades por llamada de cada endpoint usado en el proyecto.
+COSTOS = {
+    "search": 100,
+    "videos": 1,
+    "channels": 1,
+    "playlists": 1,
+    "playlistItems": 1,
+    "commentThreads": 1,
+    "comments": 1,
+}
+RAZONES_CUOTA = ("quotaExceeded", "dailyLimitExceeded")
+
+# Supuestos del planificador cuando no se sabe cuántos videos habrá.
+VIDEOS_POR_DIA = 20
+PAGINAS_COMENTARIOS_POR_VIDEO = 3
+
+class CuotaAgotada(ValueError):
+    pass
+
+def dia_cuota(momento: datetime = None):
+    return (momento or datetime.now(ZONA_CUOTA)).astimezone(ZONA_CUOTA).strftime("%Y-%m-%d")
+
+def huella_llave(llave: str):
+    # En el libro no se guarda la llave, sólo una huella para distinguirlas.
+    return hashlib.sha256(llave.encode()).hexdigest()[:12]
+
+def es_error_de_cuota(status: int, contenido):
+    if status != 403:
+        return False
+    try:
+        errores = json.loads(contenido).get("error", {}).get("errors", [])
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return any(error.get("reason") in RAZONES_CUOTA for error in errores)
+
+class LibroCuota:
+    def __init__(self, ruta: str = None):
+        self.ruta = ruta or RUTA_LIBRO
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS consumo ("
+            "dia TEXT NOT NULL, llave TEXT NOT NULL, endpoint TEXT NOT NULL, "
+            "llamadas INTEGER NOT NULL, unidades INTEGER NOT NULL, PRIMARY KEY (dia, llave, endpoint))"
+        )
+        self.conexion.commit()
+
+    def _consumido(self, huella: str, dia: str):
+        fila = self.conexion.execute(
+            "SELECT COALESCE(SUM(unidades), 0) FROM consumo WHERE dia = ? AND llave = ?", (dia, huella)
+        ).fetchone()
+        return fila[0]
+
+    def consumido(self, llave: str, dia: str = None):
+        with self.lock:
+            return self._consumido(huella_llave(llave), dia or dia_cuota())
+
+    def restante(self, llave: str, presupuesto: int = CUOTA_DIARIA):
+        return max(0, presupuesto - self.consumido(llave))
+
+    def reservar(self, llave: str, endpoint: str, presupuesto: int = None):
+        # Registra la llamada antes de hacerla: la API cobra también las que fallan.
+        unidades = COSTOS.get(endpoint, 1)
+        huella = huella_llave(llave)
+        dia = dia_cuota()
+
+        with self.lock:
+            if presupuesto is not None and self._consumido(huella, dia) + unidades > presupuesto:
+                raise CuotaAgotada(f"Presupuesto de cuota agotado para hoy ({presupuesto} unidades); {endpoint} cuesta {unidades}.")
+
+            self.conexion.execute(
+                "INSERT INTO consumo (dia, llave, endpoint, llamadas, unidades) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (dia, llave, endpoint) DO UPDATE SET llamadas = llamadas + 1, unidades = unidades + excluded.unidades",
+                (dia, huella, endpoint, unidades)
+            )
+            self.conexion.commit()
+
+    def resumen(self, dia: str = None):
+        with self.lock:
+            return self.conexion.execute(
+                "SELECT llave, endpoint, llamadas, unidades FROM consumo WHERE dia = ? ORDER BY llave, endpoint",
+                (dia or dia_cuota(),)
+            ).fetchall()
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+def estimar_costo_fuente(tipo: str, fecha_inicio: str, fecha_fin: str, videos_por_dia: int = VIDEOS_POR_DIA,
+                         paginas_comentarios: int = PAGINAS_COMENTARIOS_POR_VIDEO, resultados_por_pagina: int = 20):
+    inicio = datetime.fromisoformat(fecha_inicio.rstrip('Z'))
+    fin = datetime.fromisoformat(fecha_fin.rstrip('Z'))
+    dias = max(1, math.ceil((fin - inicio).total_seconds() / 86400))
+    videos = dias * videos_por_dia
+    paginas = max(1, math.ceil(videos / resultados_por_pagina))
+
+    if tipo == "canal":
+        costo = {"search": paginas * COSTOS["search"], "channels": COSTOS["channels"]}
+    elif tipo == "subidas":
+        costo = {"playlistItems": paginas * COSTOS["playlistItems"], "channels": COSTOS["channels"]}
+    elif tipo == "playlist":
+        costo = {"playlistItems": paginas * COSTOS["playlistItems"], "playlists": COSTOS["playlists"]}
+    else:
+        raise ValueError(f"Tipo de fuente desconocido: {tipo}")
+
+    # Un videos.list por página de descubrimiento y las páginas de comentarios de cada video.
+    costo["videos"] = paginas * COSTOS["videos"]
+    costo["commentThreads"] = videos * paginas_comentarios * COSTOS["commentThreads"]
+    costo["total"] = sum(costo.values())
+    return costo
+
+def estimar_costo_videos(total: int, paginas_comentarios: int = PAGINAS_COMENTARIOS_POR_VIDEO, por_lote: int = 50):
+    # Una lista explícita de IDs: no hay búsqueda, sólo videos.list por lote y los comentarios.
+    costo = {
+        "videos": max(1, math.ceil(total / por_lote)) * COSTOS["videos"],
+        "commentThreads": total * paginas_comentarios * COSTOS["commentThreads"]
+    }
+    costo["total"] = sum(costo.values())
+    return costo
+
+class Planificador:
+    def __init__(self, presupuesto: int = CUOTA_DIARIA, libro: LibroCuota = None, llave=None):
+        # `presupuesto` es por llave; con una lista de llaves lo disponible es la suma de todas.
+        self.presupuesto = presupuesto
+        self.libro = libro
+        self.llaves = [llave] if isinstance(llave, str) else list(llave or [])
+
+    def disponible(self):
+        if not self.llaves:
+            return self.presupuesto
+        if not self.libro:
+            return self.presupuesto * len(self.llaves)
+        return sum(self.libro.restante(llave, self.presupuesto) for llave in self.llaves)
+
+    def programar(self, fuentes: list[tuple[str, dict]], primeras: list[str] = ()):
+        # fuentes: pares (id, costo estimado). Las más baratas primero para completar
+        # el mayor número de fuentes; las que no caben quedan pospuestas. `primeras` son las
+        # fuentes que deben ir antes que las demás y en ese orden (las interrumpidas y las
+        # pendientes de una corrida anterior).
+        disponible = self.disponible()
+        programadas, pospuestas = [], []
+        prioridad = {id_fuente: posicion for posicion, id_fuente in enumerate(primeras)}
+        ordenadas = sorted(fuentes, key=lambda fuente: (prioridad.get(fuente[0], len(prioridad)), fuente[1]["total"]))
+
+        for id_fuente, costo in ordenadas:
+            if costo["total"] <= disponible:
+                programadas.append(id_fuente)
+                disponible -= costo["total"]
+            else:
+                pospuestas.append(id_fuente)
+
+        return programadas, pospuestas
+
+def imprimir_plan(fuentes: list[tuple[str, dict]], programadas: list[str], disponible: int):
+    print(f"Cuota disponible hoy: {disponible} unidades \n")
+    for id_fuente, costo in fuentes:
+        estado = "programada" if id_fuente in programadas else "pospuesta"
+        detalle = ", ".join(f"{endpoint}={unidades}" for endpoint, unidades in costo.items() if endpoint != "total")
+        print(f"{id_fuente}: {costo['total']} unidades ({detalle}) -> {estado}")
+    print()
+
+def leer_pendientes(ruta_json: str):
+    # Devuelve (día de cuota en que se guardaron, ids pendientes).
+    if not os.path.exists(ruta_json):
+        return None, []
+    with open(ruta_json, 'r', encoding='utf-8') as archivo_json:
+        data = json.load(archivo_json)
+    return data.get("dia"), data.get("pendientes", [])
+
+def guardar_pendientes(ruta_json: str, pendientes: list[str], procesadas=None):
+    # Con `procesadas` (las fuentes que eligió --ids) la corrida cubrió sólo una parte del JSON: se
+    # conservan las pendientes anteriores que quedaron fuera y el día en que se guardaron, porque
+    # las demás fuentes no se recorrieron hoy.
+    dia = dia_cuota()
+    if procesadas is not None:
+        dia, anteriores = leer_pendientes(ruta_json)
+        pendientes = pendientes + [id_fuente for id_fuente in anteriores if id_fuente not in procesadas and id_fuente not in pendientes]
+    temporal = f"{ruta_json}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo_json:
+        json.dump({"dia": dia, "pendientes": pendientes}, archivo_json, indent=4)
+    os.replace(temporal, ruta_json)
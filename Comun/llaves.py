@@ -0,0 +1,51 @@
+import itertools
+import threading
+from Comun.cuota import CuotaAgotada, huella_llave
+
+def normalizar_llaves(valor):
+    # En los JSON de configuración "llave" puede ser una sola cadena o una lista de llaves.
+    llaves = [valor] if isinstance(valor, str) else list(valor or [])
+    llaves = [llave for llave in dict.fromkeys(llaves) if llave]
+    if not llaves:
+        raise ValueError("La llave proporcionada en el archivo JSON está ausente o es inválida.")
+    return llaves
+
+class ConjuntoLlaves:
+    # Reparte los hilos entre las llaves por turnos y saca del turno a las que agotan su cuota;
+    # el hilo que se quedó sin llave toma la siguiente disponible y repite la misma llamada.
+    def __init__(self, llaves, libro=None, presupuesto: int = None):
+        self.llaves = normalizar_llaves(llaves)
+        self.libro = libro
+        self.presupuesto = presupuesto
+        self.agotadas = set()
+        self.lock = threading.Lock()
+        self._turno = itertools.count()
+        self._local = threading.local()
+
+    def disponibles(self):
+        with self.lock:
+            return [llave for llave in self.llaves if llave not in self.agotadas]
+
+    def actual(self):
+        llave = getattr(self._local, "llave", None)
+        if llave is not None and llave not in self.agotadas:
+            return llave
+
+        disponibles = self.disponibles()
+        if not disponibles:
+            raise CuotaAgotada(f"Las {len(self.llaves)} llaves agotaron su cuota de hoy.")
+        llave = disponibles[next(self._turno) % len(disponibles)]
+        self._local.llave = llave
+        return llave
+
+    def agotar(self, llave: str):
+        with self.lock:
+            if llave in self.agotadas:
+                return
+            self.agotadas.add(llave)
+            restantes = len(self.llaves) - len(self.agotadas)
+        print(f"La llave {huella_llave(llave)} agotó su cuota; quedan {restantes} llaves. \n")
+
+    def reservar(self, llave: str, endpoint: str):
+        if self.libro:
+            self.libro.reservar(llave, endpoint, self.presupuesto)
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+RUTA_MANIFIESTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manifiesto.sqlite3")
+ETAPAS = ("subtitulos", "limpieza", "comentarios")
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+
+def _fecha(valor: str):
+    return datetime.fromisoformat(valor.rstrip('Z'))
+
+class Manifiesto:
+    # Registro por fuente de los videos ya recolectados (estado y hora de cada etapa) y del
+    # intervalo de fechas que ya se recorrió completo, la marca de agua de la fuente. Para el modo
+    # delta guarda también el último comentario de cada archivo de comentarios.
+    def __init__(self, ruta: str = None):
+        self.ruta = ruta or RUTA_MANIFIESTO
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            "fuente TEXT NOT NULL, video_id TEXT NOT NULL, etapa TEXT NOT NULL, "
+            "estado TEXT NOT NULL, marca_tiempo TEXT NOT NULL, PRIMARY KEY (fuente, video_id, etapa))"
+        )
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS marcas ("
+            "fuente TEXT PRIMARY KEY, inicio TEXT NOT NULL, fin TEXT NOT NULL, actualizado TEXT NOT NULL)"
+        )
+        # El último comentario va por archivo y no sólo por video: dos fuentes con el mismo video escriben
+        # archivos distintos y cada una debe seguir desde lo que tiene el suyo. La tabla anterior
+        # (`comentarios`, por video) no dice a qué archivo corresponde cada fila, así que se descarta;
+        # esos videos se vuelven a pedir completos una vez.
+        self.conexion.execute("DROP TABLE IF EXISTS comentarios")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS ultimos_comentarios ("
+            "archivo TEXT NOT NULL, video_id TEXT NOT NULL, comentario_id TEXT NOT NULL, publicado TEXT NOT NULL, "
+            "actualizado TEXT NOT NULL, PRIMARY KEY (archivo, video_id))"
+        )
+        self.conexion.commit()
+
+    def completados(self, fuente: str, etapa: str, video_ids: list[str]):
+        with self.lock:
+            completados = set()
+            for inicio in range(0, len(video_ids), 500):
+                lote = video_ids[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(lote))
+                filas = self.conexion.execute(
+                    f"SELECT video_id FROM videos WHERE fuente = ? AND etapa = ? AND estado = ? AND video_id IN ({marcadores})",
+                    [fuente, etapa, COMPLETADO, *lote]
+                ).fetchall()
+                completados.update(fila[0] for fila in filas)
+            return completados
+
+    def todos_completados(self, fuente: str, etapa: str):
+        with self.lock:
+            filas = self.conexion.execute(
+                "SELECT video_id FROM videos WHERE fuente = ? AND etapa = ? AND estado = ?", (fuente, etapa, COMPLETADO)
+            ).fetchall()
+        return {fila[0] for fila in filas}
+
+    def marcar(self, fuente: str, etapa: str, video_ids, estado: str = COMPLETADO):
+        ahora = datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO videos (fuente, video_id, etapa, estado, marca_tiempo) VALUES (?, ?, ?, ?, ?)",
+                [(fuente, video_id, etapa, estado, ahora) for video_id in video_ids]
+            )
+            self.conexion.commit()
+
+    def marca_agua(self, fuente: str):
+        with self.lock:
+            fila = self.conexion.execute("SELECT inicio, fin FROM marcas WHERE fuente = ?", (fuente,)).fetchone()
+        return (_fecha(fila[0]), _fecha(fila[1])) if fila else None
+
+    def actualizar_marca(self, fuente: str, fecha_inicio: str, fecha_fin: str):
+        # Sólo se considera cubierto lo que ya pasó; si la ventana nueva toca la anterior se unen.
+        inicio = _fecha(fecha_inicio)
+        fin = min(_fecha(fecha_fin), datetime.now(timezone.utc).replace(tzinfo=None))
+        anterior = self.marca_agua(fuente)
+        if anterior and inicio <= anterior[1] and anterior[0] <= fin:
+            inicio, fin = min(inicio, anterior[0]), max(fin, anterior[1])
+
+        with self.lock:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO marcas (fuente, inicio, fin, actualizado) VALUES (?, ?, ?, ?)",
+                (fuente, inicio.isoformat(), fin.isoformat(), datetime.now().isoformat(timespec='seconds'))
+            )
+            self.conexion.commit()
+
+    def ultimo_comentario(self, video_id: str, archivo: str):
+        with self.lock:
+            fila = self.conexion.execute(
+                "SELECT comentario_id, publicado FROM ultimos_comentarios WHERE archivo = ? AND video_id = ?",
+                (os.path.abspath(archivo), video_id)
+            ).fetchone()
+        return (fila[0], fila[1]) if fila else None
+
+    def guardar_ultimo_comentario(self, video_id: str, archivo: str, comentario_id: str, publicado: str):
+        with self.lock:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO ultimos_comentarios (archivo, video_id, comentario_id, publicado, actualizado) VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(archivo), video_id, comentario_id, publicado, datetime.now().isoformat(timespec='seconds'))
+            )
+            self.conexion.commit()
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+def alcanza_marca(marca, fecha_inicio: datetime, publicado: datetime):
+    # Los resultados llegan del más nuevo al más viejo: si la ventana no empieza antes de lo
+    # ya cubierto, al entrar en ese intervalo todo lo que sigue ya se recolectó.
+    return marca is not None and fecha_inicio >= marca[0] and publicado <= marca[1]
+
+def filtrar_pendientes(manifiesto, fuente: str, etapa: str, videos: list):
+    # `videos` son registros con `video_id` (Motor.registros.Video).
+    if manifiesto is None:
+        return videos
+    completados = manifiesto.completados(fuente, etapa, [video.video_id for video in videos])
+    return [video for video in videos if video.video_id not in completados]
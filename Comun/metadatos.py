@@ -0,0 +1,74 @@
+from datetime import datetime
+
+# videos.list acepta hasta 50 IDs por llamada y cuesta 1 unidad sin importar cuántos se pidan.
+TAMANO_LOTE = 50
+
+def dividir_en_lotes(elementos: list, tamano: int = TAMANO_LOTE):
+    for inicio in range(0, len(elementos), tamano):
+        yield elementos[inicio:inicio + tamano]
+
+def nombre_seguro(texto: str):
+    # Títulos de canales, playlists y videos como nombres de carpeta o de archivo.
+    return "".join(char for char in texto if char.isalnum() or char in " -_").rstrip()
+
+def info_desde_snippet(snippet: dict, fecha_actual: str, hora_actual: str):
+    fecha_publicacion = snippet['publishedAt']
+
+    try:
+        fecha, hora = fecha_publicacion.split('T')
+        hora = hora.rstrip('Z')
+    except Exception as e:
+        raise ValueError(f"Error al procesar la fecha_publicacion {fecha_publicacion}")
+
+    return {
+        "fecha_recoleccion": fecha_actual,
+        "hora_recoleccion": hora_actual,
+        "fecha_publicacion": fecha,
+        "hora_publicacion": hora,
+        "nombre_canal": snippet['channelTitle'],
+        "titulo": snippet['title']
+    }
+
+def obtener_info_videos(cliente, video_ids: list[str]):
+    ids_unicos = list(dict.fromkeys(video_ids))
+    ahora = datetime.now()
+    fecha_actual = ahora.strftime("%Y-%m-%d")
+    hora_actual = ahora.strftime("%H:%M:%S")
+
+    cache = getattr(cliente, "cache", None)
+    snippets = cache.obtener_varios("video", ids_unicos) if cache else {}
+    faltantes = [video_id for video_id in ids_unicos if video_id not in snippets]
+
+    for lote in dividir_en_lotes(faltantes):
+        response = cliente.listar(
+            'videos',
+            part='snippet',
+            id=",".join(lote),
+            maxResults=len(lote)
+        )
+
+        nuevos = {}
+        for item in response.get('items', []):
+            snippet = item['snippet']
+            nuevos[item['id']] = {campo: snippet[campo] for campo in ('publishedAt', 'channelTitle', 'title')}
+
+        if cache:
+            cache.guardar_varios("video", nuevos)
+        snippets.update(nuevos)
+
+    return {
+        video_id: info_desde_snippet(snippets[video_id], fecha_actual, hora_actual)
+        for video_id in ids_unicos if video_id in snippets
+    }
+
+def obtener_con_cache(cliente, tipo: str, clave: str, consulta):
+    # `consulta` sólo se llama si no hay una entrada vigente; None no se guarda.
+    cache = getattr(cliente, "cache", None)
+    valor = cache.obtener(tipo, clave) if cache else None
+
+    if valor is None:
+        valor = consulta()
+        if valor is not None and cache:
+            cache.guardar(tipo, clave, valor)
+
+    return valor
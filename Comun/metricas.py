@@ -0,0 +1,231 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PREFIJO = "web_scraping"
+# Límites superiores (segundos) de las cubetas de los histogramas, como en Prometheus.
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+CPROFILE = "cprofile"
+PYINSTRUMENT = "pyinstrument"
+RUTAS_PERFIL = {CPROFILE: "perfil.prof", PYINSTRUMENT: "perfil.html"}
+
+def _etiquetas(etiquetas: dict):
+    return tuple(sorted((clave, str(valor)) for clave, valor in etiquetas.items()))
+
+def _formato_etiquetas(etiquetas: tuple, extra: tuple = ()):
+    pares = etiquetas + extra
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{clave}="{valor}"' for clave, valor in pares) + "}"
+
+class Perfil:
+    # cProfile sólo ve el hilo que lo activa: se activa uno más en cada hilo nuevo (las etapas de
+    # la tubería, los trabajadores de subtítulos y comentarios) y al final se juntan todos.
+    # pyinstrument es opcional y muestrea sólo el hilo principal.
+    def __init__(self, herramienta: str, ruta: str = None):
+        if herramienta not in (CPROFILE, PYINSTRUMENT):
+            raise ValueError(f"Perfilador desconocido: {herramienta}. Opciones: {CPROFILE}, {PYINSTRUMENT}.")
+        self.herramienta = herramienta
+        self.ruta = ruta or RUTAS_PERFIL[herramienta]
+        self.perfiles = []
+        self.lock = threading.Lock()
+        self.perfilador = None
+
+    def _perfilar_hilo(self, *args):
+        sys.setprofile(None)
+        perfil = cProfile.Profile()
+        with self.lock:
+            self.perfiles.append(perfil)
+        perfil.enable()
+
+    def iniciar(self):
+        if self.herramienta == PYINSTRUMENT:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ValueError("El perfil con pyinstrument necesita el paquete: pip install pyinstrument")
+            self.perfilador = Profiler()
+            self.perfilador.start()
+            return
+
+        threading.setprofile(self._perfilar_hilo)
+        self.perfilador = cProfile.Profile()
+        self.perfilador.enable()
+
+    def detener(self):
+        if self.herramienta == PYINSTRUMENT:
+            self.perfilador.stop()
+            with open(self.ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(self.perfilador.output_html())
+        else:
+            self.perfilador.disable()
+            threading.setprofile(None)
+            estadisticas = pstats.Stats(self.perfilador)
+            with self.lock:
+                for perfil in self.perfiles:
+                    perfil.disable()
+                    estadisticas.add(perfil)
+            estadisticas.dump_stats(self.ruta)
+        print(f"Perfil guardado en {self.ruta} \n")
+
+class Metricas:
+    # Contadores, medidores e histogramas en memoria compartidos por todos los hilos. Al final de la
+    # corrida se exportan en el formato de texto de Prometheus; los eventos se escriben al momento
+    # como líneas JSON si hay log configurado.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.contadores = {}
+        self.medidores = {}
+        self.histogramas = {}
+        self.ruta_log = None
+        self.ruta_prometheus = None
+        self.perfil = None
+        self._log = None
+
+    def contar(self, nombre: str, valor: float = 1, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self.lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def fijar(self, nombre: str, valor: float, **etiquetas):
+        # Medidor con su valor actual y el máximo visto en la corrida (p. ej. profundidad de las colas).
+        clave = (nombre, _etiquetas(etiquetas))
+        clave_maximo = (f"{nombre}_maximo", clave[1])
+        with self.lock:
+            self.medidores[clave] = valor
+            self.medidores[clave_maximo] = max(valor, self.medidores.get(clave_maximo, valor))
+
+    def observar(self, nombre: str, segundos: float, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self.lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = {"cubetas": [0] * len(CUBETAS), "suma": 0.0, "cuenta": 0, "maximo": 0.0}
+            for indice, limite in enumerate(CUBETAS):
+                if segundos <= limite:
+                    histograma["cubetas"][indice] += 1
+            histograma["suma"] += segundos
+            histograma["cuenta"] += 1
+            histograma["maximo"] = max(histograma["maximo"], segundos)
+
+    @contextmanager
+    def medir(self, nombre: str, **etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def evento(self, nombre: str, **datos):
+        if self._log is None:
+            return
+        linea = json.dumps({"fecha": datetime.now().isoformat(timespec='milliseconds'), "evento": nombre, **datos}, ensure_ascii=False, default=str)
+        with self.lock:
+            if self._log is not None:
+                self._log.write(linea + "\n")
+                self._log.flush()
+
+    def configurar(self, log: str = None, prometheus: str = None, perfil: str = None, ruta_perfil: str = None):
+        self.cerrar()
+        self.ruta_log = log
+        self.ruta_prometheus = prometheus
+        if log:
+            carpeta = os.path.dirname(log)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            self._log = open(log, 'a', encoding='utf-8')
+        if perfil:
+            self.perfil = Perfil(perfil, ruta_perfil)
+            self.perfil.iniciar()
+
+    def prometheus(self):
+        with self.lock:
+            contadores = dict(self.contadores)
+            medidores = dict(self.medidores)
+            histogramas = {clave: {**valor, "cubetas": list(valor["cubetas"])} for clave, valor in self.histogramas.items()}
+
+        lineas = []
+        declarados = set()
+
+        def declarar(nombre: str, tipo: str):
+            if nombre not in declarados:
+                declarados.add(nombre)
+                lineas.append(f"# TYPE {nombre} {tipo}")
+
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            declarar(f"{PREFIJO}_{nombre}", "counter")
+            lineas.append(f"{PREFIJO}_{nombre}{_formato_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), valor in sorted(medidores.items()):
+            declarar(f"{PREFIJO}_{nombre}", "gauge")
+            lineas.append(f"{PREFIJO}_{nombre}{_formato_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), histograma in sorted(histogramas.items()):
+            nombre = f"{PREFIJO}_{nombre}"
+            declarar(nombre, "histogram")
+            for limite, cuenta in zip(CUBETAS, histograma["cubetas"]):
+                lineas.append(f"{nombre}_bucket{_formato_etiquetas(etiquetas, (('le', str(limite)),))} {cuenta}")
+            lineas.append(f"{nombre}_bucket{_formato_etiquetas(etiquetas, (('le', '+Inf'),))} {histograma['cuenta']}")
+            lineas.append(f"{nombre}_sum{_formato_etiquetas(etiquetas)} {histograma['suma']}")
+            lineas.append(f"{nombre}_count{_formato_etiquetas(etiquetas)} {histograma['cuenta']}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar_prometheus(self, ruta: str):
+        # Escritura atómica para que un recolector de node_exporter nunca lea un archivo a medias.
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(self.prometheus())
+        os.replace(temporal, ruta)
+
+    def resumen(self):
+        # Tiempo total, cuenta y máximo por histograma; es lo que se anota en el log al terminar.
+        with self.lock:
+            return {
+                f"{nombre}{_formato_etiquetas(etiquetas)}": {"cuenta": valor["cuenta"], "segundos": round(valor["suma"], 3), "maximo": round(valor["maximo"], 3)}
+                for (nombre, etiquetas), valor in sorted(self.histogramas.items())
+            }
+
+    def cerrar(self):
+        if self.perfil:
+            self.perfil.detener()
+            self.perfil = None
+        if self.ruta_prometheus:
+            # Sólo una vez: la siguiente corrida del mismo proceso exporta donde diga su propio JSON.
+            self.exportar_prometheus(self.ruta_prometheus)
+            self.ruta_prometheus = None
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+METRICAS = Metricas()
+contar = METRICAS.contar
+fijar = METRICAS.fijar
+observar = METRICAS.observar
+medir = METRICAS.medir
+evento = METRICAS.evento
+
+def iniciar(ruta_archivo: str):
+    # La llave opcional "metricas" del JSON de configuración activa la exportación, p. ej.:
+    # {"log": "./metricas.jsonl", "prometheus": "./metricas.prom", "perfil": "cprofile", "rutaPerfil": "./perfil.prof"}
+    # Las rutas relativas son respecto a la carpeta del JSON, como la salida y pendientes.json.
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        opciones = json.load(archivo).get("metricas") or {}
+    carpeta = os.path.dirname(os.path.abspath(ruta_archivo))
+
+    def junto_al_json(ruta: str):
+        return os.path.join(carpeta, ruta) if ruta else None
+
+    perfil = opciones.get("perfil")
+    ruta_perfil = opciones.get("rutaPerfil") or RUTAS_PERFIL.get(perfil)
+    METRICAS.configurar(junto_al_json(opciones.get("log")), junto_al_json(opciones.get("prometheus")),
+                        perfil, junto_al_json(ruta_perfil) if perfil else None)
+    evento("inicio", configuracion=ruta_archivo)
+
+def finalizar():
+    evento("fin", histogramas=METRICAS.resumen())
+    METRICAS.cerrar()
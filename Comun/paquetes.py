@@ -0,0 +1,463 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import unicodedata
+import uuid
+import zlib
+from datetime import date
+from Comun import almacen, metricas
+from Comun import cache as modulo_cache
+
+ARCHIVOS = "archivos"
+PAQUETES = "paquetes"
+ALMACENAMIENTOS = (ARCHIVOS, PAQUETES)
+ZSTD = "zstd"
+ZLIB = "zlib"
+COMPRESIONES = {ZSTD: ".zst", ZLIB: ".zz"}
+NIVEL = {ZSTD: 3, ZLIB: 6}
+INDICE = "indice.sqlite3"
+TRABAJO = "trabajo"
+# Carpetas de un día, como las arma construir_ruta_fecha: <año>/<mes>/<AAAA-MM-DD>.
+PATRON_DIA = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+def opciones_desde_config(ruta_archivo: str):
+    # "almacenamiento" (archivos | paquetes) y "compresion" (zstd | zlib) son opcionales en el JSON;
+    # sin ellas se conserva un archivo suelto por video.
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        data = json.load(archivo)
+    almacenamiento = data.get("almacenamiento") or ARCHIVOS
+    compresion = data.get("compresion") or ZSTD
+
+    if almacenamiento not in ALMACENAMIENTOS:
+        raise ValueError(f"Almacenamiento desconocido: {almacenamiento}. Opciones: {', '.join(ALMACENAMIENTOS)}.")
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"Compresión desconocida: {compresion}. Opciones: {', '.join(COMPRESIONES)}.")
+    if almacenamiento == PAQUETES:
+        # Si falta zstandard se avisa al empezar y no a la mitad de la primera página.
+        Compresor(compresion)
+    return almacenamiento, compresion
+
+class Compresor:
+    # Cada contenido es un cuadro independiente: se puede leer uno sin descomprimir el resto del paquete.
+    def __init__(self, compresion: str):
+        self.compresion = compresion
+        if compresion == ZSTD:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("Los paquetes con zstd necesitan zstandard: pip install zstandard (o usa \"compresion\": \"zlib\")")
+            self.zstd_comprimir = zstandard.ZstdCompressor(level=NIVEL[ZSTD])
+            self.zstd_descomprimir = zstandard.ZstdDecompressor()
+
+    def comprimir(self, contenido: bytes):
+        if self.compresion == ZSTD:
+            return self.zstd_comprimir.compress(contenido)
+        return zlib.compress(contenido, NIVEL[ZLIB])
+
+    def comprimir_archivo(self, origen, destino, tamano: int):
+        # El mismo cuadro que comprimir(), de a bloques: descomprimir() lo lee igual.
+        if self.compresion == ZSTD:
+            # Con `size` el cuadro lleva el tamaño original, que decompress() necesita.
+            self.zstd_comprimir.copy_stream(origen, destino, size=tamano, read_size=almacen.BLOQUE, write_size=almacen.BLOQUE)
+            return
+        compresor = zlib.compressobj(NIVEL[ZLIB])
+        for bloque in iter(lambda: origen.read(almacen.BLOQUE), b""):
+            destino.write(compresor.compress(bloque))
+        destino.write(compresor.flush())
+
+    def descomprimir(self, cuadro: bytes):
+        if self.compresion == ZSTD:
+            return self.zstd_descomprimir.decompress(cuadro)
+        return zlib.decompress(cuadro)
+
+    def descomprimir_archivo(self, origen, longitud: int, destino):
+        # Los `longitud` bytes siguientes de `origen` son un cuadro; se descomprime de a bloques en `destino`.
+        descompresor = self.zstd_descomprimir.decompressobj() if self.compresion == ZSTD else zlib.decompressobj()
+        while longitud > 0:
+            bloque = origen.read(min(almacen.BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            destino.write(descompresor.decompress(bloque))
+        destino.write(descompresor.flush())
+
+class Paquetes:
+    # Sustituye las carpetas <año>/<mes>/<día>/ con un archivo por video: todos los videos publicados
+    # el mismo día van en un solo paquete <día><extension><compresión> de la carpeta, uno tras otro y
+    # comprimidos por separado. El índice SQLite guarda de cada video el paquete, desplazamiento y
+    # longitud de su cuadro, así se lee directo sin recorrer nada. Los paquetes sólo crecen: volver a
+    # guardar un video agrega un cuadro nuevo y el anterior queda sin uso hasta compactar().
+    def __init__(self, carpeta: str, extension: str, compresion: str = ZSTD):
+        self.carpeta = carpeta
+        self.extension = extension
+        self.compresion = compresion
+        self.compresores = {compresion: Compresor(compresion)}
+        self.lock = threading.Lock()
+        os.makedirs(carpeta, exist_ok=True)
+
+        self.conexion = sqlite3.connect(os.path.join(carpeta, INDICE), check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS entradas ("
+            "video_id TEXT PRIMARY KEY, paquete TEXT NOT NULL, desplazamiento INTEGER NOT NULL, longitud INTEGER NOT NULL, "
+            "tamano INTEGER NOT NULL, compresion TEXT NOT NULL, nombre TEXT, dia TEXT NOT NULL)"
+        )
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS entradas_paquete ON entradas (paquete, desplazamiento)")
+        self.conexion.commit()
+
+    def compresor(self, compresion: str):
+        # Un paquete migrado con otra compresión se sigue leyendo; cada entrada dice cuál usó.
+        if compresion not in self.compresores:
+            self.compresores[compresion] = Compresor(compresion)
+        return self.compresores[compresion]
+
+    def nombre_paquete(self, dia: str):
+        return f"{dia}{self.extension}{COMPRESIONES[self.compresion]}"
+
+    def agregar(self, video_id: str, contenido: bytes, dia: str, nombre: str = None):
+        cuadro = self.compresor(self.compresion).comprimir(contenido)
+        self._anexar(video_id, lambda archivo: archivo.write(cuadro), len(contenido), dia, nombre)
+
+    def agregar_archivo(self, video_id: str, ruta: str, dia: str, nombre: str = None):
+        # Como agregar(), sin cargar el archivo: se comprime de a bloques a un temporal junto a `ruta`
+        # (fuera del candado, para no frenar a los demás trabajadores) y éste se copia al paquete.
+        comprimido = f"{ruta}.{uuid.uuid4().hex}{COMPRESIONES[self.compresion]}"
+        try:
+            with open(ruta, 'rb') as origen, open(comprimido, 'wb') as destino:
+                self.compresor(self.compresion).comprimir_archivo(origen, destino, os.path.getsize(ruta))
+            with open(comprimido, 'rb') as cuadro:
+                self._anexar(video_id, lambda archivo: shutil.copyfileobj(cuadro, archivo, almacen.BLOQUE), os.path.getsize(ruta), dia, nombre)
+        finally:
+            os.remove(comprimido)
+
+    def _anexar(self, video_id: str, escribir, tamano: int, dia: str, nombre: str):
+        paquete = self.nombre_paquete(dia)
+        with self.lock:
+            # Primero los datos y después el índice: un corte a la mitad deja bytes sin uso, nunca una entrada rota.
+            with open(os.path.join(self.carpeta, paquete), 'ab') as archivo:
+                desplazamiento = archivo.seek(0, os.SEEK_END)
+                escribir(archivo)
+                longitud = archivo.tell() - desplazamiento
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO entradas (video_id, paquete, desplazamiento, longitud, tamano, compresion, nombre, dia) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (video_id, paquete, desplazamiento, longitud, tamano, self.compresion, nombre, dia)
+            )
+            self.conexion.commit()
+        metricas.contar("bytes_escritos_total", longitud, tipo=self.extension.lstrip("."), formato=PAQUETES)
+
+    def entrada(self, video_id: str):
+        with self.lock:
+            fila = self.conexion.execute(
+                "SELECT paquete, desplazamiento, longitud, tamano, compresion, nombre, dia FROM entradas WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if fila is None:
+            return None
+        return dict(zip(("paquete", "desplazamiento", "longitud", "tamano", "compresion", "nombre", "dia"), fila))
+
+    def contiene(self, video_id: str):
+        return self.entrada(video_id) is not None
+
+    def leer(self, video_id: str):
+        entrada = self.entrada(video_id)
+        if entrada is None:
+            return None
+        with open(os.path.join(self.carpeta, entrada["paquete"]), 'rb') as archivo:
+            archivo.seek(entrada["desplazamiento"])
+            cuadro = archivo.read(entrada["longitud"])
+        return self.compresor(entrada["compresion"]).descomprimir(cuadro)
+
+    def video_ids(self, dia: str = None):
+        with self.lock:
+            if dia:
+                return [fila[0] for fila in self.conexion.execute("SELECT video_id FROM entradas WHERE dia = ? ORDER BY video_id", (dia,))]
+            return [fila[0] for fila in self.conexion.execute("SELECT video_id FROM entradas ORDER BY dia, video_id")]
+
+    def carpeta_trabajo(self, video_id: str):
+        # youtube_dl y los comentarios escriben un archivo suelto; cada video usa su propia carpeta para
+        # que los trabajadores no se pisen, y empacar() la vacía.
+        carpeta = os.path.join(self.carpeta, TRABAJO, video_id)
+        os.makedirs(carpeta, exist_ok=True)
+        return carpeta
+
+    def empacar(self, video_id: str, carpeta: str, dia: str):
+        # Guarda en el paquete del día el archivo de `video_id` que quedó en su carpeta de trabajo y la borra.
+        for nombre in sorted(os.listdir(carpeta)):
+            if nombre.endswith(self.extension):
+                self.agregar_archivo(video_id, os.path.join(carpeta, nombre), dia, nombre)
+                break
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    def extraer(self, video_id: str, carpeta: str, nombre: str = None):
+        # Lo contrario de empacar: deja el archivo del video en `carpeta` con `nombre` o su nombre original.
+        entrada = self.entrada(video_id)
+        if entrada is None:
+            return None
+        ruta = os.path.join(carpeta, nombre or entrada["nombre"] or f"{video_id}{self.extension}")
+        with open(os.path.join(self.carpeta, entrada["paquete"]), 'rb') as origen, open(ruta, 'wb') as destino:
+            origen.seek(entrada["desplazamiento"])
+            self.compresor(entrada["compresion"]).descomprimir_archivo(origen, entrada["longitud"], destino)
+        return ruta
+
+    def compactar(self):
+        # Reescribe los paquetes con cuadros sin uso copiando sólo los vigentes (sin descomprimir).
+        # Devuelve los bytes recuperados. No se debe correr mientras una recolección escribe en la carpeta.
+        recuperados = 0
+        with self.lock:
+            paquetes = [fila[0] for fila in self.conexion.execute("SELECT DISTINCT paquete FROM entradas")]
+            for paquete in paquetes:
+                ruta = os.path.join(self.carpeta, paquete)
+                entradas = self.conexion.execute(
+                    "SELECT video_id, desplazamiento, longitud FROM entradas WHERE paquete = ? ORDER BY desplazamiento", (paquete,)
+                ).fetchall()
+                if sum(longitud for _, _, longitud in entradas) == os.path.getsize(ruta):
+                    continue
+
+                temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+                nuevos = []
+                with open(ruta, 'rb') as origen, open(temporal, 'wb') as destino:
+                    for video_id, desplazamiento, longitud in entradas:
+                        origen.seek(desplazamiento)
+                        nuevos.append((destino.tell(), video_id))
+                        destino.write(origen.read(longitud))
+                recuperados += os.path.getsize(ruta) - os.path.getsize(temporal)
+                with self.conexion:
+                    self.conexion.executemany("UPDATE entradas SET desplazamiento = ? WHERE video_id = ?", nuevos)
+                    os.replace(temporal, ruta)
+        return recuperados
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+ABIERTOS = {}
+_lock_abiertos = threading.Lock()
+
+def abrir(carpeta: str, extension: str, compresion: str = ZSTD):
+    # Una sola instancia por carpeta: las páginas y los trabajadores de una fuente comparten el índice.
+    clave = os.path.abspath(carpeta)
+    with _lock_abiertos:
+        if clave not in ABIERTOS:
+            ABIERTOS[clave] = Paquetes(carpeta, extension, compresion)
+        return ABIERTOS[clave]
+
+def cerrar_todos():
+    with _lock_abiertos:
+        for paquetes in ABIERTOS.values():
+            paquetes.cerrar()
+        ABIERTOS.clear()
+
+def empacar(paquetes, video_id: str, carpeta: str, dia: str):
+    # Las fuentes llaman esto sin importar el almacenamiento (None cuando son archivos sueltos).
+    if paquetes is not None:
+        paquetes.empacar(video_id, carpeta, dia)
+
+def empacar_descargas(paquetes, tareas: list[tuple[str, str]], dias: dict, fallos: dict):
+    # Después de subtitulos.descargar_lote: lo descargado pasa al paquete de su día y las carpetas de
+    # trabajo de los que fallaron se descartan.
+    if paquetes is None:
+        return
+    for video_id, carpeta in tareas:
+        if video_id in fallos:
+            shutil.rmtree(carpeta, ignore_errors=True)
+        else:
+            paquetes.empacar(video_id, carpeta, dias[video_id])
+
+def _dia_de_carpeta(ruta: str):
+    nombre = os.path.basename(os.path.dirname(ruta))
+    if PATRON_DIA.match(nombre):
+        return nombre
+    return date.fromtimestamp(os.path.getmtime(ruta)).isoformat()
+
+def clave_titulo(texto: str):
+    # Los nombres de archivo no guardan el título tal cual: youtube_dl cambia por "_" lo que el sistema de
+    # archivos no admite y los comentarios, según la versión que los escribió, quitan signos o acentos.
+    # Para compararlos sólo cuentan letras y números, sin acentos ni mayúsculas.
+    sin_acentos = unicodedata.normalize("NFKD", texto)
+    return "".join(char for char in sin_acentos if char.isalnum()).casefold()
+
+def _agregar_candidato(candidatos: dict, clave: tuple, video_id: str):
+    candidatos.setdefault(clave, set()).add(video_id)
+
+def _titulo_de_ttml(nombre: str):
+    # "<título>_ID:<video_id>.es.ttml" -> "<título>"; None si el nombre no trae el ID.
+    for separador in almacen.SEPARADORES_ID:
+        if separador in nombre:
+            return nombre.split(separador)[0]
+    return None
+
+def ids_de_subtitulos(carpeta_comentarios: str):
+    # (clave_titulo, día de publicación) -> IDs, de los TTML de la misma fuente
+    # (<fuente>/subtitulos/raw), sueltos o ya empacados: youtube_dl los nombra <título>_ID:<id>.
+    candidatos = {}
+    raw = os.path.join(os.path.dirname(os.path.normpath(carpeta_comentarios)), "subtitulos", "raw")
+    if not os.path.isdir(raw):
+        return candidatos
+
+    for raiz, carpetas, archivos in os.walk(raw):
+        carpetas[:] = [subcarpeta for subcarpeta in carpetas if subcarpeta != TRABAJO]
+        for archivo in archivos:
+            titulo = _titulo_de_ttml(archivo)
+            if archivo.endswith(".ttml") and titulo is not None:
+                _agregar_candidato(candidatos, (clave_titulo(titulo), _dia_de_carpeta(os.path.join(raiz, archivo))), almacen.video_id_desde_archivo(archivo))
+
+    if os.path.exists(os.path.join(raw, INDICE)):
+        empacados = Paquetes(raw, ".ttml", ZLIB)
+        for video_id in empacados.video_ids():
+            entrada = empacados.entrada(video_id)
+            titulo = _titulo_de_ttml(entrada["nombre"] or "")
+            if titulo is not None:
+                _agregar_candidato(candidatos, (clave_titulo(titulo), entrada["dia"]), video_id)
+        empacados.cerrar()
+    return candidatos
+
+def ids_de_cache(ruta: str = None):
+    # De los videos que alguna vez pidió videos.list: (clave_titulo, publishedAt) -> IDs y, para cuando el
+    # título cambió después de escribir el archivo, (canal, publishedAt) -> IDs.
+    candidatos = {}
+    ruta = ruta or modulo_cache.RUTA_CACHE
+    if not os.path.exists(ruta):
+        return candidatos
+    cache = modulo_cache.CacheMetadatos(ruta)
+    try:
+        for video_id, snippet in cache.todos("video").items():
+            _agregar_candidato(candidatos, (clave_titulo(snippet["title"]), snippet["publishedAt"]), video_id)
+            _agregar_candidato(candidatos, (snippet.get("channelTitle"), snippet["publishedAt"], "canal"), video_id)
+    finally:
+        cache.cerrar()
+    return candidatos
+
+def resolver_id_comentarios(ruta: str, registro: dict, vistas=None, subtitulos: dict = None, cache: dict = None):
+    # Los archivos de comentarios llevan el título del video, no su ID. Se busca, en este orden, en la
+    # vista del almacén (la ruta exacta), en los TTML de la misma fuente (título y día de publicación),
+    # en la caché de metadatos por título, día y hora de publicación y, por último, en la caché por
+    # canal, día y hora. Si no hay exactamente un ID, None.
+    video_id = vistas.video_de_vista(ruta) if vistas else None
+    if video_id:
+        return video_id
+
+    titulo = clave_titulo(os.path.splitext(os.path.basename(ruta))[0])
+    fecha, hora = registro.get("fecha_publicacion"), registro.get("hora_publicacion")
+    publicado = f"{fecha}T{hora}Z"
+    for candidatos, clave in ((subtitulos or {}, (titulo, fecha)),
+                              (cache or {}, (titulo, publicado)),
+                              (cache or {}, (registro.get("nombre_canal"), publicado, "canal"))):
+        ids = candidatos.get(clave, set())
+        if len(ids) == 1:
+            return next(iter(ids))
+    return None
+
+def migrar_carpeta(carpeta: str, compresion: str = ZSTD, conservar: bool = False):
+    # Empaca un árbol ya recolectado: cada subtitulos/raw/**/*.ttml y cada comentarios/**/*.json dentro de
+    # `carpeta`. El día sale de la carpeta <AAAA-MM-DD> (TTML) o de "fecha_publicacion" (comentarios).
+    # Cada archivo se lee de vuelta del paquete antes de borrarlo; con `conservar` no se borra.
+    # Los comentarios cuyo ID no se puede saber (ver resolver_id_comentarios) se quedan sueltos y se
+    # devuelven en "sin_id": empacarlos bajo su título los dejaría fuera del alcance de las corridas.
+    contados = {"raw": 0, "comentarios": 0, "sin_id": []}
+    vistas = almacen.Almacen() if os.path.exists(os.path.join(almacen.CARPETA_ALMACEN, "indice.sqlite3")) else None
+    cache = None
+
+    for raiz, carpetas, _ in os.walk(carpeta):
+        nombre = os.path.basename(raiz)
+        if nombre == "raw" and os.path.basename(os.path.dirname(raiz)) == "subtitulos":
+            tipo, extension = "raw", ".ttml"
+        elif nombre == "comentarios":
+            tipo, extension = "comentarios", ".json"
+        else:
+            continue
+        carpetas.clear()
+
+        if tipo == "comentarios":
+            subtitulos = ids_de_subtitulos(raiz)
+            cache = ids_de_cache() if cache is None else cache
+
+        paquetes = Paquetes(raiz, extension, compresion)
+        sueltos = []
+        for subraiz, subcarpetas, archivos in os.walk(raiz):
+            subcarpetas[:] = [subcarpeta for subcarpeta in subcarpetas if subcarpeta != TRABAJO]
+            sueltos.extend(os.path.join(subraiz, archivo) for archivo in sorted(archivos) if archivo.endswith(extension))
+
+        for ruta in sueltos:
+            with open(ruta, 'rb') as archivo:
+                contenido = archivo.read()
+            if tipo == "raw":
+                video_id = almacen.video_id_desde_archivo(ruta)
+                dia = _dia_de_carpeta(ruta)
+            else:
+                registro = json.loads(contenido)
+                video_id = resolver_id_comentarios(ruta, registro, vistas, subtitulos, cache)
+                if video_id is None:
+                    contados["sin_id"].append(ruta)
+                    continue
+                dia = registro.get("fecha_publicacion") or _dia_de_carpeta(ruta)
+
+            paquetes.agregar(video_id, contenido, dia, os.path.basename(ruta))
+            if paquetes.leer(video_id) != contenido:
+                raise ValueError(f"El contenido empacado de {ruta} no coincide con el original; no se borró.")
+            if not conservar:
+                os.remove(ruta)
+            contados[tipo] += 1
+
+        if not conservar:
+            # Las carpetas <año>/<mes>/<día> que quedaron vacías.
+            for subraiz, _, _ in sorted(os.walk(raiz), key=lambda paso: len(paso[0]), reverse=True):
+                if subraiz != raiz and not os.listdir(subraiz):
+                    os.rmdir(subraiz)
+        paquetes.cerrar()
+
+    if vistas:
+        vistas.cerrar()
+    return contados
+
+def main():
+    # python -m Comun.paquetes migrar ./Canal/YouTube --compresion zstd
+    # python -m Comun.paquetes leer "./Canal/YouTube/El Universal/subtitulos/raw" HUUol8Sc6ng
+    parser = argparse.ArgumentParser(description="Paquetes comprimidos de subtítulos TTML y comentarios.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    migracion = comandos.add_parser("migrar", help="Empaca los archivos sueltos de estas carpetas.")
+    migracion.add_argument("carpetas", nargs="+")
+    migracion.add_argument("--compresion", choices=tuple(COMPRESIONES), default=ZSTD)
+    migracion.add_argument("--conservar", action="store_true", help="No borra los archivos sueltos.")
+
+    lectura = comandos.add_parser("leer", help="Imprime el contenido de un video.")
+    lectura.add_argument("carpeta", help="Carpeta con los paquetes (subtitulos/raw o comentarios).")
+    lectura.add_argument("video_id")
+
+    compactacion = comandos.add_parser("compactar", help="Quita de los paquetes los cuadros reemplazados.")
+    compactacion.add_argument("carpeta")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "migrar":
+            for carpeta in args.carpetas:
+                contados = migrar_carpeta(carpeta, args.compresion, args.conservar)
+                print(f"{carpeta}: {contados['raw']} TTML y {contados['comentarios']} archivos de comentarios empacados")
+                if contados["sin_id"]:
+                    print(f"{len(contados['sin_id'])} archivos de comentarios se quedaron sueltos porque no se encontró su videoId "
+                          "(ni en el almacén, ni en los TTML de la fuente, ni en la caché de metadatos):")
+                    for ruta in contados["sin_id"]:
+                        print(f"    {ruta}")
+            return
+
+        # Para leer y compactar la compresión de escritura no importa: cada entrada dice con cuál se guardó.
+        extension = ".ttml" if os.path.basename(os.path.normpath(args.carpeta)) == "raw" else ".json"
+        paquetes = Paquetes(args.carpeta, extension, ZLIB)
+        try:
+            if args.comando == "leer":
+                contenido = paquetes.leer(args.video_id)
+                if contenido is None:
+                    raise ValueError(f"El video {args.video_id} no está en {args.carpeta}.")
+                print(contenido.decode('utf-8'))
+            else:
+                print(f"{paquetes.compactar()} bytes recuperados")
+        finally:
+            paquetes.cerrar()
+    except ValueError as e:
+        print(e)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Comun import metricas
+from Comun.cuota import CuotaAgotada
+
+CONCURRENCIA_FUENTES = 1
+COMPLETADA = "completada"
+SIN_CUOTA = "sin cuota"
+NO_INICIADA = "no iniciada"
+ERROR = "error"
+ESTADOS_PENDIENTES = (SIN_CUOTA, NO_INICIADA, ERROR)
+POLITICA = "Las fuentes sin cuota, no iniciadas o con error quedan en pendientes.json y se reintentan primero en la siguiente corrida."
+
+def opciones_desde_config(ruta_archivo: str, concurrencia: int = CONCURRENCIA_FUENTES, peticiones_por_segundo: float = None):
+    # "concurrenciaFuentes" y "peticionesPorSegundo" son opcionales en el JSON de configuración.
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        data = json.load(archivo)
+    return max(1, int(data.get("concurrenciaFuentes", concurrencia))), data.get("peticionesPorSegundo", peticiones_por_segundo)
+
+class Rastreador:
+    # Procesa varias fuentes a la vez con `concurrencia` trabajadores. Cada fuente lleva su propio
+    # estado (fechas, bitácora, tubería); lo compartido es el cliente, con su límite de tasa y su
+    # libro de cuota globales. Si la cuota se acaba ya no se inician fuentes nuevas.
+    def __init__(self, concurrencia: int = CONCURRENCIA_FUENTES):
+        self.concurrencia = max(1, concurrencia)
+        self.sin_cuota = threading.Event()
+        self.lock = threading.Lock()
+        self.resultados = {}
+        self.orden = []
+        self.terminadas = 0
+
+    def _procesar(self, id_fuente: str, funcion, total: int):
+        if self.sin_cuota.is_set():
+            resultado = {"estado": NO_INICIADA}
+        else:
+            inicio = time.monotonic()
+            try:
+                resultado = {"estado": COMPLETADA, **(funcion() or {})}
+            except CuotaAgotada as e:
+                self.sin_cuota.set()
+                resultado = {"estado": SIN_CUOTA, "error": str(e)}
+            except Exception as e:
+                resultado = {"estado": ERROR, "error": f"{type(e).__name__}: {e}"}
+            resultado["segundos"] = time.monotonic() - inicio
+            metricas.observar("fuente_segundos", resultado["segundos"], estado=resultado["estado"])
+        metricas.contar("fuentes_total", estado=resultado["estado"])
+        metricas.evento("fuente", fuente=id_fuente, **resultado)
+
+        with self.lock:
+            self.resultados[id_fuente] = resultado
+            self.terminadas += 1
+            terminadas = self.terminadas
+        if resultado["estado"] != NO_INICIADA:
+            detalle = f" ({resultado['error']})" if "error" in resultado else ""
+            print(f"[{terminadas}/{total}] {id_fuente}: {resultado['estado']} en {resultado['segundos']:.1f} s{detalle} \n")
+
+    def ejecutar(self, fuentes: list[tuple[str, object]]):
+        # fuentes: pares (id, función sin argumentos que devuelve un dict de estadísticas o None).
+        total = len(fuentes)
+        self.orden = [id_fuente for id_fuente, _ in fuentes]
+        if self.concurrencia == 1:
+            for id_fuente, funcion in fuentes:
+                self._procesar(id_fuente, funcion, total)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrencia, max(1, total))) as ejecutor:
+                for id_fuente, funcion in fuentes:
+                    ejecutor.submit(self._procesar, id_fuente, funcion, total)
+        return {id_fuente: self.resultados[id_fuente] for id_fuente, _ in fuentes}
+
+    def pendientes(self):
+        # En el orden original: las interrumpidas por cuota, las que no alcanzaron a empezar y las que
+        # terminaron con error. Todas se reintentan primero en la siguiente corrida (ver POLITICA).
+        return [id_fuente for id_fuente in self.orden if self.resultados.get(id_fuente, {}).get("estado") in ESTADOS_PENDIENTES]
+
+    def con_error(self):
+        return [id_fuente for id_fuente in self.orden if self.resultados.get(id_fuente, {}).get("estado") == ERROR]
+
+def imprimir_resumen(resultados: dict, segundos: float):
+    print("Resumen de la corrida:")
+    for id_fuente, resultado in resultados.items():
+        partes = [resultado["estado"]]
+        if "segundos" in resultado:
+            partes.append(f"{resultado['segundos']:.1f} s")
+        if "paginas" in resultado:
+            partes.append(f"{resultado['paginas']} páginas, {resultado['videos']} videos")
+        if "error" in resultado:
+            partes.append(resultado["error"])
+        print(f"  {id_fuente}: {', '.join(partes)}")
+
+    estados = {}
+    for resultado in resultados.values():
+        estados[resultado["estado"]] = estados.get(resultado["estado"], 0) + 1
+    conteo = ", ".join(f"{cantidad} {estado}" for estado, cantidad in estados.items())
+    videos = sum(resultado.get("videos", 0) for resultado in resultados.values())
+    print(f"Total: {len(resultados)} fuentes ({conteo}), {videos} videos en {segundos:.1f} s")
+    if any(resultado["estado"] in ESTADOS_PENDIENTES for resultado in resultados.values()):
+        print(POLITICA)
+    print()
@@ -0,0 +1,186 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+REINTENTOS = 5
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 60.0
+# Fallos seguidos de un endpoint que abren su circuito y segundos que permanece abierto.
+UMBRAL_CIRCUITO = 5
+ENFRIAMIENTO_CIRCUITO = 60.0
+
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+RAZONES_REINTENTABLES = ("rateLimitExceeded", "userRateLimitExceeded", "backendError")
+
+class CircuitoAbierto(ValueError):
+    pass
+
+class FalloTransitorio(Exception):
+    # La llamada falló de una forma que vale la pena repetir. Si ya no quedan intentos se
+    # lanza `error` o, si no hay, se devuelve `resultado` para que quien llama lo maneje como antes.
+    def __init__(self, motivo: str, espera: float = None, resultado=None, error: BaseException = None):
+        super().__init__(motivo)
+        self.espera = espera
+        self.resultado = resultado
+        self.error = error
+
+def es_reintentable(status: int, contenido=None):
+    if status in ESTADOS_REINTENTABLES:
+        return True
+    if status != 403 or not contenido:
+        return False
+    try:
+        errores = json.loads(contenido).get("error", {}).get("errors", [])
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return any(error.get("reason") in RAZONES_REINTENTABLES for error in errores)
+
+def leer_retry_after(valor):
+    # Retry-After llega en segundos o como fecha HTTP.
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(valor) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class Interruptor:
+    # Circuito por endpoint: tras `umbral` fallos seguidos se abre y rechaza llamadas durante
+    # `enfriamiento` segundos; después deja pasar una de prueba y se cierra si sale bien.
+    def __init__(self, endpoint: str, umbral: int = UMBRAL_CIRCUITO, enfriamiento: float = ENFRIAMIENTO_CIRCUITO):
+        self.endpoint = endpoint
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.fallos = 0
+        self.abierto_desde = None
+        self.prueba_en_curso = False
+        self.lock = threading.Lock()
+
+    def permitir(self):
+        with self.lock:
+            if self.abierto_desde is None:
+                return
+            if time.monotonic() - self.abierto_desde >= self.enfriamiento and not self.prueba_en_curso:
+                self.prueba_en_curso = True
+                return
+        raise CircuitoAbierto(f"Circuito abierto para {self.endpoint}: demasiados fallos seguidos.")
+
+    def exito(self):
+        with self.lock:
+            self.fallos = 0
+            self.abierto_desde = None
+            self.prueba_en_curso = False
+
+    def liberar(self):
+        # La llamada se cortó sin decir nada del endpoint (p. ej. KeyboardInterrupt): si era la de prueba,
+        # se deja pasar otra en vez de quedar abierto para siempre.
+        with self.lock:
+            self.prueba_en_curso = False
+
+    def fallo(self):
+        with self.lock:
+            self.fallos += 1
+            if self.prueba_en_curso or self.fallos >= self.umbral:
+                self.abierto_desde = time.monotonic()
+            self.prueba_en_curso = False
+
+class PoliticaReintentos:
+    def __init__(self, reintentos: int = REINTENTOS, espera_base: float = ESPERA_BASE, espera_maxima: float = ESPERA_MAXIMA,
+                 umbral: int = UMBRAL_CIRCUITO, enfriamiento: float = ENFRIAMIENTO_CIRCUITO, dormir=time.sleep):
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.dormir = dormir
+        self.interruptores = {}
+        self.lock = threading.Lock()
+
+    def interruptor(self, endpoint: str):
+        with self.lock:
+            if endpoint not in self.interruptores:
+                self.interruptores[endpoint] = Interruptor(endpoint, self.umbral, self.enfriamiento)
+            return self.interruptores[endpoint]
+
+    def espera(self, intento: int, sugerida: float = None):
+        # Backoff exponencial con jitter completo; Retry-After manda si el servidor lo envía.
+        if sugerida is not None:
+            return min(sugerida, self.espera_maxima)
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+
+    def ejecutar(self, endpoint: str, llamada):
+        # `llamada()` devuelve el resultado o lanza FalloTransitorio; cualquier otra excepción se propaga.
+        # Un error definitivo (404, video no disponible, cuota agotada) quiere decir que el endpoint
+        # responde, así que para el circuito cuenta como éxito.
+        interruptor = self.interruptor(endpoint)
+        for intento in range(self.reintentos + 1):
+            interruptor.permitir()
+            try:
+                resultado = llamada()
+            except FalloTransitorio as fallo:
+                interruptor.fallo()
+                if intento == self.reintentos:
+                    if fallo.error is not None:
+                        raise fallo.error
+                    return fallo.resultado
+                espera = self.espera(intento, fallo.espera)
+                print(f"{endpoint}: {fallo}; reintento {intento + 1}/{self.reintentos} en {espera:.1f} s \n")
+                self.dormir(espera)
+            except Exception:
+                interruptor.exito()
+                raise
+            except BaseException:
+                interruptor.liberar()
+                raise
+            else:
+                interruptor.exito()
+                return resultado
+
+class ListaFallidos:
+    # Videos que siguieron fallando después de los reintentos, guardados en JSON para
+    # volver a procesarlos en otra corrida: {etapa: {video_id: {error, intentos, fecha, ...}}}.
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.entradas = {}
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as archivo_json:
+                self.entradas = json.load(archivo_json)
+
+    def _guardar(self):
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo_json:
+            json.dump(self.entradas, archivo_json, ensure_ascii=False, indent=4)
+        os.replace(temporal, self.ruta)
+
+    def agregar(self, video_id: str, etapa: str, error, **datos):
+        with self.lock:
+            fallidos = self.entradas.setdefault(etapa, {})
+            anterior = fallidos.get(video_id, {})
+            fallidos[video_id] = {
+                **anterior,
+                **datos,
+                "error": str(error),
+                "intentos": anterior.get("intentos", 0) + 1,
+                "fecha": datetime.now().isoformat(timespec='seconds')
+            }
+            self._guardar()
+
+    def quitar(self, etapa: str, video_ids):
+        with self.lock:
+            fallidos = self.entradas.get(etapa, {})
+            quitados = [fallidos.pop(video_id) for video_id in video_ids if video_id in fallidos]
+            if quitados:
+                self._guardar()
+
+    def pendientes(self, etapa: str):
+        with self.lock:
+            return {video_id: dict(entrada) for video_id, entrada in self.entradas.get(etapa, {}).items()}
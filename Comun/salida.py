@@ -0,0 +1,180 @@
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from glob import glob
+from Comun import metricas
+
+ARCHIVOS = "archivos"
+JSONL = "jsonl"
+PARQUET = "parquet"
+FORMATO_POR_DEFECTO = ARCHIVOS
+TAMANO_BUFFER = 500
+
+# Un candado por partición JSONL compartido por todas las instancias del proceso: dos recolectores
+# que vacían el mismo día a la vez intercalarían sus miembros gzip a medio escribir.
+_candados_particion = {}
+_candado_registro = threading.Lock()
+
+def candado_particion(ruta: str):
+    with _candado_registro:
+        return _candados_particion.setdefault(os.path.abspath(ruta), threading.Lock())
+
+def formato_desde_config(ruta_archivo: str):
+    # La llave "salida" del JSON de configuración elige el formato; sin ella se conserva un archivo por video.
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        formato = json.load(archivo).get("salida") or FORMATO_POR_DEFECTO
+
+    if formato not in SALIDAS:
+        raise ValueError(f"Formato de salida desconocido: {formato}. Opciones: {', '.join(SALIDAS)}.")
+    return formato
+
+class SalidaArchivos:
+    # Un JSON con sangría por video dentro de la carpeta que indique quien llama (formato original).
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+
+    def escribir(self, registro: dict, carpeta: str, nombre: str, video_id: str):
+        os.makedirs(carpeta, exist_ok=True)
+        json_file_path = os.path.join(carpeta, f"{nombre}.json")
+        with open(json_file_path, 'w', encoding='utf-8') as json_file:
+            json.dump(registro, json_file, ensure_ascii=False, indent=4)
+        metricas.contar("bytes_escritos_total", os.path.getsize(json_file_path), tipo="subtitulos", formato=ARCHIVOS)
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class SalidaParticionada(SalidaArchivos):
+    # Acumula registros por fecha de publicación y los agrega en bloque a la partición de ese día.
+    def __init__(self, out_dir: str, tamano_buffer: int = TAMANO_BUFFER):
+        super().__init__(out_dir)
+        self.tamano_buffer = tamano_buffer
+        self.pendientes = {}
+        self.total = 0
+
+    def escribir(self, registro: dict, carpeta: str, nombre: str, video_id: str):
+        fila = {"video_id": video_id, "archivo": nombre, **registro}
+        self.pendientes.setdefault(registro["fecha_publicacion"], []).append(fila)
+        self.total += 1
+        if self.total >= self.tamano_buffer:
+            self.vaciar()
+
+    def vaciar(self):
+        for fecha, filas in self.pendientes.items():
+            self.agregar_particion(fecha, filas)
+        self.pendientes = {}
+        self.total = 0
+
+    def agregar_particion(self, fecha: str, filas: list[dict]):
+        raise NotImplementedError
+
+    def cerrar(self):
+        self.vaciar()
+
+class SalidaJsonl(SalidaParticionada):
+    # clean/<AAAA-MM-DD>.jsonl.gz; cada vaciado agrega un miembro gzip nuevo, así nunca se reescribe el archivo.
+    # Volver a recolectar un video agrega otra fila con su video_id: leer_registros se queda con la última.
+    def agregar_particion(self, fecha: str, filas: list[dict]):
+        ruta = ruta_particion(self.out_dir, JSONL, fecha)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with candado_particion(ruta):
+            antes = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+            with gzip.open(ruta, 'at', encoding='utf-8') as archivo:
+                for fila in filas:
+                    archivo.write(json.dumps(fila, ensure_ascii=False) + "\n")
+            escritos = os.path.getsize(ruta) - antes
+        metricas.contar("bytes_escritos_total", escritos, tipo="subtitulos", formato=JSONL)
+
+class SalidaParquet(SalidaParticionada):
+    # clean/fecha=<AAAA-MM-DD>/<parte>.parquet; Parquet no admite agregar filas, cada vaciado es una parte nueva.
+    # Las partes empiezan con la hora en nanosegundos para que ordenadas por nombre queden en orden de escritura.
+    def __init__(self, out_dir: str, tamano_buffer: int = TAMANO_BUFFER):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("La salida en Parquet necesita pyarrow: pip install pyarrow")
+        super().__init__(out_dir, tamano_buffer)
+        self.pa = pyarrow
+
+    def agregar_particion(self, fecha: str, filas: list[dict]):
+        carpeta = ruta_particion(self.out_dir, PARQUET, fecha)
+        os.makedirs(carpeta, exist_ok=True)
+        tabla = self.pa.Table.from_pylist(filas)
+        ruta = os.path.join(carpeta, f"{time.time_ns():020d}-{uuid.uuid4().hex}.parquet")
+        self.pa.parquet.write_table(tabla, ruta)
+        metricas.contar("bytes_escritos_total", os.path.getsize(ruta), tipo="subtitulos", formato=PARQUET)
+
+SALIDAS = {
+    ARCHIVOS: SalidaArchivos,
+    JSONL: SalidaJsonl,
+    PARQUET: SalidaParquet
+}
+
+def crear_salida(formato: str, out_dir: str):
+    return SALIDAS[formato](out_dir)
+
+def ruta_particion(out_dir: str, formato: str, fecha: str):
+    clean_dir = os.path.join(out_dir, "clean")
+    if formato == JSONL:
+        return os.path.join(clean_dir, f"{fecha}.jsonl.gz")
+    return os.path.join(clean_dir, f"fecha={fecha}")
+
+def fecha_de_particion(ruta: str):
+    nombre = os.path.basename(ruta)
+    return nombre.split("=")[-1].split(".")[0]
+
+def _ultimos_por_video(leer):
+    # Las particiones sólo crecen, así que un video recolectado dos veces aparece dos veces. `leer` se
+    # recorre dos veces: la primera sólo anota la última posición de cada video_id, la segunda devuelve
+    # esas filas en orden. Así se conserva la última versión sin guardar la partición en memoria.
+    ultimas = {}
+    for posicion, registro in enumerate(leer()):
+        ultimas[registro["video_id"]] = posicion
+    for posicion, registro in enumerate(leer()):
+        if ultimas[registro["video_id"]] == posicion:
+            yield registro
+
+def _leer_jsonl(ruta: str):
+    with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+        for linea in archivo:
+            yield json.loads(linea)
+
+def _leer_parquet(ruta: str):
+    import pyarrow.parquet
+    for parte in sorted(glob(os.path.join(ruta, "*.parquet"))):
+        for lote in pyarrow.parquet.ParquetFile(parte).iter_batches():
+            yield from lote.to_pylist()
+
+def leer_registros(out_dir: str, formato: str = FORMATO_POR_DEFECTO, desde: str = None, hasta: str = None):
+    # Devuelve los registros uno por uno sin cargar la salida completa; `desde`/`hasta` (AAAA-MM-DD)
+    # descartan particiones enteras sin abrirlas. Para Pandas: pd.DataFrame(leer_registros(...)).
+    # En JSONL y Parquet cada video sale una sola vez, con la fila que se escribió al último.
+    clean_dir = os.path.join(out_dir, "clean")
+
+    if formato == ARCHIVOS:
+        for ruta in sorted(glob(os.path.join(clean_dir, "**", "*.json"), recursive=True)):
+            with open(ruta, 'r', encoding='utf-8') as archivo:
+                registro = json.load(archivo)
+            if (desde and registro["fecha_publicacion"] < desde) or (hasta and registro["fecha_publicacion"] > hasta):
+                continue
+            yield {"archivo": os.path.splitext(os.path.basename(ruta))[0], **registro}
+        return
+
+    patron = "*.jsonl.gz" if formato == JSONL else "fecha=*"
+    for ruta in sorted(glob(os.path.join(clean_dir, patron))):
+        fecha = fecha_de_particion(ruta)
+        if (desde and fecha < desde) or (hasta and fecha > hasta):
+            continue
+
+        # Un video siempre cae en la partición de su fecha de publicación: basta con depurar cada una.
+        leer = _leer_jsonl if formato == JSONL else _leer_parquet
+        yield from _ultimos_por_video(lambda: leer(ruta))
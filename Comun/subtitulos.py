@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Comun import almacen as modulo_almacen
+from Comun import metricas
+from Comun.resiliencia import FalloTransitorio, PoliticaReintentos
+
+TRABAJADORES = 4
+REINTENTOS = 3
+# Errores de youtube_dl que no se arreglan reintentando.
+ERRORES_PERMANENTES = ("Video unavailable", "Private video", "This video is not available", "has been removed", "members-only")
+# Clase que descarga; los benchmarks la cambian por una que no sale a la red. Con None se usa
+# youtube_dl.YoutubeDL, que se importa al descargar el primer video y no al cargar el módulo.
+DESCARGADOR = None
+PLANTILLA_SALIDA = "%(title)s_ID:%(id)s.%(ext)s"
+OPCIONES_SUBTITULOS = {
+    "writeautomaticsub": True,
+    "skip_download": True,
+    "subtitlesformat": "ttml",
+    "subtitleslangs": ["es"],
+    "logtostderr": True,
+}
+
+_local = threading.local()
+
+def _youtube_dl():
+    import youtube_dl
+    return youtube_dl
+
+def _iniciar_trabajador():
+    # Cada hilo tiene su propia instancia: YoutubeDL guarda estado en params y no es seguro compartirla.
+    descargador = DESCARGADOR or _youtube_dl().YoutubeDL
+    _local.ydl = descargador(dict(OPCIONES_SUBTITULOS))
+
+def _descargar(video_id: str, carpeta: str):
+    os.makedirs(carpeta, exist_ok=True)
+    ydl = _local.ydl
+    ydl.params["outtmpl"] = os.path.join(carpeta, PLANTILLA_SALIDA)
+    inicio = time.perf_counter()
+    try:
+        ydl.download([video_id])
+    finally:
+        segundos = time.perf_counter() - inicio
+        metricas.observar("youtube_dl_segundos", segundos)
+
+    tamano = sum(os.path.getsize(ruta) for ruta in modulo_almacen.archivos_video(carpeta, video_id))
+    metricas.contar("bytes_descargados_total", tamano, origen="youtube_dl")
+    metricas.evento("subtitulos", video_id=video_id, segundos=round(segundos, 3), bytes=tamano)
+
+def _descargar_con_reintentos(politica: PoliticaReintentos, video_id: str, carpeta: str, almacen=None):
+    # Si otra fuente ya lo descargó hoy, se enlaza desde el almacén sin llamar a youtube_dl.
+    if almacen and almacen.materializar(video_id, modulo_almacen.RAW, carpeta):
+        print(f"Subtítulos de {video_id} tomados del almacén \n")
+        return
+    if almacen:
+        # Los archivos viejos pueden ser enlaces a objetos del almacén: youtube_dl escribiría a través de ellos.
+        for ruta in modulo_almacen.archivos_video(carpeta, video_id):
+            os.remove(ruta)
+
+    def intento():
+        try:
+            _descargar(video_id, carpeta)
+        except _youtube_dl().utils.DownloadError as e:
+            if any(mensaje in str(e) for mensaje in ERRORES_PERMANENTES):
+                raise
+            raise FalloTransitorio(str(e), error=e)
+
+    # Tiempo por video, reintentos incluidos.
+    with metricas.medir("video_segundos", etapa="subtitulos"):
+        politica.ejecutar("youtube_dl", intento)
+
+    if almacen:
+        for ruta in modulo_almacen.archivos_video(carpeta, video_id):
+            almacen.importar(video_id, modulo_almacen.RAW, ruta)
+
+def politica_descargas():
+    # Una por corrida: el circuito de youtube_dl tiene que recordar los fallos de las páginas anteriores.
+    return PoliticaReintentos(reintentos=REINTENTOS)
+
+def descargar_lote(tareas: list[tuple[str, str]], trabajadores: int = TRABAJADORES, politica: PoliticaReintentos = None, almacen=None):
+    # tareas: pares (video_id, carpeta de destino). Un video que falla no detiene a los demás;
+    # se devuelve {video_id: error} con los que no se pudieron descargar. Si youtube_dl falla
+    # muchas veces seguidas el circuito se abre y el resto del lote falla sin esperar.
+    # Con `almacen` cada video se descarga una vez al día aunque aparezca en varias fuentes.
+    fallos = {}
+    if not tareas:
+        return fallos
+    politica = politica or politica_descargas()
+
+    total = len(tareas)
+    with ThreadPoolExecutor(max_workers=max(1, min(trabajadores, total)), initializer=_iniciar_trabajador) as ejecutor:
+        futuros = [ejecutor.submit(_descargar_con_reintentos, politica, video_id, carpeta, almacen) for video_id, carpeta in tareas]
+
+        # El progreso se reporta en el orden de las tareas, sin importar cuál termina primero.
+        for posicion, ((video_id, carpeta), futuro) in enumerate(zip(tareas, futuros), start=1):
+            try:
+                futuro.result()
+                metricas.contar("videos_total", etapa="subtitulos", estado="ok")
+                print(f"[{posicion}/{total}] Subtítulos de {video_id} descargados \n")
+            except Exception as e:
+                fallos[video_id] = e
+                metricas.contar("videos_total", etapa="subtitulos", estado="fallo")
+                metricas.evento("fallo", etapa="subtitulos", video_id=video_id, error=str(e))
+                print(f"[{posicion}/{total}] No se pudo descargar el video {video_id}: {e} \n")
+
+    return fallos
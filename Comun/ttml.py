@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+
+TAMANO_BLOQUE = 64 * 1024
+PROCESOS = os.cpu_count() or 1
+
+class _RecolectorTexto:
+    # Destino del parser de lxml: sólo recibe el texto en orden de documento,
+    # sin construir el árbol, así la memoria no crece con la duración del video.
+    def __init__(self):
+        self.partes = []
+
+    def data(self, texto):
+        self.partes.append(texto)
+
+    def close(self):
+        return "".join(self.partes)
+
+def _crear_parser():
+    return etree.XMLParser(target=_RecolectorTexto(), resolve_entities=False, huge_tree=True)
+
+def ttml_a_texto(ruta_archivo: str):
+    parser = _crear_parser()
+
+    with open(ruta_archivo, "rb") as archivo:
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            parser.feed(bloque)
+
+    return parser.close().strip()
+
+def contenido_a_texto(contenido: bytes):
+    # Para los TTML que ya están en memoria, p. ej. leídos de un paquete.
+    parser = _crear_parser()
+    for inicio in range(0, len(contenido), TAMANO_BLOQUE):
+        parser.feed(contenido[inicio:inicio + TAMANO_BLOQUE])
+    return parser.close().strip()
+
+def limpiar_lote(rutas_archivos: list[str], procesos: int = PROCESOS):
+    # Devuelve los textos en el mismo orden que las rutas.
+    if procesos <= 1 or len(rutas_archivos) <= 1:
+        return [ttml_a_texto(ruta) for ruta in rutas_archivos]
+
+    with ProcessPoolExecutor(max_workers=min(procesos, len(rutas_archivos))) as ejecutor:
+        return list(ejecutor.map(ttml_a_texto, rutas_archivos, chunksize=4))
+
+def limpiar_contenidos(contenidos: list[bytes], procesos: int = PROCESOS):
+    if procesos <= 1 or len(contenidos) <= 1:
+        return [contenido_a_texto(contenido) for contenido in contenidos]
+
+    with ProcessPoolExecutor(max_workers=min(procesos, len(contenidos))) as ejecutor:
+        return list(ejecutor.map(contenido_a_texto, contenidos, chunksize=4))
@@ -0,0 +1,112 @@
+import queue
+import threading
+import time
+from Comun import metricas
+
+TAMANO_COLA = 2
+ESPERA_COLA = 0.1
+_FIN = object()
+
+class Tuberia:
+    # Etapas encadenadas por colas acotadas: mientras una etapa trabaja con un elemento, la anterior
+    # ya prepara el siguiente, y una cola llena frena a quien la alimenta para que la memoria no crezca.
+    # `etapas` es una lista de (nombre, funcion, trabajadores); cada función recibe el elemento que
+    # devolvió la etapa anterior. El primer error detiene todas las etapas y se vuelve a lanzar.
+    def __init__(self, etapas: list[tuple], tamano_cola: int = TAMANO_COLA):
+        self.etapas = etapas
+        self.tamano_cola = tamano_cola
+        self.detener = threading.Event()
+        self.error = None
+        self.lock = threading.Lock()
+        self.nombres_colas = {}
+
+    def ejecutar(self, elementos):
+        colas = [queue.Queue(maxsize=self.tamano_cola) for _ in self.etapas]
+        self.nombres_colas = {id(cola): nombre for cola, (nombre, _, _) in zip(colas, self.etapas)}
+        hilos = [threading.Thread(target=self._producir, args=(elementos, colas[0]), name="descubrimiento", daemon=True)]
+
+        for indice, (nombre, funcion, trabajadores) in enumerate(self.etapas):
+            salida = colas[indice + 1] if indice + 1 < len(colas) else None
+            activos = [max(1, trabajadores)]
+            for numero in range(activos[0]):
+                hilos.append(threading.Thread(
+                    target=self._trabajar,
+                    args=(nombre, funcion, colas[indice], salida, activos),
+                    name=f"{nombre}-{numero}",
+                    daemon=True
+                ))
+
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def _fallar(self, error: BaseException):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+        self.detener.set()
+
+    def _poner(self, cola: queue.Queue, elemento):
+        while not self.detener.is_set():
+            try:
+                cola.put(elemento, timeout=ESPERA_COLA)
+                self._medir_cola(cola)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tomar(self, cola: queue.Queue):
+        while not self.detener.is_set():
+            try:
+                elemento = cola.get(timeout=ESPERA_COLA)
+                self._medir_cola(cola)
+                return elemento
+            except queue.Empty:
+                continue
+        return _FIN
+
+    def _medir_cola(self, cola: queue.Queue):
+        # Profundidad de la cola de entrada de cada etapa: una cola siempre llena señala el cuello de botella.
+        metricas.fijar("cola_profundidad", cola.qsize(), etapa=self.nombres_colas[id(cola)])
+
+    def _producir(self, elementos, salida: queue.Queue):
+        try:
+            for elemento in elementos:
+                if not self._poner(salida, elemento):
+                    return
+        except BaseException as e:
+            self._fallar(e)
+            return
+        self._poner(salida, _FIN)
+
+    def _trabajar(self, nombre: str, funcion, entrada: queue.Queue, salida: queue.Queue, activos: list[int]):
+        while True:
+            elemento = self._tomar(entrada)
+            if elemento is _FIN:
+                # Se devuelve la marca para los demás trabajadores de la etapa; el último avisa a la siguiente.
+                self._poner(entrada, _FIN)
+                break
+
+            inicio = time.perf_counter()
+            try:
+                resultado = funcion(elemento)
+            except BaseException as e:
+                self._fallar(e)
+                break
+            segundos = time.perf_counter() - inicio
+            metricas.observar("etapa_segundos", segundos, etapa=nombre)
+            metricas.evento("etapa", etapa=nombre, segundos=round(segundos, 3))
+
+            if salida is not None and not self._poner(salida, resultado):
+                break
+
+        with self.lock:
+            activos[0] -= 1
+            ultimo = activos[0] == 0
+        if ultimo and salida is not None:
+            self._poner(salida, _FIN)
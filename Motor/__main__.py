@@ -0,0 +1,3 @@
+from Motor.cli import main
+
+main()
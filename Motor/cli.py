@@ -0,0 +1,72 @@
+# Un solo punto de entrada para los recolectores; todo corre en el mismo proceso.
+#
+#   python -m Motor canal [--config Canal/canales.json] [--ids UC... UC...] [--plan]
+#   python -m Motor playlist | video ...
+#   python -m Motor plan canal [--config ...]
+#   python -m Motor status canal [--config ...]
+#
+# Cada comando importa sólo lo que usa: plan y status no cargan youtube_dl, requests ni el
+# cliente de descubrimiento de la API, y los recolectores los cargan al empezar a trabajar.
+
+import argparse
+import importlib
+import os
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRABAJOS = {
+    "canal": ("Canal.youtube", os.path.join(RAIZ, "Canal", "canales.json")),
+    "playlist": ("Playlist.youtube", os.path.join(RAIZ, "Playlist", "playlists.json")),
+    "video": ("Video.youtube", os.path.join(RAIZ, "Video", "videos.json"))
+}
+
+def modulo_y_config(args):
+    nombre_modulo, config = TRABAJOS[args.trabajo]
+    return importlib.import_module(nombre_modulo), args.config or config
+
+def correr(args):
+    modulo, config = modulo_y_config(args)
+    modulo.main(args.plan, config, args.ids)
+
+def planear(args):
+    modulo, config = modulo_y_config(args)
+    modulo.main(True, config, args.ids)
+
+def estado(args):
+    from Motor import trabajo
+
+    modulo, config = modulo_y_config(args)
+    try:
+        trabajo.imprimir_estado(config, modulo.PRESUPUESTO_CUOTA)
+    except ValueError as e:
+        print(e)
+
+def agregar_opciones(parser, ids: bool = True):
+    parser.add_argument("--config", help="JSON de configuración (por defecto el de la carpeta del recolector).")
+    if ids:
+        parser.add_argument("--ids", nargs="+", default=["All"], help="IDs del JSON que se procesan: idCanal, idPlaylist o idVideo.")
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="python -m Motor")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    for trabajo in TRABAJOS:
+        recolector = subparsers.add_parser(trabajo, help=f"Corre el recolector de {trabajo}.")
+        agregar_opciones(recolector)
+        recolector.add_argument("--plan", action="store_true", help="Sólo muestra el plan de cuota.")
+        recolector.set_defaults(funcion=correr, trabajo=trabajo)
+
+    plan = subparsers.add_parser("plan", help="Muestra el costo estimado de cada fuente sin llamar a la API.")
+    plan.add_argument("trabajo", choices=TRABAJOS)
+    agregar_opciones(plan)
+    plan.set_defaults(funcion=planear)
+
+    status = subparsers.add_parser("status", help="Fuentes pendientes, bitácoras, fallidos y cuota usada hoy.")
+    status.add_argument("trabajo", choices=TRABAJOS)
+    agregar_opciones(status, ids=False)
+    status.set_defaults(funcion=estado)
+
+    args = parser.parse_args(argv)
+    args.funcion(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import os
+from dataclasses import dataclass, field
+from glob import glob
+from Comun import almacen, bitacora, busqueda, comentarios, cuota, manifiesto, metricas, paquetes, salida, subtitulos, ttml, tuberia
+from Comun.concurrencia import ejecutar_en_paralelo
+from Comun.metadatos import obtener_info_videos
+from Motor.fechas import construir_ruta_fecha
+from Motor.registros import InfoVideo, Pagina, Video, fecha_iso, nombre_seguro, videos_desde_json
+
+def carpeta_bitacoras(carpeta: str):
+    return os.path.join(carpeta, "bitacoras")
+
+@dataclass(slots=True)
+class Ajustes:
+    # Los valores por defecto de cada recolector; el JSON puede cambiar la concurrencia y la tasa.
+    concurrencia_fuentes: int = 1
+    concurrencia_comentarios: int = 8
+    trabajadores_subtitulos: int = 4
+    procesos_limpieza: int = ttml.PROCESOS
+    peticiones_por_segundo: float = 10
+    presupuesto_cuota: int = cuota.CUOTA_DIARIA
+    trabajadores_etapas: dict = field(default_factory=lambda: {"subtitulos": 1, "limpieza": 1, "comentarios": 1})
+    tamano_cola: int = tuberia.TAMANO_COLA
+
+class Recolector:
+    # Las etapas que comparten todas las fuentes. Cada página pasa por subtítulos, limpieza y comentarios
+    # en orden; la página siguiente ya se está buscando mientras tanto.
+    # Con `fuente` (modo incremental) cada etapa omite los videos que ya completó y registra los nuevos.
+    # Con `delta` los comentarios se vuelven a pedir siempre, pero sólo los posteriores a la corrida anterior.
+    # Con `bitacora` cada etapa anota los videos que termina para retomar la página tras un corte.
+    def __init__(self, cliente, ajustes: Ajustes = None, manifiesto=None, almacen=None, indice=None, fallidos=None,
+                 formato: str = salida.FORMATO_POR_DEFECTO, almacenamiento: str = paquetes.ARCHIVOS, compresion: str = paquetes.ZSTD,
+                 carpeta: str = "."):
+        self.cliente = cliente
+        self.ajustes = ajustes or Ajustes()
+        self.manifiesto = manifiesto
+        self.almacen = almacen
+        self.indice = indice
+        self.fallidos = fallidos
+        self.formato = formato
+        self.almacenamiento = almacenamiento
+        self.compresion = compresion
+        # La carpeta del JSON: de ahí cuelgan la salida y las bitácoras, sin depender del directorio actual.
+        self.carpeta = carpeta
+        # Reintentos y circuito de youtube_dl compartidos por todas las páginas y fuentes de la corrida.
+        self.politica_subtitulos = subtitulos.politica_descargas()
+
+    def abrir_paquetes(self, carpeta: str, extension: str):
+        # Con "almacenamiento": "paquetes" en el JSON los archivos de `carpeta` van en paquetes por día; si no, None.
+        if self.almacenamiento != paquetes.PAQUETES:
+            return None
+        return paquetes.abrir(carpeta, extension, self.compresion)
+
+    def completar_info(self, videos: list[Video]):
+        # Una sola llamada a videos.list (por cada 50) para los videos de la página que aún no la tienen.
+        faltantes = [video.video_id for video in videos if video.info is None]
+        if faltantes:
+            info_videos = obtener_info_videos(self.cliente, faltantes)
+            for video in videos:
+                if video.info is None and video.video_id in info_videos:
+                    video.info = InfoVideo(**info_videos[video.video_id])
+        return videos
+
+    def descargar_subtitulos(self, videos: list[Video], out_dir: str):
+        raw_output = os.path.join(out_dir, "raw")
+        os.makedirs(raw_output, exist_ok=True)
+
+        # Con paquetes cada video se descarga en su carpeta de trabajo y después pasa al paquete de su día.
+        empacados = self.abrir_paquetes(raw_output, ".ttml")
+        tareas = []
+        dias = {}
+        for video in videos:
+            carpeta = empacados.carpeta_trabajo(video.video_id) if empacados else construir_ruta_fecha(video.publicado, raw_output)
+            tareas.append((video.video_id, carpeta))
+            dias[video.video_id] = video.dia
+
+        # Los videos que fallan se reportan y se omiten en la limpieza; no detienen la página.
+        fallos = subtitulos.descargar_lote(tareas, self.ajustes.trabajadores_subtitulos, self.politica_subtitulos, self.almacen)
+        paquetes.empacar_descargas(empacados, tareas, dias, fallos)
+        return fallos
+
+    def limpiar_subtitulos(self, videos: list[Video], out_dir: str, omitir: set = None):
+        raw_output = os.path.join(out_dir, "raw")
+        clean_output = os.path.join(out_dir, "clean")
+        # En modo incremental no se vuelven a limpiar los videos que ya tienen su JSON.
+        videos = [video for video in videos if video.video_id not in (omitir or set())]
+        por_id = {video.video_id: video for video in videos}
+
+        archivos_subtitulos = []
+        empacados = self.abrir_paquetes(raw_output, ".ttml")
+        if empacados:
+            # Con paquetes no hay carpetas que recorrer: el TTML de cada video se busca por su ID en el índice
+            # y se conserva el nombre del archivo original.
+            for video in videos:
+                entrada = empacados.entrada(video.video_id)
+                if entrada:
+                    archivos_subtitulos.append((entrada["nombre"], video))
+        else:
+            # Cada carpeta del día se recorre una sola vez aunque varios videos de la página caigan en ella,
+            # y sólo se toman los videos de esta página: otra del mismo día puede estar descargándose.
+            carpetas = {construir_ruta_fecha(video.publicado, raw_output) for video in videos}
+            for fecha_dir in sorted(carpetas):
+                for archivo in glob(os.path.join(fecha_dir, "*.ttml")):
+                    video = por_id.get(almacen.video_id_desde_archivo(archivo))
+                    if video:
+                        archivos_subtitulos.append((archivo, video))
+
+        for _, video in archivos_subtitulos:
+            if video.info is None:
+                raise ValueError(f"No se pudo obtener la información para el video {video.video_id}.")
+
+        # El texto de un TTML que ya se limpió (en esta u otra fuente) sale del almacén.
+        ids_archivos = [video.video_id for _, video in archivos_subtitulos]
+        if empacados:
+            textos = almacen.limpiar_contenidos(self.almacen, ids_archivos, [empacados.leer(video_id) for video_id in ids_archivos], self.ajustes.procesos_limpieza)
+        else:
+            textos = almacen.limpiar_lote(self.almacen, [archivo for archivo, _ in archivos_subtitulos], self.ajustes.procesos_limpieza)
+
+        limpiados = []
+        documentos = []
+        with salida.crear_salida(self.formato, out_dir) as destino:
+            for (archivo_subtitulos, video), subtitulos_limpios in zip(archivos_subtitulos, textos):
+                nombre_archivo = os.path.splitext(os.path.basename(archivo_subtitulos))[0]
+                info_json = {**video.info.encabezado(), "subtitulos": subtitulos_limpios}
+                destino.escribir(info_json, construir_ruta_fecha(video.publicado, clean_output), nombre_archivo, video.video_id)
+                limpiados.append(video.video_id)
+                documentos.append((video.video_id, busqueda.SUBTITULOS, [subtitulos_limpios], video.info.a_dict()))
+
+        # La página entra al índice de búsqueda en una sola transacción.
+        busqueda.indexar_lote(self.indice, documentos)
+        return limpiados
+
+    def obtener_comentarios(self, videos: list[Video], out_dir: str, delta: bool = False):
+        comentarios_dir = os.path.join(out_dir, "comentarios")
+        os.makedirs(comentarios_dir, exist_ok=True)
+
+        # Cada video escribe su propio archivo, así que se pueden recolectar varios a la vez.
+        # Un video que falla no detiene a los demás; se devuelve {video_id: error}.
+        def comentar(video: Video):
+            try:
+                with metricas.medir("video_segundos", etapa="comentarios"):
+                    self.obtener_comentarios_video(video, comentarios_dir, delta)
+            except cuota.CuotaAgotada:
+                raise
+            except Exception as e:
+                print(f"No se pudieron obtener los comentarios del video {video.video_id}: {e} \n")
+                metricas.contar("videos_total", etapa="comentarios", estado="fallo")
+                metricas.evento("fallo", etapa="comentarios", video_id=video.video_id, error=str(e))
+                return e
+            metricas.contar("videos_total", etapa="comentarios", estado="ok")
+
+        errores = ejecutar_en_paralelo(comentar, videos, self.ajustes.concurrencia_comentarios)
+        return {video.video_id: error for video, error in zip(videos, errores) if error is not None}
+
+    def obtener_comentarios_video(self, video: Video, comentarios_dir: str, delta: bool = False):
+        if video.info is None:
+            raise ValueError(f"No se pudo obtener información para el video ID {video.video_id}")
+
+        empacados = self.abrir_paquetes(comentarios_dir, ".json")
+        fecha_comentarios_dir = empacados.carpeta_trabajo(video.video_id) if empacados else construir_ruta_fecha(video.publicado, comentarios_dir)
+        os.makedirs(fecha_comentarios_dir, exist_ok=True)
+        nombre_archivo = f"{nombre_seguro(video.info.titulo)}.json"
+        json_file_path = os.path.join(fecha_comentarios_dir, nombre_archivo)
+
+        # Si otra fuente ya los recolectó hoy se enlazan desde el almacén. En modo delta no: el manifiesto
+        # lleva el último comentario de cada archivo y este sólo se completa con lo que le falta.
+        if self.almacen and not delta and self.almacen.materializar(video.video_id, almacen.COMENTARIOS, fecha_comentarios_dir, nombre_archivo):
+            paquetes.empacar(empacados, video.video_id, fecha_comentarios_dir, video.info.fecha_publicacion)
+            return
+        # Con paquetes, el modo delta fusiona con lo empacado: se saca primero a la carpeta de trabajo.
+        if empacados and delta:
+            empacados.extraer(video.video_id, fecha_comentarios_dir, nombre_archivo)
+
+        # En modo delta sólo se piden los comentarios posteriores al último guardado y se agregan al archivo.
+        # Cada página se escribe al llegar: la memoria no crece con el video y una corrida interrumpida
+        # sigue desde el token de la última página escrita. Se escribe aparte y se reemplaza al final:
+        # el archivo anterior puede ser un enlace a un objeto del almacén.
+        ultimo = comentarios.ultimo_guardado(self.manifiesto if delta else None, video.video_id, json_file_path)
+        escritor = comentarios.EscritorComentarios(json_file_path, video.video_id, video.info.encabezado())
+        try:
+            if not escritor.terminado:
+                reciente = escritor.reciente or ultimo
+                for hilos, siguiente in comentarios.paginas_hilos(self.cliente, video.video_id, ultimo, escritor.siguiente):
+                    comentarios.expandir_respuestas(self.cliente, hilos)
+                    reciente = comentarios.mas_reciente(hilos, reciente)
+                    escritor.escribir_pagina(comentarios.textos(hilos), siguiente, reciente)
+            escritor.terminar(comentarios.leer_comentarios(json_file_path) if ultimo else ())
+        finally:
+            escritor.cerrar()
+
+        metricas.contar("bytes_escritos_total", os.path.getsize(json_file_path), tipo="comentarios", formato=salida.ARCHIVOS)
+        if self.almacen:
+            self.almacen.importar(video.video_id, almacen.COMENTARIOS, json_file_path)
+        # El índice lee el archivo antes de que empacar() vacíe la carpeta de trabajo.
+        busqueda.indexar(self.indice, video.video_id, busqueda.COMENTARIOS, comentarios.leer_comentarios(json_file_path), video.info.a_dict())
+        paquetes.empacar(empacados, video.video_id, fecha_comentarios_dir, video.info.fecha_publicacion)
+
+        if delta and escritor.reciente:
+            self.manifiesto.guardar_ultimo_comentario(video.video_id, json_file_path, *escritor.reciente)
+
+    def registro(self, pagina: Pagina):
+        return self.manifiesto if pagina.fuente else None
+
+    def etapa_subtitulos(self, pagina: Pagina):
+        registro = self.registro(pagina)
+        self.completar_info(pagina.videos)
+
+        por_descargar = self.pendientes_bitacora(pagina, "subtitulos")
+        por_descargar = manifiesto.filtrar_pendientes(registro, pagina.fuente, "subtitulos", por_descargar)
+        fallos = self.descargar_subtitulos(por_descargar, os.path.join(pagina.ruta_carpeta, "subtitulos"))
+        self.registrar_fallidos("subtitulos", por_descargar, fallos, pagina)
+        self.completar_bitacora(pagina, "subtitulos", por_descargar)
+        if registro:
+            registro.marcar(pagina.fuente, "subtitulos", [video.video_id for video in por_descargar if video.video_id not in fallos])
+            registro.marcar(pagina.fuente, "subtitulos", list(fallos), manifiesto.FALLIDO)
+        return pagina
+
+    def etapa_limpieza(self, pagina: Pagina):
+        registro = self.registro(pagina)
+        omitir = registro.todos_completados(pagina.fuente, "limpieza") if registro else set()
+        if pagina.bitacora:
+            omitir |= pagina.bitacora.completadas(pagina.numero, "limpieza")
+        limpiados = self.limpiar_subtitulos(pagina.videos, os.path.join(pagina.ruta_carpeta, "subtitulos"), omitir)
+        if registro:
+            registro.marcar(pagina.fuente, "limpieza", limpiados)
+        if pagina.bitacora:
+            pagina.bitacora.completar_etapa(pagina.numero, "limpieza", limpiados)
+        return pagina
+
+    def etapa_comentarios(self, pagina: Pagina):
+        registro = self.registro(pagina)
+        videos = self.pendientes_bitacora(pagina, "comentarios")
+        por_comentar = videos if pagina.delta else manifiesto.filtrar_pendientes(registro, pagina.fuente, "comentarios", videos)
+        fallos = self.obtener_comentarios(por_comentar, pagina.ruta_carpeta, pagina.delta)
+        self.registrar_fallidos("comentarios", por_comentar, fallos, pagina)
+        if registro:
+            registro.marcar(pagina.fuente, "comentarios", [video.video_id for video in por_comentar if video.video_id not in fallos])
+        # Última etapa: la página ya no hace falta en la bitácora.
+        if pagina.bitacora:
+            pagina.bitacora.cerrar_pagina(pagina.numero)
+        return pagina
+
+    def pendientes_bitacora(self, pagina: Pagina, etapa: str):
+        if not pagina.bitacora:
+            return pagina.videos
+        completadas = pagina.bitacora.completadas(pagina.numero, etapa)
+        return [video for video in pagina.videos if video.video_id not in completadas]
+
+    def completar_bitacora(self, pagina: Pagina, etapa: str, videos: list[Video]):
+        # Los que fallaron también cuentan: quedaron en la lista de fallidos para otra corrida.
+        if pagina.bitacora:
+            pagina.bitacora.completar_etapa(pagina.numero, etapa, [video.video_id for video in videos])
+
+    def registrar_fallidos(self, etapa: str, videos: list[Video], fallos: dict, pagina: Pagina):
+        # Los que fallaron después de los reintentos van a la lista de fallidos; los que ya salieron se quitan.
+        if self.fallidos is None:
+            return
+        for video in videos:
+            if video.video_id in fallos:
+                self.fallidos.agregar(video.video_id, etapa, fallos[video.video_id], publishedAt=video.publicado.isoformat(),
+                                      ruta_carpeta=pagina.ruta_carpeta, fuente=pagina.fuente, delta=pagina.delta)
+        self.fallidos.quitar(etapa, [video.video_id for video in videos if video.video_id not in fallos])
+
+    def reintentar_fallidos(self):
+        # Los videos que quedaron en la lista en corridas anteriores se procesan antes que las fuentes nuevas.
+        grupos = {}
+        for etapa in ("subtitulos", "comentarios"):
+            for video_id, entrada in self.fallidos.pendientes(etapa).items():
+                clave = (etapa, entrada["ruta_carpeta"], entrada["fuente"], entrada["delta"])
+                grupos.setdefault(clave, []).append(Video(video_id, fecha_iso(entrada["publishedAt"])))
+
+        for (etapa, ruta_carpeta, fuente, delta), videos in grupos.items():
+            print(f"Reintentando {len(videos)} videos fallidos en {etapa} \n")
+            pagina = Pagina(videos, ruta_carpeta, fuente, delta)
+            if etapa == "subtitulos":
+                self.procesar_pagina(pagina)
+            else:
+                self.completar_info(videos)
+                self.etapa_comentarios(pagina)
+
+    def crear_tuberia(self):
+        trabajadores = self.ajustes.trabajadores_etapas
+        return tuberia.Tuberia([
+            ("subtitulos", self.etapa_subtitulos, trabajadores["subtitulos"]),
+            ("limpieza", self.etapa_limpieza, trabajadores["limpieza"]),
+            ("comentarios", self.etapa_comentarios, trabajadores["comentarios"])
+        ], self.ajustes.tamano_cola)
+
+    def procesar_pagina(self, pagina: Pagina):
+        return self.etapa_comentarios(self.etapa_limpieza(self.etapa_subtitulos(pagina)))
+
+    def procesar_fuente(self, fuente):
+        print(f"{fuente.etiqueta}: {fuente.nombre}\n")
+
+        if not fuente.valida():
+            print(f"{fuente.etiqueta} {fuente.nombre} no tiene fechas válidas. \n")
+            return
+
+        if fuente.usa_fechas:
+            print(f"Fecha de inicio: {fuente.fecha_inicio}, Fecha de fin: {fuente.fecha_fin} \n")
+
+        incremental = fuente.clave if fuente.incremental else None
+        marca = self.manifiesto.marca_agua(incremental) if incremental else None
+        registro_paginas = bitacora.Bitacora(fuente.clave, fuente.fecha_inicio, fuente.fecha_fin, carpeta_bitacoras(self.carpeta))
+        estadisticas = {"paginas": 0, "videos": 0}
+
+        def paginas():
+            ruta_carpeta = fuente.ruta_carpeta(self.cliente, self.carpeta)
+
+            def pagina(videos: list[Video], numero: int):
+                estadisticas["paginas"] += 1
+                estadisticas["videos"] += len(videos)
+                return Pagina(videos, ruta_carpeta, incremental, fuente.delta, registro_paginas, numero)
+
+            # Primero las páginas que una corrida anterior dejó a medias, luego se sigue desde su token.
+            for numero, pendiente in registro_paginas.pendientes():
+                yield pagina(videos_desde_json(pendiente["video_ids"]), numero)
+
+            while not registro_paginas.terminada:
+                videos, posicion, siguiente = fuente.buscar(self.cliente, registro_paginas.siguiente, registro_paginas.posicion, marca)
+                print(f"Videos que pasaron: {[video.video_id for video in videos]} \n")
+                numero = registro_paginas.registrar_pagina([video.a_json() for video in videos], siguiente, posicion)
+                metricas.evento("pagina", fuente=fuente.clave, numero=numero, videos=len(videos))
+                yield pagina(videos, numero)
+
+        self.crear_tuberia().ejecutar(paginas())
+        registro_paginas.finalizar()
+
+        if incremental:
+            self.manifiesto.actualizar_marca(incremental, fuente.fecha_inicio, fuente.fecha_fin)
+
+        return estadisticas
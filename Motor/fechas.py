@@ -0,0 +1,46 @@
+import calendar
+import os
+from datetime import datetime, timedelta, timezone
+from Motor.registros import fecha_iso
+
+# Ninguna fuente recorre más de una semana por corrida.
+VENTANA_MAXIMA = timedelta(days=7)
+
+def validar_y_ajustar_fechas(fecha_inicio_str, fecha_fin_str):
+    fecha_inicio = fecha_iso(fecha_inicio_str)
+    fecha_fin = fecha_iso(fecha_fin_str)
+
+    diferencia = fecha_fin - fecha_inicio
+
+    if diferencia < timedelta(days=0):
+        return None, None
+
+    if diferencia > VENTANA_MAXIMA:
+        fecha_fin_ajustada = fecha_inicio + VENTANA_MAXIMA
+        return fecha_inicio_str, fecha_fin_ajustada.isoformat() + 'Z'
+    return fecha_inicio_str, fecha_fin_str
+
+def obtener_fechas(fecha_inicio_str, fecha_fin_str, fecha_unica_str):
+    # Una ventana explícita, un solo día (de 00:00:00 a 23:59:59) o, sin fechas, el día de ayer.
+    if fecha_inicio_str is not None and fecha_fin_str is not None and fecha_unica_str is None:
+        return validar_y_ajustar_fechas(fecha_inicio_str, fecha_fin_str)
+
+    if fecha_inicio_str is None and fecha_fin_str is None and fecha_unica_str is not None:
+        fecha = fecha_iso(fecha_unica_str)
+        fechaInicio = fecha.replace(hour=0, minute=0, second=0).isoformat() + 'Z'
+        fechaFin = fecha.replace(hour=23, minute=59, second=59).isoformat() + 'Z'
+        return fechaInicio, fechaFin
+
+    if fecha_inicio_str is None and fecha_fin_str is None and fecha_unica_str is None:
+        fecha = (datetime.now() - timedelta(days=1)).replace(hour=0, minute=0, second=0, tzinfo=timezone.utc)
+        fechaInicio = fecha.isoformat(timespec='seconds').replace('+00:00', '') + 'Z'
+        fecha = fecha.replace(hour=23, minute=59, second=59)
+        fechaFin = fecha.isoformat(timespec='seconds').replace('+00:00', '') + 'Z'
+        return fechaInicio, fechaFin
+
+    return None, None
+
+def construir_ruta_fecha(fecha_publicacion: datetime, base_dir: str):
+    año = fecha_publicacion.strftime('%Y')
+    mes_nombre = calendar.month_name[fecha_publicacion.month]
+    return os.path.join(base_dir, año, mes_nombre, fecha_publicacion.strftime('%Y-%m-%d'))
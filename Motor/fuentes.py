@@ -0,0 +1,298 @@
+import hashlib
+import os
+import unicodedata
+from googleapiclient.errors import HttpError
+from Comun import cuota, manifiesto, metadatos
+from Motor import fechas
+from Motor.registros import InfoVideo, Video, fecha_iso, nombre_seguro
+
+def normalizar_texto(texto: str):
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(char for char in texto if not unicodedata.combining(char)).casefold()
+
+def coincide_busqueda(busqueda: str, snippet: dict):
+    # Coincidencia local: todas las palabras de la búsqueda deben aparecer en el título o la descripción.
+    texto = normalizar_texto(f"{snippet.get('title', '')} {snippet.get('description', '')}")
+    return all(palabra in texto for palabra in normalizar_texto(busqueda).split())
+
+def respuesta_json(response):
+    response_json = response.json()
+    if response.status_code != 200:
+        for error in response_json.get("error", {}).get("errors", []):
+            raise ValueError(f"Error: {error.get('message')} (Reason: {error.get('reason')})")
+        raise ValueError(f"Error en la solicitud a la API de YouTube: código de estado {response.status_code}")
+    return response_json
+
+def obtener_info_canal(cliente, channel_id: str):
+    def consultar():
+        try:
+            response = cliente.listar('channels', part='snippet,contentDetails', id=channel_id)
+        except HttpError as e:
+            raise ValueError(f"Error en la solicitud a la API de YouTube: {e.resp.status}, {e.content}")
+
+        if response['items']:
+            return {campo: response['items'][0][campo] for campo in ('snippet', 'contentDetails')}
+        return None
+
+    # El nombre del canal casi nunca cambia: se reutiliza entre páginas y entre corridas.
+    return metadatos.obtener_con_cache(cliente, "canal", channel_id, consultar)
+
+def obtener_info_playlist(cliente, playlist_id: str):
+    def consultar():
+        data = respuesta_json(cliente.get("playlists", part="snippet", id=playlist_id))
+        if data.get('items'):
+            return data['items'][0]['snippet']
+        return None
+
+    # El nombre de la playlist y de su canal se reutiliza entre páginas y entre corridas.
+    return metadatos.obtener_con_cache(cliente, "playlist", playlist_id, consultar)
+
+class Fuente:
+    # Una fuente de descubrimiento: entrega páginas de videos ya convertidos en registros y dice en qué
+    # carpeta van. Todo lo que sigue (subtítulos, limpieza, comentarios, bitácora, manifiesto) es común.
+    etiqueta = "Fuente"
+    llave_id = None
+    llave_nombre = None
+    usa_fechas = True
+
+    def __init__(self, campo: dict):
+        self.campo = campo
+        self.fecha_inicio, self.fecha_fin = fechas.obtener_fechas(campo.get("fechaInicio"), campo.get("fechaFin"), campo.get("fechaUnica"))
+        # Las fechas de la ventana se interpretan una vez, no en cada página.
+        self.inicio = fecha_iso(self.fecha_inicio) if self.fecha_inicio else None
+        self.fin = fecha_iso(self.fecha_fin) if self.fecha_fin else None
+
+    @property
+    def id(self):
+        return self.campo[self.llave_id]
+
+    @property
+    def nombre(self):
+        return self.campo.get(self.llave_nombre, self.id)
+
+    @property
+    def clave(self):
+        # Identifica a la fuente en la bitácora y en el manifiesto.
+        raise NotImplementedError
+
+    @property
+    def incremental(self):
+        return self.campo.get("incremental", False)
+
+    @property
+    def delta(self):
+        return self.campo.get("comentariosDelta", False)
+
+    def valida(self):
+        return not self.usa_fechas or self.fecha_inicio is not None
+
+    def costo(self):
+        raise NotImplementedError
+
+    def ruta_carpeta(self, cliente, base: str = "."):
+        # `base` es la carpeta del JSON de configuración: la salida queda junto a él.
+        raise NotImplementedError
+
+    def buscar(self, cliente, token: str, posicion: int, marca=None):
+        # Devuelve (videos de la página dentro de la ventana, posición siguiente, token siguiente o "").
+        raise NotImplementedError
+
+    def en_ventana(self, publicado):
+        return self.inicio <= publicado <= self.fin
+
+    def token_siguiente(self, response_json: dict, fechas_items: list, marca=None):
+        # Los resultados llegan del más nuevo al más viejo: se deja de paginar al salir de la ventana.
+        if not response_json.get("items") or any(self.inicio > fecha for fecha in fechas_items):
+            return ""
+        if any(manifiesto.alcanza_marca(marca, self.inicio, fecha) for fecha in fechas_items):
+            # Lo que sigue ya se recolectó en corridas anteriores.
+            return ""
+        return response_json.get("nextPageToken", "")
+
+class BusquedaCanal(Fuente):
+    etiqueta = "Canal"
+    llave_id = "idCanal"
+    llave_nombre = "nombreCanal"
+    resultados_por_pagina = 20
+
+    @property
+    def clave(self):
+        return f"canal:{self.id}:{self.campo['busqueda']}"
+
+    def costo(self):
+        return cuota.estimar_costo_fuente("canal", self.fecha_inicio, self.fecha_fin)
+
+    def ruta_carpeta(self, cliente, base: str = "."):
+        channel_info = obtener_info_canal(cliente, self.id)
+        if not channel_info:
+            raise ValueError(f"No se encontraron datos para el canal {self.id}.")
+        canal_dir = os.path.join(base, "YouTube", nombre_seguro(channel_info['snippet']['title']))
+        os.makedirs(canal_dir, exist_ok=True)
+        return canal_dir
+
+    def buscar(self, cliente, token: str, posicion: int, marca=None):
+        response_json = respuesta_json(cliente.get(
+            "search", part="snippet,id", q=self.campo["busqueda"], maxResults=str(self.resultados_por_pagina),
+            channelId=self.id, type="video", order="date", pageToken=token
+        ))
+
+        videos, fechas_items = [], []
+        for item in response_json.get("items", []):
+            print(f"ID: {item['id']['videoId']}, Fecha: {item['snippet']['publishedAt']} \n")
+            publicado = fecha_iso(item["snippet"]["publishedAt"])
+            fechas_items.append(publicado)
+            if self.en_ventana(publicado):
+                videos.append(Video(item["id"]["videoId"], publicado, posicion))
+                posicion += 1
+
+        return videos, posicion, self.token_siguiente(response_json, fechas_items, marca)
+
+class SubidasCanal(BusquedaCanal):
+    # Recorre la playlist de subidas del canal (1 unidad por página de 50) en lugar de search.list
+    # (100 unidades por página de 20). Las subidas llegan de la más nueva a la más vieja.
+    resultados_por_pagina = 50
+
+    def costo(self):
+        return cuota.estimar_costo_fuente("subidas", self.fecha_inicio, self.fecha_fin, resultados_por_pagina=self.resultados_por_pagina)
+
+    def buscar(self, cliente, token: str, posicion: int, marca=None):
+        channel_info = obtener_info_canal(cliente, self.id)
+        if not channel_info:
+            raise ValueError(f"No se encontraron datos para el canal {self.id}.")
+
+        response_json = respuesta_json(cliente.get(
+            "playlistItems", part="snippet,contentDetails", maxResults=str(self.resultados_por_pagina),
+            playlistId=channel_info['contentDetails']['relatedPlaylists']['uploads'], pageToken=token
+        ))
+
+        videos, fechas_items = [], []
+        busqueda = self.campo["busqueda"]
+        for item in response_json.get("items", []):
+            # Los videos privados o eliminados no tienen fecha de publicación.
+            detalles = item.get("contentDetails", {})
+            if not detalles.get("videoPublishedAt"):
+                continue
+            print(f"ID: {detalles['videoId']}, Fecha: {detalles['videoPublishedAt']} \n")
+            publicado = fecha_iso(detalles["videoPublishedAt"])
+            fechas_items.append(publicado)
+            if self.en_ventana(publicado) and (not busqueda or coincide_busqueda(busqueda, item["snippet"])):
+                videos.append(Video(detalles["videoId"], publicado, posicion))
+                posicion += 1
+
+        return videos, posicion, self.token_siguiente(response_json, fechas_items, marca)
+
+class Playlist(Fuente):
+    etiqueta = "Playlist"
+    llave_id = "idPlaylist"
+    llave_nombre = "nombrePlaylist"
+    resultados_por_pagina = 20
+
+    @property
+    def clave(self):
+        return f"playlist:{self.id}"
+
+    def costo(self):
+        return cuota.estimar_costo_fuente("playlist", self.fecha_inicio, self.fecha_fin)
+
+    def ruta_carpeta(self, cliente, base: str = "."):
+        playlist_info = obtener_info_playlist(cliente, self.id)
+        if not playlist_info:
+            raise ValueError("No se encontraron datos para la lista de reproducción proporcionada.")
+        playlist_dir = os.path.join(base, "Youtube", nombre_seguro(playlist_info['channelTitle']), nombre_seguro(playlist_info['title']))
+        os.makedirs(playlist_dir, exist_ok=True)
+        return playlist_dir
+
+    def buscar(self, cliente, token: str, posicion: int, marca=None):
+        response_json = respuesta_json(cliente.get(
+            "playlistItems", part="snippet", maxResults=str(self.resultados_por_pagina), playlistId=self.id, pageToken=token
+        ))
+
+        videos, fechas_items = [], []
+        for item in response_json.get("items", []):
+            snippet = item["snippet"]
+            print(f"ID: {snippet['resourceId']['videoId']}, Fecha: {snippet['publishedAt']} \n")
+            publicado = fecha_iso(snippet["publishedAt"])
+            fechas_items.append(publicado)
+            if self.en_ventana(publicado):
+                # En una playlist la posición la da la propia lista.
+                videos.append(Video(snippet["resourceId"]["videoId"], publicado, snippet["position"]))
+
+        return videos, posicion, self.token_siguiente(response_json, fechas_items, marca)
+
+class ListaVideos(Fuente):
+    # IDs explícitos (Video/videos.json). No hay búsqueda: cada página es un lote de videos.list,
+    # que trae la fecha de publicación y además los metadatos que usan las etapas.
+    etiqueta = "Videos"
+    usa_fechas = False
+
+    def __init__(self, campos: list[dict]):
+        self.campo = {}
+        self.ids = list(dict.fromkeys(campo["idVideo"] for campo in campos))
+        self.fecha_inicio = self.fecha_fin = self.inicio = self.fin = None
+
+    @property
+    def id(self):
+        return "videos"
+
+    @property
+    def nombre(self):
+        return f"{len(self.ids)} videos"
+
+    @property
+    def clave(self):
+        # Otra lista de IDs es otra fuente: no retoma la bitácora de la anterior.
+        return f"videos:{hashlib.sha1(','.join(self.ids).encode('utf-8')).hexdigest()[:12]}"
+
+    def costo(self):
+        return cuota.estimar_costo_videos(len(self.ids))
+
+    def ruta_carpeta(self, cliente, base: str = "."):
+        videos_dir = os.path.join(base, "Youtube")
+        os.makedirs(videos_dir, exist_ok=True)
+        return videos_dir
+
+    def buscar(self, cliente, token: str, posicion: int, marca=None):
+        inicio = int(token or 0)
+        lote = self.ids[inicio:inicio + metadatos.TAMANO_LOTE]
+        info_videos = metadatos.obtener_info_videos(cliente, lote)
+
+        videos = []
+        for video_id in lote:
+            info = info_videos.get(video_id)
+            if not info:
+                print(f"No se pudo obtener información para el video ID {video_id} \n")
+                continue
+            publicado = fecha_iso(f"{info['fecha_publicacion']}T{info['hora_publicacion']}")
+            videos.append(Video(video_id, publicado, posicion, InfoVideo(**info)))
+            posicion += 1
+
+        fin = inicio + len(lote)
+        return videos, posicion, str(fin) if fin < len(self.ids) else ""
+
+def usa_playlist_subidas(canal: dict):
+    return not canal["busqueda"] or canal.get("busquedaLocal", False)
+
+def filtrar_campos(campos: list[dict], ids):
+    # Los campos que elige --ids: canales y playlists por su ID y videos sueltos por su idVideo;
+    # "videos" (el ID de la ListaVideos) elige todos los videos sueltos.
+    return [
+        campo for campo in campos
+        if campo.get(BusquedaCanal.llave_id) in ids or campo.get(Playlist.llave_id) in ids
+        or ("idVideo" in campo and (campo["idVideo"] in ids or "videos" in ids))
+    ]
+
+def crear_fuentes(campos: list[dict]):
+    # Cada canal o playlist del JSON es una fuente; los IDs sueltos de videos se juntan en una sola.
+    fuentes = []
+    for campo in campos:
+        if "idCanal" in campo:
+            fuentes.append(SubidasCanal(campo) if usa_playlist_subidas(campo) else BusquedaCanal(campo))
+        elif "idPlaylist" in campo:
+            fuentes.append(Playlist(campo))
+        elif "idVideo" not in campo:
+            raise ValueError(f"No se reconoce la fuente {campo}.")
+
+    videos = [campo for campo in campos if "idVideo" in campo]
+    if videos:
+        fuentes.append(ListaVideos(videos))
+    return fuentes
@@ -0,0 +1,67 @@
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from Comun.metadatos import nombre_seguro  # Vive en Comun: la migración de paquetes también lo usa
+
+def fecha_iso(valor: str):
+    # "2024-08-20T15:00:00Z" -> datetime sin zona, como lo devuelve la API; se hace una vez por video.
+    return datetime.fromisoformat(valor.rstrip('Z'))
+
+@dataclass(slots=True)
+class InfoVideo:
+    # Lo que se guarda de videos.list; los mismos campos que metadatos.info_desde_snippet.
+    fecha_recoleccion: str
+    hora_recoleccion: str
+    fecha_publicacion: str
+    hora_publicacion: str
+    nombre_canal: str
+    titulo: str
+
+    def encabezado(self):
+        # Campos comunes de los JSON de subtítulos y comentarios, en el orden de siempre.
+        return {
+            "fecha_recoleccion": self.fecha_recoleccion,
+            "hora_recoleccion": self.hora_recoleccion,
+            "fecha_publicacion": self.fecha_publicacion,
+            "hora_publicacion": self.hora_publicacion,
+            "nombre_canal": self.nombre_canal
+        }
+
+    def a_dict(self):
+        return asdict(self)
+
+@dataclass(slots=True)
+class Video:
+    # Un video descubierto. La fecha se interpreta al descubrirlo y las etapas la usan tal cual;
+    # `info` se llena una vez por página con una sola llamada a videos.list.
+    video_id: str
+    publicado: datetime
+    posicion: int = 0
+    info: InfoVideo = None
+
+    @property
+    def dia(self):
+        return self.publicado.strftime('%Y-%m-%d')
+
+    def a_json(self):
+        # Lo que se anota en la bitácora y en la lista de fallidos (mismas llaves que antes).
+        return {"videoId": self.video_id, "publishedAt": self.publicado.isoformat(), "posicion": self.posicion}
+
+    @classmethod
+    def desde_json(cls, valor: dict):
+        return cls(valor["videoId"], fecha_iso(valor["publishedAt"]), valor.get("posicion", 0))
+
+def videos_desde_json(video_ids):
+    # Las bitácoras anteriores guardaban {posición: {...}}; las nuevas, una lista.
+    valores = video_ids.values() if isinstance(video_ids, dict) else video_ids
+    return [Video.desde_json(valor) for valor in valores]
+
+@dataclass(slots=True)
+class Pagina:
+    # Lo que recorre la tubería: los videos de una página de descubrimiento y dónde van.
+    # `fuente` es la clave del manifiesto en modo incremental; `bitacora` y `numero`, el punto de control.
+    videos: list[Video]
+    ruta_carpeta: str
+    fuente: str = None
+    delta: bool = False
+    bitacora: object = None
+    numero: int = None
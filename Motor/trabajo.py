@@ -0,0 +1,139 @@
+import json
+import os
+import time
+from functools import partial
+from glob import glob
+from Comun import almacen, bitacora, busqueda, cuota, manifiesto, metricas, paquetes, rastreador, resiliencia, salida
+from Comun.cache import CacheMetadatos
+from Comun.cliente import ClienteYoutube
+from Comun.concurrencia import LimitadorTasa
+from Comun.llaves import normalizar_llaves
+from Motor.etapas import Ajustes, Recolector, carpeta_bitacoras
+from Motor.fuentes import crear_fuentes, filtrar_campos
+
+def rutas_de_trabajo(ruta_archivo_json: str):
+    # pendientes.json, fallidos.json, las bitácoras y la salida quedan junto al JSON de configuración.
+    carpeta = os.path.dirname(ruta_archivo_json) or "."
+    return carpeta, os.path.join(carpeta, 'pendientes.json'), os.path.join(carpeta, 'fallidos.json')
+
+def leer_fuentes_desde_json(ruta_archivo: str, ids=("All",)):
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        data = json.load(archivo)
+
+    # Una llave o una lista de llaves que se rotan cuando una agota su cuota.
+    llave = normalizar_llaves(data.get('llave'))
+    campos = data.get('campos', [])
+
+    if isinstance(ids, str):
+        ids = [ids]
+    if "All" in ids:
+        if len(ids) == 1:
+            return llave, crear_fuentes(campos)
+        raise ValueError("No se puede mezclar 'All' con otros IDs de fuentes.")
+    # Se filtra antes de crear las fuentes: los videos sueltos forman una sola y se eligen por idVideo.
+    return llave, crear_fuentes(filtrar_campos(campos, ids))
+
+def ordenar_pendientes(fuentes: list, ruta_pendientes: str, carpeta: str, completa: bool = True):
+    # Si una corrida anterior se pausó por cuota o tuvo fuentes con error, sus pendientes van primero
+    # y, entre ellas, las que se interrumpieron a media paginación (las que tienen bitácora). El mismo día de cuota
+    # sólo quedan esas; en un día nuevo se programan también todas las demás. Una corrida que no es
+    # `completa` (--ids) procesa siempre las fuentes que se pidieron.
+    # Devuelve (fuentes a planear, ids que van primero).
+    dia, pendientes = cuota.leer_pendientes(ruta_pendientes)
+    if completa and pendientes and dia == cuota.dia_cuota():
+        fuentes = [fuente for fuente in fuentes if fuente.id in pendientes]
+    fuentes_por_id = {fuente.id: fuente for fuente in fuentes}
+    pendientes = [id_fuente for id_fuente in pendientes if id_fuente in fuentes_por_id]
+    interrumpidas = [id_fuente for id_fuente in pendientes if bitacora.existe(fuentes_por_id[id_fuente].clave, carpeta_bitacoras(carpeta))]
+    return fuentes, interrumpidas + [id_fuente for id_fuente in pendientes if id_fuente not in interrumpidas]
+
+def planificar(fuentes: list, planificador, primeras: list[str] = ()):
+    costos = [(fuente.id, fuente.costo()) for fuente in fuentes if fuente.valida()]
+    programadas, pospuestas = planificador.programar(costos, primeras)
+    cuota.imprimir_plan(costos, programadas, planificador.disponible())
+    return programadas, pospuestas
+
+def ejecutar(ruta_archivo_json: str, ajustes: Ajustes = None, solo_plan: bool = False, ids=("All",)):
+    # Lo que hace el main de Canal, Playlist y Video: planear la cuota, reintentar los fallidos y
+    # procesar las fuentes programadas.
+    ajustes = ajustes or Ajustes()
+    carpeta, ruta_pendientes, ruta_fallidos = rutas_de_trabajo(ruta_archivo_json)
+
+    try:
+        metricas.iniciar(ruta_archivo_json)
+        formato = salida.formato_desde_config(ruta_archivo_json)
+        almacenamiento, compresion = paquetes.opciones_desde_config(ruta_archivo_json)
+        llave, fuentes = leer_fuentes_desde_json(ruta_archivo_json, ids)
+        seleccionadas = None if "All" in ids else {fuente.id for fuente in fuentes}
+        libro = cuota.LibroCuota()
+        planificador = cuota.Planificador(ajustes.presupuesto_cuota, libro, llave)
+
+        fuentes, primeras = ordenar_pendientes(fuentes, ruta_pendientes, carpeta, seleccionadas is None)
+        fuentes_por_id = {fuente.id: fuente for fuente in fuentes}
+        programadas, pospuestas = planificar(fuentes, planificador, primeras)
+        if solo_plan:
+            return
+
+        # Con "concurrenciaFuentes" en el JSON se procesan varias fuentes a la vez; todas comparten
+        # el cliente, así que el límite de tasa y la cuota son globales.
+        concurrencia, peticiones_por_segundo = rastreador.opciones_desde_config(ruta_archivo_json, ajustes.concurrencia_fuentes, ajustes.peticiones_por_segundo)
+        cliente = ClienteYoutube(llave, tamano_pool=ajustes.concurrencia_comentarios * concurrencia, limitador=LimitadorTasa(peticiones_por_segundo),
+                                 cache=CacheMetadatos(), libro=libro, presupuesto=ajustes.presupuesto_cuota)
+        recolector = Recolector(cliente, ajustes, manifiesto.Manifiesto(), almacen.Almacen(), busqueda.IndiceTexto(),
+                                resiliencia.ListaFallidos(ruta_fallidos), formato, almacenamiento, compresion, carpeta)
+        recolector.reintentar_fallidos()
+
+        inicio = time.monotonic()
+        ejecucion = rastreador.Rastreador(concurrencia)
+        resultados = ejecucion.ejecutar([(id_fuente, partial(recolector.procesar_fuente, fuentes_por_id[id_fuente])) for id_fuente in programadas])
+        rastreador.imprimir_resumen(resultados, time.monotonic() - inicio)
+
+        sin_terminar = ejecucion.pendientes()
+        con_error = ejecucion.con_error()
+        cuota.guardar_pendientes(ruta_pendientes, sin_terminar + pospuestas, seleccionadas)
+        if ejecucion.sin_cuota.is_set():
+            print(f"Cuota agotada. Quedan {len(sin_terminar) + len(pospuestas)} fuentes pendientes para la siguiente corrida. \n")
+        else:
+            if con_error:
+                print(f"Fuentes con error, pendientes para la siguiente corrida: {con_error} \n")
+            if pospuestas:
+                print(f"Fuentes pospuestas por presupuesto: {pospuestas} \n")
+    except ValueError as e:
+        print(e)
+    finally:
+        paquetes.cerrar_todos()
+        metricas.finalizar()
+
+def imprimir_estado(ruta_archivo_json: str, presupuesto: int = cuota.CUOTA_DIARIA):
+    # Lo que dejó la última corrida, sin llamar a la API: fuentes pendientes por cuota o error, páginas a medias,
+    # videos fallidos y la cuota usada hoy.
+    carpeta, ruta_pendientes, ruta_fallidos = rutas_de_trabajo(ruta_archivo_json)
+    llave, fuentes = leer_fuentes_desde_json(ruta_archivo_json)
+    dia, pendientes = cuota.leer_pendientes(ruta_pendientes)
+
+    print(f"{ruta_archivo_json}: {len(fuentes)} fuentes" + (f", pendientes desde el día de cuota {dia}" if pendientes else ""))
+    for fuente in fuentes:
+        estados = []
+        if fuente.id in pendientes:
+            estados.append("pendiente (cuota o error)")
+        if bitacora.existe(fuente.clave, carpeta_bitacoras(carpeta)):
+            estados.append("interrumpida")
+        if not fuente.valida():
+            estados.append("sin fechas válidas")
+        print(f"  {fuente.id} ({fuente.nombre}): {', '.join(estados) or 'al día'}")
+
+    for ruta in sorted(glob(os.path.join(carpeta_bitacoras(carpeta), "*.json"))):
+        with open(ruta, 'r', encoding='utf-8') as archivo_json:
+            registro = json.load(archivo_json)
+        print(f"Bitácora {registro['fuente']}: {len(registro['paginas'])} páginas sin terminar, siguiente token {registro['siguiente'] or '-'}")
+
+    fallidos = resiliencia.ListaFallidos(ruta_fallidos)
+    print("Videos fallidos: " + ", ".join(f"{etapa} {len(fallidos.pendientes(etapa))}" for etapa in ("subtitulos", "comentarios")))
+
+    libro = cuota.LibroCuota()
+    try:
+        usadas = sum(unidades for _, _, _, unidades in libro.resumen())
+        disponible = cuota.Planificador(presupuesto, libro, llave).disponible()
+        print(f"Cuota usada hoy: {usadas} unidades, disponible: {disponible} unidades \n")
+    finally:
+        libro.cerrar()
@@ -0,0 +1,406 @@
+# API de YouTube falsa para correr Canal, Playlist y Video sin llaves ni red. Sirve canales
+# sintéticos de tamaño configurable en los endpoints que usa el proyecto (search, playlistItems,
+# playlists, channels, videos, commentThreads y comments) y los subtítulos que pediría youtube_dl.
+# Todo se genera al vuelo a partir de los índices, así que el servidor no guarda los datos.
+# También puede fallar a propósito (429, 5xx con Retry-After, llaves sin cuota) para probar los
+# reintentos, los circuitos y la rotación de llaves: ver inyectar(), agotar_llave() y --tasa-fallas.
+#
+#   python -m benchmarks.api_falsa --canales 2 --videos-por-dia 10 --puerto 8080
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+import youtube_dl
+
+from Comun import cliente as modulo_cliente
+from Comun import subtitulos as modulo_subtitulos
+
+# Los videos se publican hacia atrás desde esta fecha, del más nuevo al más viejo.
+FECHA_FIN = datetime(2024, 6, 30, 23, 59, 59)
+PALABRA = "noticias"
+MAX_RESULTADOS = {"search": 50, "playlistItems": 50, "commentThreads": 100, "comments": 100, "videos": 50}
+# commentThreads.list incluye como mucho estas respuestas por hilo, igual que la API real.
+RESPUESTAS_EN_LINEA = 5
+# Razón que acompaña a cada estado inyectado si no se indica otra, como las que manda la API real.
+RAZONES_FALLA = {403: "quotaExceeded", 429: "rateLimitExceeded", 500: "backendError", 502: "backendError",
+                 503: "backendError", 504: "backendError"}
+PLANTILLA_TTML = (
+    '<?xml version="1.0" encoding="utf-8" ?>\n'
+    '<tt xml:lang="es" xmlns="http://www.w3.org/ns/ttml">\n<body>\n<div>\n{}</div>\n</body>\n</tt>\n'
+)
+
+def fecha_iso(fecha: datetime):
+    return fecha.isoformat(timespec='seconds') + 'Z'
+
+def ventana(dias: int):
+    # Intervalo que cubre exactamente los `dias` días de videos de cada canal sintético.
+    return fecha_iso(FECHA_FIN - timedelta(days=dias)), fecha_iso(FECHA_FIN)
+
+def id_canal(indice: int):
+    return f"UCfalso{indice:04d}"
+
+def id_playlist(indice: int):
+    return f"PLfalso{indice:04d}"
+
+def id_video(canal: int, indice: int):
+    # 11 caracteres, como los de YouTube.
+    return f"v{canal:03d}x{indice:06d}"
+
+class ApiFalsa:
+    def __init__(self, canales: int = 1, dias: int = 7, videos_por_dia: int = 4, comentarios_por_video: int = 50,
+                 lineas_subtitulo: int = 200, latencia: float = 0.0, respuestas_por_comentario: int = 0,
+                 tasa_fallas: float = 0.0, semilla: int = 0):
+        self.canales = canales
+        self.dias = dias
+        self.videos_por_dia = videos_por_dia
+        self.comentarios_por_video = comentarios_por_video
+        self.lineas_subtitulo = lineas_subtitulo
+        self.latencia = latencia
+        self.respuestas_por_comentario = respuestas_por_comentario
+        self.lock = threading.Lock()
+        self.llamadas = Counter()
+        self.llaves_usadas = Counter()
+        # Fallas pendientes por endpoint (se sirven en orden, una por llamada), llaves sin cuota y
+        # probabilidad de responder 503 a cualquier llamada.
+        self.fallas = defaultdict(deque)
+        self.llaves_agotadas = set()
+        self.tasa_fallas = tasa_fallas
+        self.azar = random.Random(semilla)
+        self.subtitulos_servidos = set()
+        self.servidor = None
+
+    # Datos sintéticos. Cada canal tiene un día de videos más que la ventana, para que
+    # los recolectores tengan que detenerse por fecha como con un canal real.
+    def total_videos(self):
+        return (self.dias + 1) * self.videos_por_dia
+
+    def indices_video(self, video_id: str):
+        try:
+            canal, indice = int(video_id[1:4]), int(video_id[5:])
+        except ValueError:
+            return None
+        if video_id[0] != "v" or video_id[4] != "x" or not (0 <= canal < self.canales and 0 <= indice < self.total_videos()):
+            return None
+        return canal, indice
+
+    def publicado(self, indice: int):
+        return FECHA_FIN - timedelta(seconds=(indice + 0.5) * 86400 / self.videos_por_dia)
+
+    def snippet_video(self, canal: int, indice: int):
+        return {
+            "publishedAt": fecha_iso(self.publicado(indice)),
+            "channelId": id_canal(canal),
+            "channelTitle": f"Canal Falso {canal}",
+            "title": f"Noticias {canal} video {indice}",
+            "description": f"Resumen de {PALABRA} del canal {canal}."
+        }
+
+    def comentario(self, video_id: str, indice_video: int, indice: int):
+        # El comentario 0 es el más reciente.
+        publicado = self.publicado(indice_video) + timedelta(minutes=self.comentarios_por_video - indice)
+        return {
+            "id": f"{video_id}.c{indice:05d}",
+            "snippet": {
+                "topLevelComment": {
+                    "id": f"{video_id}.c{indice:05d}",
+                    "snippet": {
+                        "videoId": video_id,
+                        "textDisplay": f"Comentario {indice} del video {video_id}",
+                        "textOriginal": f"Comentario {indice} del video {video_id}",
+                        "publishedAt": fecha_iso(publicado)
+                    }
+                },
+                "totalReplyCount": self.respuestas_por_comentario
+            }
+        }
+
+    def respuesta(self, comentario_id: str, publicado: str, indice: int):
+        return {
+            "id": f"{comentario_id}.r{indice:05d}",
+            "snippet": {
+                "parentId": comentario_id,
+                "textDisplay": f"Respuesta {indice} al comentario {comentario_id}",
+                "textOriginal": f"Respuesta {indice} al comentario {comentario_id}",
+                "publishedAt": publicado
+            }
+        }
+
+    def hilo(self, video_id: str, indice_video: int, indice: int):
+        item = self.comentario(video_id, indice_video, indice)
+        en_linea = min(self.respuestas_por_comentario, RESPUESTAS_EN_LINEA)
+        if en_linea:
+            comentario = item["snippet"]["topLevelComment"]
+            item["replies"] = {"comments": [self.respuesta(comentario["id"], comentario["snippet"]["publishedAt"], i) for i in range(en_linea)]}
+        return item
+
+    def ttml(self, video_id: str):
+        lineas = "".join(
+            f'<p begin="00:00:{linea % 60:02d}.000" end="00:00:{(linea + 3) % 60:02d}.000">línea {linea} del video {video_id}</p>\n'
+            for linea in range(self.lineas_subtitulo)
+        )
+        return PLANTILLA_TTML.format(lineas)
+
+    # Endpoints. Cada uno recibe los parámetros de la consulta y devuelve (estado, cuerpo).
+    def paginar(self, recurso: str, params: dict, total: int, item):
+        inicio = int(params.get("pageToken") or 0)
+        cantidad = min(int(params.get("maxResults") or 5), MAX_RESULTADOS[recurso])
+        fin = min(total, inicio + cantidad)
+        respuesta = {"items": [item(indice) for indice in range(inicio, fin)], "pageInfo": {"totalResults": total}}
+        if fin < total:
+            respuesta["nextPageToken"] = str(fin)
+        return 200, respuesta
+
+    def search(self, params: dict):
+        canal = self.indice_canal(params.get("channelId"), id_canal)
+        if canal is None:
+            return 200, {"items": []}
+
+        def item(indice):
+            return {"id": {"kind": "youtube#video", "videoId": id_video(canal, indice)}, "snippet": self.snippet_video(canal, indice)}
+
+        return self.paginar("search", params, self.total_videos(), item)
+
+    def playlistItems(self, params: dict):
+        playlist = params.get("playlistId", "")
+        canal = self.indice_canal(playlist, id_playlist)
+        if canal is None:
+            canal = self.indice_canal(playlist, lambda indice: "UU" + id_canal(indice)[2:])
+        if canal is None:
+            return 404, error_api(404, "playlistNotFound", f"Playlist {playlist} no encontrada.")
+
+        def item(indice):
+            snippet = self.snippet_video(canal, indice)
+            snippet.update(position=indice, playlistId=playlist, resourceId={"kind": "youtube#video", "videoId": id_video(canal, indice)})
+            return {"snippet": snippet, "contentDetails": {"videoId": id_video(canal, indice), "videoPublishedAt": snippet["publishedAt"]}}
+
+        return self.paginar("playlistItems", params, self.total_videos(), item)
+
+    def playlists(self, params: dict):
+        canal = self.indice_canal(params.get("id"), id_playlist)
+        if canal is None:
+            return 200, {"items": []}
+        return 200, {"items": [{"id": id_playlist(canal), "snippet": {"title": f"Lista Falsa {canal}", "channelTitle": f"Canal Falso {canal}"}}]}
+
+    def channels(self, params: dict):
+        canal = self.indice_canal(params.get("id"), id_canal)
+        if canal is None:
+            return 200, {"items": []}
+        return 200, {"items": [{
+            "id": id_canal(canal),
+            "snippet": {"title": f"Canal Falso {canal}"},
+            "contentDetails": {"relatedPlaylists": {"uploads": "UU" + id_canal(canal)[2:]}}
+        }]}
+
+    def videos(self, params: dict):
+        items = []
+        for video_id in (params.get("id") or "").split(",")[:MAX_RESULTADOS["videos"]]:
+            indices = self.indices_video(video_id)
+            if indices:
+                items.append({"id": video_id, "snippet": self.snippet_video(*indices)})
+        return 200, {"items": items}
+
+    def commentThreads(self, params: dict):
+        video_id = params.get("videoId", "")
+        indices = self.indices_video(video_id)
+        if indices is None:
+            return 404, error_api(404, "videoNotFound", f"Video {video_id} no encontrado.")
+        return self.paginar("commentThreads", params, self.comentarios_por_video, lambda indice: self.hilo(video_id, indices[1], indice))
+
+    def comments(self, params: dict):
+        # Respuestas de un hilo (parentId); el comentario principal no viene en esta lista.
+        comentario_id = params.get("parentId", "")
+        video_id, _, sufijo = comentario_id.partition(".c")
+        indices = self.indices_video(video_id)
+        if indices is None or not sufijo.isdigit() or int(sufijo) >= self.comentarios_por_video:
+            return 404, error_api(404, "commentNotFound", f"Comentario {comentario_id} no encontrado.")
+        publicado = self.comentario(video_id, indices[1], int(sufijo))["snippet"]["topLevelComment"]["snippet"]["publishedAt"]
+        return self.paginar("comments", params, self.respuestas_por_comentario, lambda indice: self.respuesta(comentario_id, publicado, indice))
+
+    def indice_canal(self, identificador: str, formato):
+        for indice in range(self.canales):
+            if formato(indice) == identificador:
+                return indice
+        return None
+
+    # Fallas inyectadas.
+    def inyectar(self, recurso: str, estado: int, veces: int = 1, razon: str = None, retry_after=None):
+        # Las siguientes `veces` llamadas a `recurso` responden `estado`; `retry_after` (segundos o
+        # fecha HTTP) se envía en el encabezado Retry-After.
+        with self.lock:
+            self.fallas[recurso].extend([(estado, razon or RAZONES_FALLA.get(estado, "backendError"), retry_after)] * veces)
+
+    def agotar_llave(self, llave: str):
+        # Desde ahora la llave recibe 403 quotaExceeded en todos los endpoints.
+        with self.lock:
+            self.llaves_agotadas.add(llave)
+
+    def siguiente_falla(self, recurso: str, llave: str):
+        if llave in self.llaves_agotadas:
+            return 403, "quotaExceeded", None
+        if self.fallas[recurso]:
+            return self.fallas[recurso].popleft()
+        if self.tasa_fallas and self.azar.random() < self.tasa_fallas:
+            return 503, "backendError", None
+        return None
+
+    def responder(self, recurso: str, params: dict):
+        # Devuelve (estado, cuerpo, encabezados).
+        endpoint = getattr(self, recurso, None) if recurso in ENDPOINTS else None
+        if endpoint is None:
+            return 404, error_api(404, "notFound", f"Endpoint {recurso} no existe en la API falsa."), {}
+        if not params.get("key"):
+            return 403, error_api(403, "forbidden", "Falta la llave."), {}
+        with self.lock:
+            self.llamadas[recurso] += 1
+            self.llaves_usadas[params["key"]] += 1
+            falla = self.siguiente_falla(recurso, params["key"])
+        if self.latencia:
+            time.sleep(self.latencia)
+        if falla:
+            estado, razon, retry_after = falla
+            encabezados = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return estado, error_api(estado, razon, f"Falla inyectada en {recurso}: {razon}."), encabezados
+        return (*endpoint(params), {})
+
+    def subtitulos(self, video_id: str):
+        indices = self.indices_video(video_id)
+        if indices is None:
+            return 404, {"error": "Video unavailable"}, {}
+        with self.lock:
+            self.subtitulos_servidos.add(video_id)
+        return 200, {"titulo": self.snippet_video(*indices)["title"], "ttml": self.ttml(video_id)}, {}
+
+    # Servidor.
+    def iniciar(self, puerto: int = 0):
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", puerto), ManejadorApi)
+        self.servidor.daemon_threads = True
+        self.servidor.api = self
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_port}"
+
+    def detener(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def reiniciar_contadores(self):
+        with self.lock:
+            self.llamadas.clear()
+            self.llaves_usadas.clear()
+            self.subtitulos_servidos.clear()
+            self.fallas.clear()
+            self.llaves_agotadas.clear()
+
+    def contadores(self):
+        with self.lock:
+            return dict(self.llamadas), len(self.subtitulos_servidos)
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.detener()
+
+ENDPOINTS = ("search", "playlistItems", "playlists", "channels", "videos", "commentThreads", "comments")
+
+def error_api(codigo: int, razon: str, mensaje: str):
+    return {"error": {"code": codigo, "message": mensaje, "errors": [{"reason": razon, "message": mensaje}]}}
+
+class ManejadorApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        partes = url.path.strip("/").split("/")
+
+        if len(partes) == 2 and partes[0] == "subtitulos":
+            estado, respuesta, encabezados = self.server.api.subtitulos(partes[1])
+        else:
+            # REST (/youtube/v3/<recurso>) y el servicio de descubrimiento usan la misma ruta.
+            estado, respuesta, encabezados = self.server.api.responder(partes[-1], params)
+
+        cuerpo = json.dumps(respuesta).encode()
+        self.send_response(estado)
+        for nombre, valor in encabezados.items():
+            self.send_header(nombre, valor)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+class DescargadorFalso:
+    # Sustituto de youtube_dl.YoutubeDL: pide el TTML a la API falsa y lo guarda con el mismo
+    # nombre que pondría youtube_dl. Los videos que no existen fallan con "Video unavailable".
+    URL = None
+
+    def __init__(self, params: dict):
+        self.params = params
+        self.session = requests.Session()
+
+    def download(self, video_ids: list[str]):
+        for video_id in video_ids:
+            response = self.session.get(f"{self.URL}/subtitulos/{video_id}", timeout=modulo_cliente.TIEMPO_ESPERA)
+            if response.status_code != 200:
+                raise youtube_dl.utils.DownloadError(f"ERROR: [youtube] {video_id}: Video unavailable")
+            datos = response.json()
+            ruta = self.params["outtmpl"] % {"title": datos["titulo"], "id": video_id, "ext": "es.ttml"}
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(datos["ttml"])
+
+def usar_api_falsa(url: str):
+    # Dirige el cliente compartido y la descarga de subtítulos del proceso actual a la API falsa.
+    modulo_cliente.URL_BASE = f"{url}/youtube/v3"
+    modulo_cliente.URL_SERVICIO = f"{url}/"
+    DescargadorFalso.URL = url
+    modulo_subtitulos.DESCARGADOR = DescargadorFalso
+
+def agregar_argumentos(parser: argparse.ArgumentParser):
+    parser.add_argument("--canales", type=int, default=1)
+    parser.add_argument("--dias", type=int, default=7, choices=range(1, 8), metavar="1-7",
+                        help="Días de videos por canal; los recolectores recorren como máximo 7.")
+    parser.add_argument("--videos-por-dia", type=int, default=4)
+    parser.add_argument("--comentarios", type=int, default=50, help="Comentarios por video.")
+    parser.add_argument("--respuestas", type=int, default=0, help="Respuestas por comentario; más de 5 obliga a pedirlas con comments.list.")
+    parser.add_argument("--lineas-subtitulo", type=int, default=200)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos que tarda cada llamada a la API.")
+    parser.add_argument("--tasa-fallas", type=float, default=0.0, help="Probabilidad de que una llamada a la API responda 503.")
+
+def desde_argumentos(args):
+    return ApiFalsa(args.canales, args.dias, args.videos_por_dia, args.comentarios, args.lineas_subtitulo, args.latencia, args.respuestas, args.tasa_fallas)
+
+def main():
+    parser = argparse.ArgumentParser()
+    agregar_argumentos(parser)
+    parser.add_argument("--puerto", type=int, default=8080)
+    args = parser.parse_args()
+
+    api = desde_argumentos(args)
+    api.iniciar(args.puerto)
+    print(f"API falsa en {api.url} con {args.canales} canales de {api.total_videos()} videos. Ctrl+C para salir.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        api.detener()
+
+if __name__ == "__main__":
+    main()
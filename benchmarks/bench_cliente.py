@@ -0,0 +1,75 @@
+# Compara el costo por video de crear el servicio y la conexión en cada llamada
+# contra reutilizar un solo ClienteYoutube. No usa la red: el servicio se construye
+# con el documento de descubrimiento estático y las peticiones van a un servidor local.
+#
+#   python -m benchmarks.bench_cliente --videos 50
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from googleapiclient.discovery import build
+
+from Comun import cliente as modulo_cliente
+from Comun.cliente import ClienteYoutube
+
+class ManejadorLocal(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        cuerpo = json.dumps({"items": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+def medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=50)
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManejadorLocal)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}"
+    modulo_cliente.URL_BASE = url
+
+    # Antes: cada video construía el servicio y abría una conexión nueva.
+    def video_antes():
+        build('youtube', 'v3', developerKey="bench", cache_discovery=False)
+        requests.get(f"{url}/videos", params={"id": "x", "key": "bench"}).json()
+
+    cliente = ClienteYoutube("bench")
+    cliente.servicio("bench")
+
+    # Después: el servicio y la sesión keep-alive se reutilizan.
+    def video_despues():
+        cliente.servicio("bench")
+        cliente.get("videos", id="x").json()
+
+    antes = medir(video_antes, args.videos)
+    despues = medir(video_despues, args.videos)
+
+    print(f"Videos medidos: {args.videos}")
+    print(f"Antes:   {antes:.2f} ms por video")
+    print(f"Después: {despues:.2f} ms por video")
+    print(f"Mejora:  {antes / despues:.1f}x")
+
+    cliente.cerrar()
+    servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
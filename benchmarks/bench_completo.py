@@ -0,0 +1,236 @@
+# Corre Canal, Playlist y Video de principio a fin contra la API falsa y reporta videos por
+# segundo, llamadas a la API por video, memoria pico y el tiempo acumulado en cada etapa.
+# Cada escenario se ejecuta en su propio proceso y carpeta temporal, así la memoria pico y
+# los archivos SQLite (caché, cuota, manifiesto) no se mezclan entre escenarios ni con los reales.
+#
+#   python -m benchmarks.bench_completo --canales 2 --videos-por-dia 10 --comentarios 200
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import api_falsa
+from Motor import etapas, fuentes
+
+ESCENARIOS = ("canal", "playlist", "video")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Cronometro:
+    # Suma el tiempo de cada etapa; con la tubería las etapas se traslapan, así que la suma
+    # de todas puede ser mayor que la duración total.
+    def __init__(self):
+        self.segundos = {}
+        self.lock = threading.Lock()
+
+    def envolver(self, objeto, atributo: str, etapa: str):
+        original = getattr(objeto, atributo)
+
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.segundos[etapa] = self.segundos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+        setattr(objeto, atributo, medida)
+
+def configurar_escenario(args):
+    return {
+        "llave": "falsa",
+        "peticionesPorSegundo": args.peticiones_por_segundo,
+        "concurrenciaFuentes": args.concurrencia_fuentes,
+        "salida": args.formato,
+        "almacenamiento": args.almacenamiento,
+        "compresion": args.compresion,
+        "metricas": configurar_metricas(args)
+    }
+
+def configurar_metricas(args):
+    # Con --metricas cada escenario deja su log JSON y su archivo de Prometheus (y su perfil) en esa carpeta.
+    if not args.metricas:
+        return None
+    base = os.path.join(os.path.abspath(args.metricas), args.hijo)
+    opciones = {"log": f"{base}.jsonl", "prometheus": f"{base}.prom"}
+    if args.perfil:
+        opciones.update(perfil=args.perfil, rutaPerfil=f"{base}.prof" if args.perfil == "cprofile" else f"{base}.html")
+    return opciones
+
+def correr_canal(args, cronometro):
+    from Canal import youtube as modulo
+
+    fecha_inicio, fecha_fin = api_falsa.ventana(args.dias)
+    config = configurar_escenario(args)
+    config["campos"] = [{
+        "idCanal": api_falsa.id_canal(indice),
+        "nombreCanal": f"Canal Falso {indice}",
+        "busqueda": "" if args.subidas else api_falsa.PALABRA,
+        "fechaUnica": None,
+        "fechaInicio": fecha_inicio,
+        "fechaFin": fecha_fin
+    } for indice in range(args.canales)]
+    with open("canales.json", "w", encoding="utf-8") as archivo:
+        json.dump(config, archivo)
+
+    modulo.PRESUPUESTO_CUOTA = args.presupuesto
+    cronometro.envolver(fuentes.BusquedaCanal, "buscar", "busqueda")
+    cronometro.envolver(fuentes.SubidasCanal, "buscar", "busqueda")
+    envolver_etapas(cronometro)
+    modulo.main()
+
+def correr_playlist(args, cronometro):
+    from Playlist import youtube as modulo
+
+    fecha_inicio, fecha_fin = api_falsa.ventana(args.dias)
+    config = configurar_escenario(args)
+    config["campos"] = [{
+        "idPlaylist": api_falsa.id_playlist(indice),
+        "nombrePlaylist": f"Lista Falsa {indice}",
+        "fechaUnica": None,
+        "fechaInicio": fecha_inicio,
+        "fechaFin": fecha_fin
+    } for indice in range(args.canales)]
+    with open("playlists.json", "w", encoding="utf-8") as archivo:
+        json.dump(config, archivo)
+
+    modulo.PRESUPUESTO_CUOTA = args.presupuesto
+    cronometro.envolver(fuentes.Playlist, "buscar", "busqueda")
+    envolver_etapas(cronometro)
+    modulo.main()
+
+def envolver_etapas(cronometro):
+    # Las etapas son las del motor compartido: se miden igual para los tres escenarios.
+    for etapa in ("subtitulos", "limpieza", "comentarios"):
+        cronometro.envolver(etapas.Recolector, f"etapa_{etapa}", etapa)
+
+def correr_video(args, cronometro):
+    from Video import youtube as modulo
+
+    os.makedirs("Video", exist_ok=True)
+    videos = min(args.videos, api_falsa.desde_argumentos(args).total_videos())
+    config = configurar_escenario(args)
+    config["campos"] = [{"idVideo": api_falsa.id_video(0, indice)} for indice in range(videos)]
+    with open(os.path.join("Video", "videos.json"), "w", encoding="utf-8") as archivo:
+        json.dump(config, archivo)
+
+    modulo.PRESUPUESTO_CUOTA = args.presupuesto
+    cronometro.envolver(fuentes.ListaVideos, "buscar", "busqueda")
+    envolver_etapas(cronometro)
+    modulo.main()
+
+def correr_hijo(args):
+    # Proceso de un solo escenario: los recolectores usan la API falsa del proceso padre.
+    from Comun import almacen, busqueda, cache, cuota, manifiesto
+
+    carpeta = tempfile.mkdtemp(prefix=f"bench_{args.hijo}_")
+    os.chdir(carpeta)
+    api_falsa.usar_api_falsa(args.url)
+    cache.RUTA_CACHE = os.path.join(carpeta, "cache_metadatos.sqlite3")
+    cuota.RUTA_LIBRO = os.path.join(carpeta, "cuota.sqlite3")
+    manifiesto.RUTA_MANIFIESTO = os.path.join(carpeta, "manifiesto.sqlite3")
+    almacen.CARPETA_ALMACEN = os.path.join(carpeta, "almacen")
+    busqueda.RUTA_INDICE = os.path.join(carpeta, "busqueda.sqlite3")
+
+    cronometro = Cronometro()
+    correr = {"canal": correr_canal, "playlist": correr_playlist, "video": correr_video}[args.hijo]
+    inicio = time.perf_counter()
+    try:
+        correr(args, cronometro)
+    finally:
+        segundos = time.perf_counter() - inicio
+        os.chdir(RAIZ)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    resultado = {
+        "segundos": segundos,
+        "etapas": cronometro.segundos,
+        # ru_maxrss está en KiB en Linux.
+        "rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+    with open(args.resultado, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo)
+
+def argumentos_hijo(args):
+    return [
+        "--canales", str(args.canales), "--dias", str(args.dias), "--videos-por-dia", str(args.videos_por_dia),
+        "--comentarios", str(args.comentarios), "--respuestas", str(args.respuestas), "--tasa-fallas", str(args.tasa_fallas), "--lineas-subtitulo", str(args.lineas_subtitulo),
+        "--videos", str(args.videos), "--formato", args.formato, "--almacenamiento", args.almacenamiento,
+        "--compresion", args.compresion, "--presupuesto", str(args.presupuesto),
+        "--peticiones-por-segundo", str(args.peticiones_por_segundo), "--concurrencia-fuentes", str(args.concurrencia_fuentes)
+    ] + (["--subidas"] if args.subidas else []) + (["--metricas", args.metricas] if args.metricas else []) + (["--perfil", args.perfil] if args.perfil else [])
+
+def medir_escenario(api, escenario: str, args):
+    api.reiniciar_contadores()
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as archivo:
+        ruta_resultado = archivo.name
+
+    comando = [sys.executable, "-m", "benchmarks.bench_completo", "--hijo", escenario, "--url", api.url, "--resultado", ruta_resultado]
+    salida = None if args.detalle else subprocess.DEVNULL
+    try:
+        subprocess.run(comando + argumentos_hijo(args), cwd=RAIZ, check=True, stdout=salida)
+        with open(ruta_resultado, "r", encoding="utf-8") as archivo:
+            resultado = json.load(archivo)
+    finally:
+        os.remove(ruta_resultado)
+
+    llamadas, videos = api.contadores()
+    resultado.update(escenario=escenario, llamadas=llamadas, videos=videos)
+    return resultado
+
+def imprimir_resultados(resultados: list[dict]):
+    print(f"{'Escenario':<10} {'Videos':>7} {'Segundos':>9} {'Videos/s':>9} {'Llamadas/video':>15} {'RSS pico':>10}")
+    for resultado in resultados:
+        videos = resultado["videos"]
+        llamadas = sum(resultado["llamadas"].values())
+        por_segundo = videos / resultado["segundos"] if resultado["segundos"] else 0.0
+        por_video = f"{llamadas / videos:.2f}" if videos else "-"
+        print(f"{resultado['escenario']:<10} {videos:>7} {resultado['segundos']:>9.2f} {por_segundo:>9.1f} {por_video:>15} {resultado['rss_kib'] / 1024:>7.1f} MiB")
+
+    print()
+    for resultado in resultados:
+        print(f"{resultado['escenario']}:")
+        print("  Tiempo por etapa (acumulado): " + ", ".join(f"{etapa} {segundos:.2f} s" for etapa, segundos in resultado["etapas"].items()))
+        print("  Llamadas: " + ", ".join(f"{recurso} {cantidad}" for recurso, cantidad in sorted(resultado["llamadas"].items())))
+
+def main():
+    parser = argparse.ArgumentParser()
+    api_falsa.agregar_argumentos(parser)
+    parser.add_argument("--escenarios", nargs="+", choices=ESCENARIOS, default=list(ESCENARIOS))
+    parser.add_argument("--videos", type=int, default=20, help="Videos del escenario Video.")
+    parser.add_argument("--subidas", action="store_true", help="Canal recorre la playlist de subidas en lugar de search.")
+    parser.add_argument("--formato", default="archivos")
+    parser.add_argument("--almacenamiento", default="archivos", choices=("archivos", "paquetes"), help="TTML y comentarios sueltos o en paquetes.")
+    parser.add_argument("--compresion", default="zstd", choices=("zstd", "zlib"))
+    parser.add_argument("--concurrencia-fuentes", type=int, default=1)
+    parser.add_argument("--peticiones-por-segundo", type=float, default=1000.0)
+    parser.add_argument("--presupuesto", type=int, default=10 ** 9, help="Presupuesto de cuota de la corrida.")
+    parser.add_argument("--metricas", help="Carpeta donde cada escenario exporta sus métricas.")
+    parser.add_argument("--perfil", choices=("cprofile", "pyinstrument"), help="Perfila cada escenario (requiere --metricas).")
+    parser.add_argument("--detalle", action="store_true", help="Muestra la salida de los recolectores.")
+    parser.add_argument("--json", help="Además guarda los resultados en este archivo.")
+    parser.add_argument("--hijo", choices=ESCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        correr_hijo(args)
+        return
+
+    with api_falsa.desde_argumentos(args) as api:
+        resultados = [medir_escenario(api, escenario, args) for escenario in args.escenarios]
+
+    imprimir_resultados(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, ensure_ascii=False, indent=4)
+
+if __name__ == "__main__":
+    main()
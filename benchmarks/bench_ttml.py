@@ -0,0 +1,68 @@
+# Compara la limpieza de subtítulos con BeautifulSoup contra el parser incremental de
+# Comun.ttml sobre los archivos TTML del repositorio, y verifica que el texto sea idéntico.
+#
+#   python -m benchmarks.bench_ttml --repeticiones 20
+
+import argparse
+import os
+import time
+import tracemalloc
+from glob import glob
+
+from bs4 import BeautifulSoup
+
+from Comun import ttml
+
+RUTA_RAW = os.path.join("Canal", "YouTube", "El Universal", "subtitulos", "raw")
+
+def limpiar_con_bs4(ruta_archivo):
+    with open(ruta_archivo, "r") as input_f:
+        soup = BeautifulSoup(input_f, "xml")
+        return soup.text.strip()
+
+def medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
+
+def memoria_pico(funcion, ruta_archivo):
+    tracemalloc.start()
+    funcion(ruta_archivo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ruta", default=RUTA_RAW)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--procesos", type=int, default=ttml.PROCESOS)
+    args = parser.parse_args()
+
+    rutas = sorted(glob(os.path.join(args.ruta, "**", "*.ttml"), recursive=True))
+    if not rutas:
+        raise ValueError(f"No se encontraron archivos TTML en {args.ruta}")
+
+    megabytes = sum(os.path.getsize(ruta) for ruta in rutas) / 1024 / 1024
+
+    t_bs4, textos_bs4 = medir(lambda: [limpiar_con_bs4(ruta) for ruta in rutas], args.repeticiones)
+    t_stream, textos_stream = medir(lambda: [ttml.ttml_a_texto(ruta) for ruta in rutas], args.repeticiones)
+    t_lote, textos_lote = medir(lambda: ttml.limpiar_lote(rutas, args.procesos), args.repeticiones)
+
+    if not textos_bs4 == textos_stream == textos_lote:
+        raise ValueError("El texto limpio no coincide con el de BeautifulSoup.")
+
+    mas_grande = max(rutas, key=os.path.getsize)
+
+    print(f"Archivos: {len(rutas)} ({megabytes:.2f} MB), repeticiones: {args.repeticiones}")
+    print(f"BeautifulSoup:           {t_bs4 * 1000:8.2f} ms  {megabytes / t_bs4:7.1f} MB/s")
+    print(f"Incremental:             {t_stream * 1000:8.2f} ms  {megabytes / t_stream:7.1f} MB/s")
+    print(f"Incremental, {args.procesos} procesos: {t_lote * 1000:8.2f} ms  {megabytes / t_lote:7.1f} MB/s")
+    print(f"Memoria pico con {os.path.basename(mas_grande)}:")
+    print(f"  BeautifulSoup: {memoria_pico(limpiar_con_bs4, mas_grande) / 1024:.0f} KiB")
+    print(f"  Incremental:   {memoria_pico(ttml.ttml_a_texto, mas_grande) / 1024:.0f} KiB")
+    print("Salida idéntica: sí")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+from Motor import cli
+
+# Igual que `python -m Motor canal`, en el mismo proceso.
+if __name__ == "__main__":
+    cli.main(["canal", *sys.argv[1:]])
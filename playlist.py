@@ -1,11 +1,6 @@
-import os
-
-def ejecutar_youtube_script():
-    script_path = os.path.join(os.path.dirname(__file__), 'Playlist', 'youtube.py')
-    os.chdir(os.path.dirname(script_path))
-    os.system(f'python3 {script_path}')
+import sys
+from Motor import cli
 
+# Igual que `python -m Motor playlist`, en el mismo proceso.
 if __name__ == "__main__":
-    ejecutar_youtube_script()
-
-
+    cli.main(["playlist", *sys.argv[1:]])
@@ -0,0 +1,29 @@
+# Base común de las pruebas: cada una trabaja en su propia carpeta temporal y las rutas globales del
+# proyecto (caché, libro de cuota, manifiesto, almacén e índice) se pueden desviar a esa carpeta.
+
+import os
+import tempfile
+import unittest
+
+from Comun import almacen, busqueda, cuota, manifiesto
+from Comun import cache as modulo_cache
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class PruebaConCarpeta(unittest.TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+
+    def parchear(self, modulo, nombre: str, valor):
+        # Cambia un valor de módulo sólo durante la prueba.
+        self.addCleanup(setattr, modulo, nombre, getattr(modulo, nombre))
+        setattr(modulo, nombre, valor)
+
+    def aislar(self):
+        # Nada de lo que corre la prueba lee ni escribe los SQLite o el almacén de la raíz del proyecto.
+        for modulo, nombre, archivo in ((modulo_cache, "RUTA_CACHE", "cache_metadatos.sqlite3"), (cuota, "RUTA_LIBRO", "cuota.sqlite3"),
+                                        (manifiesto, "RUTA_MANIFIESTO", "manifiesto.sqlite3"), (almacen, "CARPETA_ALMACEN", "almacen"),
+                                        (busqueda, "RUTA_INDICE", "busqueda.sqlite3")):
+            self.parchear(modulo, nombre, os.path.join(self.carpeta, archivo))
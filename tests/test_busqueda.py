@@ -0,0 +1,43 @@
+# Indexar lo recolectado antes del índice: los comentarios entran con su videoId o no entran.
+
+import json
+import os
+import unittest
+
+from Comun import busqueda
+from tests.entorno import PruebaConCarpeta
+
+DIA = "2024-06-29"
+
+class PruebaImportarCarpeta(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.aislar()
+        self.indice = busqueda.IndiceTexto()
+        self.addCleanup(self.indice.cerrar)
+
+        fuente = os.path.join(self.carpeta, "YouTube", "Canal")
+        raw = os.path.join(fuente, "subtitulos", "raw", "2024", "June", DIA)
+        os.makedirs(raw)
+        open(os.path.join(raw, "Reforma judicial_ID:aaaaaaaaaaa.es.ttml"), 'w').close()
+        comentarios = os.path.join(fuente, "comentarios", "2024", "June", DIA)
+        os.makedirs(comentarios)
+        for titulo in ("Reforma judicial", "Sin subtítulos"):
+            with open(os.path.join(comentarios, f"{titulo}.json"), 'w', encoding='utf-8') as archivo:
+                json.dump({"fecha_publicacion": DIA, "hora_publicacion": "12:00:00", "nombre_canal": "Canal",
+                           "comentarios": [f"Opinión sobre {titulo}"]}, archivo)
+        self.sin_id = os.path.join(comentarios, "Sin subtítulos.json")
+
+    def test_sin_id_no_se_indexa_con_el_titulo(self):
+        contados = self.indice.importar_carpeta(self.carpeta)
+
+        self.assertEqual((contados[busqueda.COMENTARIOS], contados["sin_id"]), (1, [self.sin_id]))
+        resultados = self.indice.buscar("opinion")
+        self.assertEqual([(resultado["video_id"], resultado["titulo"]) for resultado in resultados], [("aaaaaaaaaaa", "Reforma judicial")])
+
+        # Una corrida que después indexa el mismo video con su ID reemplaza el documento en lugar de duplicarlo.
+        busqueda.indexar(self.indice, "aaaaaaaaaaa", busqueda.COMENTARIOS, ["Opinión nueva"], {"titulo": "Reforma judicial"})
+        self.assertEqual(self.indice.total(), {busqueda.COMENTARIOS: 1})
+
+if __name__ == "__main__":
+    unittest.main()
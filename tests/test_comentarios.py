@@ -0,0 +1,181 @@
+# Comentarios página por página: el modo delta sigue desde el último comentario de cada archivo y una
+# corrida interrumpida sigue desde el token de la última página escrita.
+
+import json
+import os
+import unittest
+from datetime import datetime
+
+from benchmarks import api_falsa
+from Comun import cliente as modulo_cliente
+from Comun import comentarios
+from Comun.cliente import ClienteYoutube
+from Comun.manifiesto import Manifiesto
+from Motor.etapas import Ajustes, Recolector
+from Motor.registros import InfoVideo, Video
+from tests.entorno import PruebaConCarpeta
+
+VIDEO = "video000001"
+
+def video(video_id: str = VIDEO):
+    info = InfoVideo("2024-07-02", "10:00:00", "2024-06-30", "12:00:00", "Canal", "Video")
+    return Video(video_id, datetime(2024, 6, 30, 12), info=info)
+
+class ClienteComentarios:
+    # Sólo commentThreads.list, con los hilos del más nuevo al más viejo como con order=time.
+    def __init__(self):
+        self.publicados = []
+
+    def publicar(self, numero: int):
+        self.publicados.append(numero)
+
+    def listar(self, recurso: str, **params):
+        items = [{
+            "id": f"c{numero}",
+            "snippet": {
+                "topLevelComment": {"id": f"c{numero}", "snippet": {"textOriginal": f"comentario {numero}", "publishedAt": f"2024-07-01T00:{numero:02d}:00Z"}},
+                "totalReplyCount": 0
+            }
+        } for numero in sorted(self.publicados, reverse=True)]
+        return {"items": items}
+
+class ClientePaginado:
+    # commentThreads.list con dos hilos por página; la página de `caida` falla una vez, como un corte de red.
+    def __init__(self, total: int, caida: str = None):
+        self.total = total
+        self.caida = caida
+        self.tokens = []
+
+    def listar(self, recurso: str, **params):
+        token = params.get("pageToken")
+        self.tokens.append(token)
+        if token and token == self.caida:
+            self.caida = None
+            raise ConnectionError("Conexión interrumpida")
+        inicio = int(token[1:]) if token else 0
+        items = [{
+            "id": f"c{numero}",
+            "snippet": {
+                "topLevelComment": {"id": f"c{numero}", "snippet": {"textOriginal": f"comentario {numero}", "publishedAt": "2024-07-01T00:00:00Z"}},
+                "totalReplyCount": 0
+            }
+        } for numero in range(inicio, min(inicio + 2, self.total))]
+        respuesta = {"items": items}
+        if inicio + 2 < self.total:
+            respuesta["nextPageToken"] = f"p{inicio + 2}"
+        return respuesta
+
+class PruebaDelta(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.manifiesto = Manifiesto(os.path.join(self.carpeta, "manifiesto.sqlite3"))
+        self.addCleanup(self.manifiesto.cerrar)
+        self.cliente = ClienteComentarios()
+        self.recolector = Recolector(self.cliente, Ajustes(), self.manifiesto, carpeta=self.carpeta)
+        self.video = video()
+
+    def recolectar(self, fuente: str):
+        carpeta = os.path.join(self.carpeta, fuente, "comentarios")
+        self.recolector.obtener_comentarios_video(self.video, carpeta, delta=True)
+        ruta = os.path.join(carpeta, "2024", "June", "2024-06-30", "Video.json")
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)["comentarios"]
+
+    def test_cada_fuente_sigue_desde_su_archivo(self):
+        self.cliente.publicar(1)
+        self.assertEqual(self.recolectar("b"), ["comentario 1"])
+
+        # La fuente A recolecta el mismo video después de un comentario nuevo...
+        self.cliente.publicar(2)
+        self.assertEqual(self.recolectar("a"), ["comentario 2", "comentario 1"])
+
+        # ...y eso no adelanta el punto de partida de B, a la que todavía le falta el 2.
+        self.cliente.publicar(3)
+        self.assertEqual(self.recolectar("b"), ["comentario 3", "comentario 2", "comentario 1"])
+        self.assertEqual(self.recolectar("a"), ["comentario 3", "comentario 2", "comentario 1"])
+
+    def test_ultimo_guardado_es_el_del_archivo(self):
+        ruta_a = os.path.join(self.carpeta, "a.json")
+        ruta_b = os.path.join(self.carpeta, "b.json")
+        for ruta in (ruta_a, ruta_b):
+            open(ruta, 'w').close()
+        self.manifiesto.guardar_ultimo_comentario(VIDEO, ruta_a, "c2", "2024-07-01T00:02:00Z")
+        self.assertEqual(comentarios.ultimo_guardado(self.manifiesto, VIDEO, ruta_a), ("c2", "2024-07-01T00:02:00Z"))
+        self.assertIsNone(comentarios.ultimo_guardado(self.manifiesto, VIDEO, ruta_b))
+
+class PruebaParcial(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.video = video()
+        self.ruta = os.path.join(self.carpeta, "2024", "June", "2024-06-30", "Video.json")
+
+    def recolectar(self, cliente):
+        Recolector(cliente, Ajustes(), carpeta=self.carpeta).obtener_comentarios_video(self.video, self.carpeta)
+
+    def test_retoma_desde_el_token_guardado(self):
+        cliente = ClientePaginado(total=7, caida="p4")
+        with self.assertRaises(ConnectionError):
+            self.recolectar(cliente)
+        self.assertFalse(os.path.exists(self.ruta))
+        with open(f"{self.ruta}.parcial.estado", 'r', encoding='utf-8') as archivo:
+            estado = json.load(archivo)
+        self.assertEqual((estado["siguiente"], estado["escritos"]), ("p4", 4))
+
+        # La corrida siguiente no repite las dos primeras páginas.
+        cliente.tokens = []
+        self.recolectar(cliente)
+        self.assertEqual(cliente.tokens, ["p4", "p6"])
+        with open(self.ruta, 'r', encoding='utf-8') as archivo:
+            self.assertEqual(json.load(archivo)["comentarios"], [f"comentario {numero}" for numero in range(7)])
+        self.assertFalse(os.path.exists(f"{self.ruta}.parcial") or os.path.exists(f"{self.ruta}.parcial.estado"))
+
+    def test_lo_escrito_despues_del_estado_se_descarta(self):
+        os.makedirs(os.path.dirname(self.ruta))
+        escritor = comentarios.EscritorComentarios(self.ruta, VIDEO, self.video.info.encabezado())
+        escritor.escribir_pagina(["uno", "dos"], "p2")
+        # Se cae a media página: lo que quedó después del último estado no se repite al retomar.
+        escritor.archivo.write(b',\n        "tres a medias')
+        escritor.cerrar()
+
+        retomado = comentarios.EscritorComentarios(self.ruta, VIDEO, self.video.info.encabezado())
+        self.assertEqual(retomado.siguiente, "p2")
+        retomado.escribir_pagina(["tres"], None)
+        self.assertEqual(retomado.terminar(), 3)
+        with open(self.ruta, 'r', encoding='utf-8') as archivo:
+            self.assertEqual(json.load(archivo)["comentarios"], ["uno", "dos", "tres"])
+
+class PruebaRespuestas(PruebaConCarpeta):
+    # commentThreads.list trae hasta 5 respuestas por hilo; las demás salen de comments.list.
+    def recolectar(self, respuestas: int):
+        video_id = api_falsa.id_video(0, 0)
+        with api_falsa.ApiFalsa(dias=1, videos_por_dia=1, comentarios_por_video=3, respuestas_por_comentario=respuestas) as api:
+            self.parchear(modulo_cliente, "URL_BASE", f"{api.url}/youtube/v3")
+            self.parchear(modulo_cliente, "URL_SERVICIO", f"{api.url}/")
+            cliente = ClienteYoutube("llave")
+            self.addCleanup(cliente.cerrar)
+            Recolector(cliente, Ajustes(), carpeta=self.carpeta).obtener_comentarios_video(video(video_id), self.carpeta)
+            llamadas = api.llamadas["comments"]
+        with open(os.path.join(self.carpeta, "2024", "June", "2024-06-30", "Video.json"), 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)["comentarios"], llamadas
+
+    def esperados(self, respuestas: int):
+        video_id = api_falsa.id_video(0, 0)
+        textos = []
+        for indice in range(3):
+            comentario = f"{video_id}.c{indice:05d}"
+            textos.append(f"Comentario {indice} del video {video_id}")
+            textos.extend(f"Respuesta {numero} al comentario {comentario}" for numero in range(respuestas))
+        return textos
+
+    def test_mas_de_cinco_se_piden_sin_repetir_las_en_linea(self):
+        escritos, llamadas = self.recolectar(12)
+        self.assertEqual(escritos, self.esperados(12))
+        self.assertEqual(llamadas, 3)
+
+    def test_cinco_o_menos_no_cuestan_llamadas(self):
+        escritos, llamadas = self.recolectar(5)
+        self.assertEqual(escritos, self.esperados(5))
+        self.assertEqual(llamadas, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# Las rutas de "metricas" en el JSON de configuración se resuelven junto al JSON, no en la carpeta actual.
+
+import json
+import os
+import unittest
+
+from Comun import metricas
+from tests.entorno import PruebaConCarpeta
+
+class PruebaRutas(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.config = os.path.join(self.carpeta, "Canal", "canales.json")
+        os.makedirs(os.path.dirname(self.config))
+        with open(self.config, 'w', encoding='utf-8') as archivo:
+            json.dump({"metricas": {"log": "metricas/eventos.jsonl", "prometheus": "metricas.prom", "perfil": "cprofile"}}, archivo)
+
+        # Se corre desde otra carpeta, como `python -m Motor canal` desde la raíz.
+        actual = os.getcwd()
+        self.addCleanup(os.chdir, actual)
+        os.chdir(self.carpeta)
+
+    def test_junto_al_json(self):
+        metricas.iniciar(self.config)
+        metricas.contar("videos_total", etapa="prueba")
+        metricas.finalizar()
+
+        canal = os.path.dirname(self.config)
+        for nombre in ("metricas/eventos.jsonl", "metricas.prom", "perfil.prof"):
+            self.assertTrue(os.path.exists(os.path.join(canal, nombre)), nombre)
+        self.assertEqual(sorted(os.listdir(self.carpeta)), ["Canal"])
+
+    def test_la_siguiente_corrida_no_reescribe_la_anterior(self):
+        metricas.iniciar(self.config)
+        metricas.finalizar()
+        prometheus = os.path.join(os.path.dirname(self.config), "metricas.prom")
+        os.remove(prometheus)
+
+        # Otra configuración sin "metricas" en el mismo proceso, como `python -m Motor` con varios recolectores.
+        otra = os.path.join(self.carpeta, "Video", "videos.json")
+        os.makedirs(os.path.dirname(otra))
+        with open(otra, 'w', encoding='utf-8') as archivo:
+            json.dump({"campos": []}, archivo)
+        metricas.iniciar(otra)
+        metricas.finalizar()
+        self.assertFalse(os.path.exists(prometheus))
+
+if __name__ == "__main__":
+    unittest.main()
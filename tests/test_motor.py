@@ -0,0 +1,87 @@
+# Una corrida completa del motor contra la API falsa de benchmarks: qué queda escrito junto al JSON de configuración.
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from benchmarks import api_falsa
+from Comun import cliente as modulo_cliente
+from Comun import cuota, subtitulos
+from Motor import trabajo
+from tests.entorno import PruebaConCarpeta
+
+VIDEOS = [api_falsa.id_video(0, indice) for indice in range(3)]
+
+def archivos(carpeta: str, extension: str):
+    return sorted(os.path.relpath(os.path.join(raiz, nombre), carpeta)
+                  for raiz, _, nombres in os.walk(carpeta) for nombre in nombres if nombre.endswith(extension))
+
+class PruebaCorrida(PruebaConCarpeta):
+    @classmethod
+    def setUpClass(cls):
+        cls.api = api_falsa.ApiFalsa(dias=2, videos_por_dia=3, comentarios_por_video=4, lineas_subtitulo=5)
+        cls.api.iniciar()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api.detener()
+
+    def setUp(self):
+        super().setUp()
+        self.aislar()
+        for modulo, nombre in ((modulo_cliente, "URL_BASE"), (modulo_cliente, "URL_SERVICIO"), (subtitulos, "DESCARGADOR")):
+            self.parchear(modulo, nombre, getattr(modulo, nombre))
+        api_falsa.usar_api_falsa(self.api.url)
+        self.api.reiniciar_contadores()
+
+    def configurar(self, nombre: str, campos: list[dict]):
+        ruta = os.path.join(self.carpeta, nombre, "config.json")
+        os.makedirs(os.path.dirname(ruta))
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump({"llave": "llave", "peticionesPorSegundo": 1000, "campos": campos}, archivo)
+        return ruta
+
+    def ejecutar(self, ruta: str):
+        impreso = io.StringIO()
+        with contextlib.redirect_stdout(impreso):
+            trabajo.ejecutar(ruta)
+        return impreso.getvalue()
+
+    def test_videos_sueltos(self):
+        ruta = self.configurar("Video", [{"idVideo": video_id} for video_id in VIDEOS] + [{"idVideo": "noexiste"}])
+
+        impreso = self.ejecutar(ruta)
+
+        # El video que no existe se reporta y no frena a los demás.
+        self.assertIn("noexiste", impreso)
+        carpeta = os.path.dirname(ruta)
+        comentarios = archivos(os.path.join(carpeta, "Youtube", "comentarios"), ".json")
+        self.assertEqual(comentarios, [os.path.join("2024", "June", "2024-06-30", f"Noticias 0 video {indice}.json") for indice in range(3)])
+        with open(os.path.join(carpeta, "Youtube", "comentarios", comentarios[0]), 'r', encoding='utf-8') as archivo:
+            self.assertEqual(len(json.load(archivo)["comentarios"]), 4)
+        ttml = archivos(os.path.join(carpeta, "Youtube", "subtitulos", "raw"), ".ttml")
+        self.assertEqual([nombre.rsplit("_ID:", 1)[1] for nombre in ttml], [f"{video_id}.es.ttml" for video_id in VIDEOS])
+        self.assertEqual(cuota.leer_pendientes(os.path.join(carpeta, "pendientes.json"))[1], [])
+
+    def test_la_fuente_con_error_queda_pendiente(self):
+        fecha_inicio, fecha_fin = api_falsa.ventana(2)
+        ruta = self.configurar("Playlist", [{"idPlaylist": api_falsa.id_playlist(0), "nombrePlaylist": "Lista", "fechaUnica": None,
+                                             "fechaInicio": fecha_inicio, "fechaFin": fecha_fin}])
+        self.api.inyectar("playlistItems", 400, veces=10)
+
+        impreso = self.ejecutar(ruta)
+
+        self.assertIn("Fuentes con error", impreso)
+        self.assertEqual(cuota.leer_pendientes(os.path.join(os.path.dirname(ruta), "pendientes.json"))[1], [api_falsa.id_playlist(0)])
+
+        # La siguiente corrida del mismo día la retoma y la termina.
+        self.api.reiniciar_contadores()
+        self.ejecutar(ruta)
+        carpeta = os.path.dirname(ruta)
+        self.assertEqual(len(archivos(carpeta, ".ttml")), 6)
+        self.assertEqual(cuota.leer_pendientes(os.path.join(carpeta, "pendientes.json"))[1], [])
+
+if __name__ == "__main__":
+    unittest.main()
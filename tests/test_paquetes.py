@@ -0,0 +1,170 @@
+# Paquetes: la migración empaca los comentarios bajo su videoId y empacar/extraer no cargan el archivo entero.
+
+import json
+import os
+import shutil
+import tracemalloc
+import unittest
+
+from Comun import almacen, paquetes
+from Comun import cache as modulo_cache
+from tests.entorno import RAIZ, PruebaConCarpeta
+
+DIA = "2024-06-29"
+
+class PruebaMigracion(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        # Ni almacén ni caché del proyecto: sólo lo que arma cada prueba.
+        self.aislar()
+        self.fuente = os.path.join(self.carpeta, "YouTube", "Canal")
+
+    def dia(self, tipo: str):
+        ruta = os.path.join(self.fuente, *tipo.split("/"), "2024", "June", DIA)
+        os.makedirs(ruta, exist_ok=True)
+        return ruta
+
+    def ttml(self, titulo: str, video_id: str, separador: str = "_ID:"):
+        with open(os.path.join(self.dia("subtitulos/raw"), f"{titulo}{separador}{video_id}.es.ttml"), 'w', encoding='utf-8') as archivo:
+            archivo.write(f"<tt>{video_id}</tt>")
+
+    def comentarios(self, titulo: str, hora: str = "12:00:00"):
+        ruta = os.path.join(self.dia("comentarios"), f"{titulo}.json")
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump({"fecha_publicacion": DIA, "hora_publicacion": hora, "nombre_canal": "Canal", "comentarios": [titulo]}, archivo)
+        return ruta
+
+    def empacados(self):
+        contenido = paquetes.Paquetes(os.path.join(self.fuente, "comentarios"), ".json", paquetes.ZLIB)
+        self.addCleanup(contenido.cerrar)
+        return contenido
+
+    def test_id_desde_los_ttml_y_la_cache(self):
+        self.ttml("Título: uno", "aaaaaaaaaaa")
+        self.comentarios("Título uno")
+        cache = modulo_cache.CacheMetadatos()
+        cache.guardar("video", "bbbbbbbbbbb", {"title": "Título dos", "publishedAt": f"{DIA}T08:30:00Z", "channelTitle": "Canal"})
+        cache.cerrar()
+        self.comentarios("Título dos", "08:30:00")
+
+        contados = paquetes.migrar_carpeta(self.carpeta, paquetes.ZLIB)
+
+        self.assertEqual((contados["raw"], contados["comentarios"], contados["sin_id"]), (1, 2, []))
+        empacados = self.empacados()
+        self.assertEqual(empacados.video_ids(), ["aaaaaaaaaaa", "bbbbbbbbbbb"])
+        self.assertEqual(json.loads(empacados.leer("bbbbbbbbbbb"))["comentarios"], ["Título dos"])
+        self.assertEqual(empacados.entrada("aaaaaaaaaaa")["nombre"], "Título uno.json")
+
+    def test_nombres_como_los_deja_youtube_dl(self):
+        # Nombres reales de Canal/YouTube: youtube_dl cambia "|" por "_" y ":" por U+F03A; los comentarios
+        # quitan esos signos y, los más viejos, también los acentos.
+        self.ttml("La Mañanera de AMLO _ martes  20 agosto  2024  _ En vivo", "G0sC3VZoCH8", "_ID\uf03a")
+        self.comentarios("La Mañanera de AMLO  martes  20 agosto  2024   En vivo")
+        self.ttml("Ricardo Salinas Pliego rechaza invitación de AMLO a opinar sobre la sobrerrepresentación", "HUUol8Sc6ng", "_ID\uf03a")
+        self.comentarios("Ricardo Salinas Pliego rechaza invitacion de AMLO a opinar sobre la sobrerrepresentacion")
+        self.ttml("“Sería muy extraño, raro que Carlos Slim esté a favor de que se viole la Constitución” - AMLO #shorts", "1rBt20g_lKw", "_ID\uf03a")
+        self.comentarios("Sería muy extraño raro que Carlos Slim esté a favor de que se viole la Constitución AMLO shorts")
+
+        contados = paquetes.migrar_carpeta(self.carpeta, paquetes.ZLIB)
+
+        self.assertEqual(contados["sin_id"], [])
+        empacados = self.empacados()
+        self.assertEqual(empacados.entrada("G0sC3VZoCH8")["nombre"], "La Mañanera de AMLO  martes  20 agosto  2024   En vivo.json")
+        self.assertEqual(sorted(empacados.video_ids()), ["1rBt20g_lKw", "G0sC3VZoCH8", "HUUol8Sc6ng"])
+
+    def test_arbol_del_repositorio(self):
+        shutil.copytree(os.path.join(RAIZ, "Canal", "YouTube"), os.path.join(self.carpeta, "YouTube"))
+
+        contados = paquetes.migrar_carpeta(self.carpeta, paquetes.ZLIB)
+
+        self.assertEqual((contados["raw"], contados["comentarios"], contados["sin_id"]), (10, 10, []))
+        fuente = os.path.join(self.carpeta, "YouTube", "El Universal")
+        comentarios = paquetes.Paquetes(os.path.join(fuente, "comentarios"), ".json", paquetes.ZLIB)
+        self.addCleanup(comentarios.cerrar)
+        subtitulos = paquetes.Paquetes(os.path.join(fuente, "subtitulos", "raw"), ".ttml", paquetes.ZLIB)
+        self.addCleanup(subtitulos.cerrar)
+        self.assertEqual(comentarios.video_ids(), subtitulos.video_ids())
+
+    def test_titulo_cambiado_por_canal_y_hora(self):
+        # El título cambió después de escribir el archivo; el canal y la hora de publicación siguen iguales.
+        cache = modulo_cache.CacheMetadatos()
+        cache.guardar("video", "ccccccccccc", {"title": "Título corregido", "publishedAt": f"{DIA}T08:30:00Z", "channelTitle": "Canal"})
+        cache.guardar("video", "ddddddddddd", {"title": "Otro", "publishedAt": f"{DIA}T08:30:00Z", "channelTitle": "Otro canal"})
+        cache.cerrar()
+        self.comentarios("Título original", "08:30:00")
+
+        contados = paquetes.migrar_carpeta(self.carpeta, paquetes.ZLIB)
+
+        self.assertEqual(contados["sin_id"], [])
+        self.assertEqual(self.empacados().video_ids(), ["ccccccccccc"])
+
+    def test_sin_id_se_queda_suelto(self):
+        # Dos videos con el mismo título el mismo día: no se puede saber cuál es.
+        self.ttml("Repetido", "aaaaaaaaaaa")
+        self.ttml("Repetido", "bbbbbbbbbbb")
+        repetido = self.comentarios("Repetido")
+        desconocido = self.comentarios("Sin subtítulos")
+
+        contados = paquetes.migrar_carpeta(self.carpeta, paquetes.ZLIB)
+
+        self.assertEqual(contados["comentarios"], 0)
+        self.assertEqual(sorted(contados["sin_id"]), sorted([repetido, desconocido]))
+        self.assertTrue(os.path.exists(repetido) and os.path.exists(desconocido))
+        self.assertEqual(self.empacados().video_ids(), [])
+
+class PruebaArchivosGrandes(PruebaConCarpeta):
+    # Importar al almacén, empacar y extraer van de a bloques: la memoria no crece con el archivo.
+    TAMANO = 4 << 20
+
+    def setUp(self):
+        super().setUp()
+        self.contenido = os.urandom(self.TAMANO)
+        # Bloques chicos para que la diferencia con leer el archivo entero se note.
+        self.parchear(almacen, "BLOQUE", 64 << 10)
+
+    def escribir(self, carpeta: str, nombre: str):
+        os.makedirs(carpeta, exist_ok=True)
+        ruta = os.path.join(carpeta, nombre)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(self.contenido)
+        return ruta
+
+    def medir(self, funcion, *args):
+        tracemalloc.start()
+        try:
+            resultado = funcion(*args)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(pico, self.TAMANO // 8)
+        return resultado
+
+    def test_importar_al_almacen(self):
+        contenidos = almacen.Almacen(os.path.join(self.carpeta, "almacen"))
+        self.addCleanup(contenidos.cerrar)
+        ruta = self.escribir(os.path.join(self.carpeta, "comentarios"), "Video.json")
+
+        huella = self.medir(contenidos.importar, "aaaaaaaaaaa", almacen.COMENTARIOS, ruta)
+
+        self.assertEqual(huella, almacen.huella(self.contenido))
+        self.assertEqual(contenidos.entrada("aaaaaaaaaaa", almacen.COMENTARIOS)["tamano"], self.TAMANO)
+        self.assertEqual(contenidos.leer("aaaaaaaaaaa", almacen.COMENTARIOS), self.contenido)
+
+    def test_empacar_y_extraer(self):
+        empacados = paquetes.Paquetes(os.path.join(self.carpeta, "comentarios"), ".json", paquetes.ZLIB)
+        self.addCleanup(empacados.cerrar)
+        empacados.agregar("aaaaaaaaaaa", b"{}", DIA, "Otro.json")
+        trabajo = empacados.carpeta_trabajo("bbbbbbbbbbb")
+        self.escribir(trabajo, "Video.json")
+
+        self.medir(empacados.empacar, "bbbbbbbbbbb", trabajo, DIA)
+
+        self.assertFalse(os.path.exists(trabajo))
+        self.assertEqual(empacados.entrada("bbbbbbbbbbb")["tamano"], self.TAMANO)
+        self.assertEqual((empacados.leer("aaaaaaaaaaa"), empacados.leer("bbbbbbbbbbb")), (b"{}", self.contenido))
+        ruta = self.medir(empacados.extraer, "bbbbbbbbbbb", self.carpeta)
+        with open(ruta, 'rb') as archivo:
+            self.assertEqual(archivo.read(), self.contenido)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+# Reintentos, circuitos, lista de fallidos y rotación de llaves contra la API falsa de benchmarks,
+# que inyecta los 429/5xx, Retry-After y quotaExceeded. Las esperas no se duermen: se anotan.
+
+import os
+import time
+import unittest
+from datetime import datetime
+
+from benchmarks import api_falsa
+from Comun import cliente as modulo_cliente
+from Comun import subtitulos
+from Comun.cliente import ClienteYoutube
+from Comun.cuota import CuotaAgotada
+from Comun.resiliencia import CircuitoAbierto, FalloTransitorio, ListaFallidos, PoliticaReintentos
+from Motor.etapas import Ajustes, Recolector
+from Motor.registros import Video
+from tests.entorno import PruebaConCarpeta
+
+VIDEO = api_falsa.id_video(0, 0)
+
+class PruebaConApi(PruebaConCarpeta):
+    # Un servidor por clase; cada prueba empieza sin contadores ni fallas pendientes.
+    @classmethod
+    def setUpClass(cls):
+        cls.api = api_falsa.ApiFalsa(dias=1, videos_por_dia=2, comentarios_por_video=3)
+        cls.api.iniciar()
+        cls.url_base = modulo_cliente.URL_BASE
+        modulo_cliente.URL_BASE = f"{cls.api.url}/youtube/v3"
+
+    @classmethod
+    def tearDownClass(cls):
+        modulo_cliente.URL_BASE = cls.url_base
+        cls.api.detener()
+
+    def setUp(self):
+        super().setUp()
+        self.api.reiniciar_contadores()
+        self.esperas = []
+
+    def cliente(self, llaves="llave", **opciones):
+        politica = PoliticaReintentos(dormir=self.esperas.append, **opciones)
+        cliente = ClienteYoutube(llaves, politica=politica)
+        self.addCleanup(cliente.cerrar)
+        return cliente
+
+    def pedir_video(self, cliente):
+        return cliente.get("videos", part="snippet", id=VIDEO)
+
+class PruebaReintentos(PruebaConApi):
+    def test_reintenta_503(self):
+        self.api.inyectar("videos", 503, veces=2)
+        response = self.pedir_video(self.cliente())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["id"], VIDEO)
+        self.assertEqual(self.api.llamadas["videos"], 3)
+        self.assertEqual(len(self.esperas), 2)
+
+    def test_reintenta_429(self):
+        self.api.inyectar("videos", 429)
+        response = self.pedir_video(self.cliente())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.api.llamadas["videos"], 2)
+        self.assertEqual(len(self.esperas), 1)
+
+    def test_reintenta_con_el_cliente_de_descubrimiento(self):
+        self.parchear(modulo_cliente, "URL_SERVICIO", f"{self.api.url}/")
+        self.api.inyectar("commentThreads", 503)
+        respuesta = self.cliente().listar("commentThreads", part="snippet", videoId=VIDEO)
+        self.assertEqual(len(respuesta["items"]), 3)
+        self.assertEqual(self.api.llamadas["commentThreads"], 2)
+
+    def test_retry_after_manda_sobre_el_backoff(self):
+        # Con espera_base de 1000 s el backoff nunca daría exactamente 7.
+        self.api.inyectar("videos", 503, retry_after=7)
+        self.api.inyectar("videos", 429, retry_after=3)
+        response = self.pedir_video(self.cliente(espera_base=1000, espera_maxima=1000))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.esperas, [7.0, 3.0])
+
+    def test_retry_after_no_pasa_de_la_espera_maxima(self):
+        self.api.inyectar("videos", 503, retry_after=120)
+        self.pedir_video(self.cliente(espera_maxima=30))
+        self.assertEqual(self.esperas, [30])
+
+    def test_sin_intentos_devuelve_el_ultimo_error(self):
+        self.api.inyectar("videos", 503, veces=3)
+        response = self.pedir_video(self.cliente(reintentos=2))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.api.llamadas["videos"], 3)
+
+    def test_no_reintenta_errores_definitivos(self):
+        self.api.inyectar("videos", 404, razon="videoNotFound")
+        response = self.pedir_video(self.cliente())
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.api.llamadas["videos"], 1)
+        self.assertEqual(self.esperas, [])
+
+class PruebaCircuito(PruebaConApi):
+    ENFRIAMIENTO = 0.2
+
+    def test_abierto_semiabierto_y_cerrado(self):
+        cliente = self.cliente(reintentos=0, umbral=2, enfriamiento=self.ENFRIAMIENTO)
+        interruptor = cliente.politica.interruptor("videos")
+
+        # Dos fallos seguidos abren el circuito y la tercera llamada ni siquiera sale.
+        self.api.inyectar("videos", 503, veces=2)
+        self.assertEqual(self.pedir_video(cliente).status_code, 503)
+        self.assertEqual(self.pedir_video(cliente).status_code, 503)
+        with self.assertRaises(CircuitoAbierto):
+            self.pedir_video(cliente)
+        self.assertEqual(self.api.llamadas["videos"], 2)
+
+        # Los otros endpoints tienen su propio circuito.
+        self.assertEqual(cliente.get("channels", part="snippet", id=api_falsa.id_canal(0)).status_code, 200)
+
+        # Semiabierto: pasado el enfriamiento se deja pasar una llamada de prueba; si falla, se vuelve a abrir.
+        time.sleep(self.ENFRIAMIENTO + 0.05)
+        self.api.inyectar("videos", 503)
+        self.assertEqual(self.pedir_video(cliente).status_code, 503)
+        with self.assertRaises(CircuitoAbierto):
+            self.pedir_video(cliente)
+        self.assertEqual(self.api.llamadas["videos"], 3)
+
+        # Si la prueba sale bien, el circuito se cierra y las llamadas siguen normalmente.
+        time.sleep(self.ENFRIAMIENTO + 0.05)
+        self.assertEqual(self.pedir_video(cliente).status_code, 200)
+        self.assertIsNone(interruptor.abierto_desde)
+        self.assertEqual(interruptor.fallos, 0)
+        self.assertEqual(self.pedir_video(cliente).status_code, 200)
+        self.assertEqual(self.api.llamadas["videos"], 5)
+
+    def test_exito_reinicia_los_fallos(self):
+        cliente = self.cliente(reintentos=0, umbral=2, enfriamiento=self.ENFRIAMIENTO)
+        for _ in range(3):
+            self.api.inyectar("videos", 503)
+            self.assertEqual(self.pedir_video(cliente).status_code, 503)
+            self.assertEqual(self.pedir_video(cliente).status_code, 200)
+        self.assertIsNone(cliente.politica.interruptor("videos").abierto_desde)
+
+class PruebaLlaves(PruebaConApi):
+    def test_rota_a_la_siguiente_llave_con_quota_exceeded(self):
+        self.api.agotar_llave("llave-1")
+        cliente = self.cliente(["llave-1", "llave-2"])
+        for _ in range(3):
+            self.assertEqual(self.pedir_video(cliente).status_code, 200)
+        # Una sola llamada con la llave agotada; la misma petición se repite con la otra.
+        self.assertEqual(self.api.llaves_usadas["llave-1"], 1)
+        self.assertEqual(self.api.llaves_usadas["llave-2"], 3)
+        self.assertEqual(cliente.llaves.disponibles(), ["llave-2"])
+        self.assertEqual(self.esperas, [])
+
+    def test_sin_llaves_lanza_cuota_agotada(self):
+        self.api.agotar_llave("llave-1")
+        self.api.agotar_llave("llave-2")
+        with self.assertRaises(CuotaAgotada):
+            self.pedir_video(self.cliente(["llave-1", "llave-2"]))
+
+class DescargadorCaido:
+    # youtube_dl con un error transitorio en cada descarga.
+    descargas = 0
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def download(self, video_ids: list[str]):
+        DescargadorCaido.descargas += 1
+        raise subtitulos._youtube_dl().utils.DownloadError("ERROR: HTTP Error 503: Service Unavailable")
+
+class DescargadorPorVideo(DescargadorCaido):
+    # Los "caido*" dan 503, los "privado*" un error definitivo y el resto baja un TTML.
+    def download(self, video_ids: list[str]):
+        DescargadorCaido.descargas += 1
+        video_id = video_ids[0]
+        errores = subtitulos._youtube_dl().utils
+        if video_id.startswith("caido"):
+            raise errores.DownloadError("ERROR: HTTP Error 503: Service Unavailable")
+        if video_id.startswith("privado"):
+            raise errores.DownloadError("ERROR: Private video")
+        with open(self.params["outtmpl"] % {"title": video_id, "id": video_id, "ext": "es.ttml"}, 'w') as archivo:
+            archivo.write("<tt/>")
+
+class PruebaSemiabierto(unittest.TestCase):
+    def test_un_error_definitivo_en_la_prueba_no_deja_el_circuito_tomado(self):
+        politica = PoliticaReintentos(reintentos=0, umbral=1, enfriamiento=0, dormir=lambda segundos: None)
+
+        def transitorio():
+            raise FalloTransitorio("503")
+
+        def definitivo():
+            raise LookupError("404 videoNotFound")
+
+        # Abre el circuito; con enfriamiento 0 la llamada siguiente ya es la de prueba.
+        self.assertIsNone(politica.ejecutar("videos", transitorio))
+        with self.assertRaises(LookupError):
+            politica.ejecutar("videos", definitivo)
+        self.assertEqual(politica.ejecutar("videos", lambda: "ok"), "ok")
+
+    def test_interrumpida_la_prueba_se_deja_pasar_otra(self):
+        politica = PoliticaReintentos(reintentos=0, umbral=1, enfriamiento=0, dormir=lambda segundos: None)
+        interruptor = politica.interruptor("videos")
+        interruptor.fallo()
+
+        def interrumpida():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            politica.ejecutar("videos", interrumpida)
+        self.assertFalse(interruptor.prueba_en_curso)
+        self.assertEqual(politica.ejecutar("videos", lambda: "ok"), "ok")
+
+class PruebaCircuitoSubtitulos(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.parchear(subtitulos, "DESCARGADOR", DescargadorCaido)
+        DescargadorCaido.descargas = 0
+
+    def test_el_circuito_de_youtube_dl_dura_toda_la_corrida(self):
+        recolector = Recolector(None, Ajustes(trabajadores_subtitulos=1), carpeta=self.carpeta)
+        self.assertIsInstance(recolector.politica_subtitulos, PoliticaReintentos)
+        recolector.politica_subtitulos = PoliticaReintentos(reintentos=0, umbral=2, enfriamiento=60, dormir=lambda segundos: None)
+        publicado = datetime(2024, 6, 30, 12)
+
+        primera = recolector.descargar_subtitulos([Video("video00000a", publicado), Video("video00000b", publicado)], self.carpeta)
+        self.assertEqual(len(primera), 2)
+        self.assertEqual(DescargadorCaido.descargas, 2)
+
+        # La página siguiente ya encuentra el circuito abierto y no llama a youtube_dl.
+        segunda = recolector.descargar_subtitulos([Video("video00000c", publicado)], self.carpeta)
+        self.assertIsInstance(segunda["video00000c"], CircuitoAbierto)
+        self.assertEqual(DescargadorCaido.descargas, 2)
+
+    def test_un_video_privado_en_la_prueba_no_frena_los_siguientes(self):
+        subtitulos.DESCARGADOR = DescargadorPorVideo
+        recolector = Recolector(None, Ajustes(trabajadores_subtitulos=1), carpeta=self.carpeta)
+        recolector.politica_subtitulos = PoliticaReintentos(reintentos=0, umbral=1, enfriamiento=0.05, dormir=lambda segundos: None)
+        publicado = datetime(2024, 6, 30, 12)
+
+        self.assertEqual(list(recolector.descargar_subtitulos([Video("caido00000a", publicado)], self.carpeta)), ["caido00000a"])
+        time.sleep(0.1)
+        # La llamada de prueba da con un video privado: youtube_dl respondió, así que el circuito se cierra.
+        self.assertEqual(list(recolector.descargar_subtitulos([Video("privado0000", publicado)], self.carpeta)), ["privado0000"])
+        self.assertEqual(recolector.descargar_subtitulos([Video("video00000d", publicado)], self.carpeta), {})
+        self.assertEqual(DescargadorCaido.descargas, 3)
+
+class PruebaListaFallidos(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.ruta = os.path.join(self.carpeta, "fallidos.json")
+
+    def test_agregar_y_quitar(self):
+        fallidos = ListaFallidos(self.ruta)
+        fallidos.agregar("v1", "subtitulos", ValueError("Video unavailable"), fuente="canal:UC1")
+        fallidos.agregar("v1", "subtitulos", ValueError("HTTP 503"))
+        fallidos.agregar("v2", "comentarios", "HTTP 500")
+
+        entrada = fallidos.pendientes("subtitulos")["v1"]
+        self.assertEqual(entrada["intentos"], 2)
+        self.assertEqual(entrada["error"], "HTTP 503")
+        self.assertEqual(entrada["fuente"], "canal:UC1")
+
+        # Lo guardado sobrevive a otra corrida.
+        self.assertEqual(ListaFallidos(self.ruta).pendientes("comentarios"), fallidos.pendientes("comentarios"))
+
+        fallidos.quitar("subtitulos", ["v1", "v3"])
+        self.assertEqual(fallidos.pendientes("subtitulos"), {})
+        otra_corrida = ListaFallidos(self.ruta)
+        self.assertEqual(otra_corrida.pendientes("subtitulos"), {})
+        self.assertEqual(list(otra_corrida.pendientes("comentarios")), ["v2"])
+
+if __name__ == "__main__":
+    unittest.main()
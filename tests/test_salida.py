@@ -0,0 +1,43 @@
+# Salida JSONL: volver a recolectar no duplica videos y varias instancias pueden agregar al mismo día.
+
+import threading
+import unittest
+
+from Comun import salida
+from tests.entorno import PruebaConCarpeta
+
+def registro(texto: str, fecha: str = "2024-06-30"):
+    return {"fecha_publicacion": fecha, "texto": texto}
+
+class PruebaJsonl(PruebaConCarpeta):
+    def escribir(self, *filas, tamano_buffer: int = salida.TAMANO_BUFFER):
+        with salida.SalidaJsonl(self.carpeta, tamano_buffer) as destino:
+            for video_id, fila in filas:
+                destino.escribir(fila, self.carpeta, video_id, video_id)
+
+    def leer(self, **filtros):
+        return [(fila["video_id"], fila["texto"]) for fila in salida.leer_registros(self.carpeta, salida.JSONL, **filtros)]
+
+    def test_la_ultima_corrida_gana(self):
+        self.escribir(("a", registro("a1")), ("b", registro("b1")), ("c", registro("c1", "2024-07-01")))
+        self.escribir(("a", registro("a2")), ("c", registro("c2", "2024-07-01")))
+        self.assertEqual(self.leer(), [("b", "b1"), ("a", "a2"), ("c", "c2")])
+        self.assertEqual(self.leer(hasta="2024-06-30"), [("b", "b1"), ("a", "a2")])
+
+    def test_instancias_concurrentes_en_la_misma_particion(self):
+        # Buffer de una fila: cada escritura es un vaciado que compite por el mismo archivo.
+        def recolector(numero: int):
+            self.escribir(*((f"{numero}-{fila}", registro(str(fila))) for fila in range(50)), tamano_buffer=1)
+
+        hilos = [threading.Thread(target=recolector, args=(numero,)) for numero in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        leidos = self.leer()
+        self.assertEqual(len(leidos), 200)
+        self.assertEqual({video_id for video_id, _ in leidos}, {f"{numero}-{fila}" for numero in range(4) for fila in range(50)})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# Qué fuentes se planean cuando una corrida anterior dejó pendientes.json.
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from Comun import bitacora, cuota, rastreador
+from Motor import trabajo
+from Motor.etapas import carpeta_bitacoras
+from Motor.fuentes import crear_fuentes
+from tests.entorno import PruebaConCarpeta
+
+def playlists(*ids):
+    return crear_fuentes([{"idPlaylist": id_playlist, "nombrePlaylist": id_playlist, "fechaUnica": "2024-06-30"} for id_playlist in ids])
+
+class PruebaPendientes(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.ruta = os.path.join(self.carpeta, "pendientes.json")
+        self.fuentes = playlists("PL1", "PL2", "PL3", "PL4")
+
+    def guardar(self, pendientes: list[str], dia: str = None):
+        cuota.guardar_pendientes(self.ruta, pendientes)
+        if dia:
+            with open(self.ruta, 'r', encoding='utf-8') as archivo:
+                data = json.load(archivo)
+            with open(self.ruta, 'w', encoding='utf-8') as archivo:
+                json.dump({**data, "dia": dia}, archivo)
+
+    def ordenar(self):
+        fuentes, primeras = trabajo.ordenar_pendientes(self.fuentes, self.ruta, self.carpeta)
+        return [fuente.id for fuente in fuentes], primeras
+
+    def test_sin_pendientes_van_todas(self):
+        self.assertEqual(self.ordenar(), (["PL1", "PL2", "PL3", "PL4"], []))
+
+    def test_el_mismo_dia_solo_las_pendientes(self):
+        self.guardar(["PL3", "PL1"])
+        self.assertEqual(self.ordenar(), (["PL1", "PL3"], ["PL3", "PL1"]))
+
+    def test_en_un_dia_nuevo_van_todas_con_las_pendientes_primero(self):
+        self.guardar(["PL3", "PL1"], dia="2000-01-01")
+        self.assertEqual(self.ordenar(), (["PL1", "PL2", "PL3", "PL4"], ["PL3", "PL1"]))
+
+    def test_las_interrumpidas_antes_que_las_demas_pendientes(self):
+        self.guardar(["PL3", "PL1"])
+        ruta_bitacora = bitacora.ruta_bitacora(self.fuentes[0].clave, carpeta_bitacoras(self.carpeta))
+        os.makedirs(os.path.dirname(ruta_bitacora))
+        open(ruta_bitacora, 'w').close()
+        self.assertEqual(self.ordenar()[1], ["PL1", "PL3"])
+
+    def test_con_ids_se_procesan_las_pedidas(self):
+        self.guardar(["PL3"])
+        fuentes, primeras = trabajo.ordenar_pendientes(self.fuentes[:2], self.ruta, self.carpeta, completa=False)
+        self.assertEqual(([fuente.id for fuente in fuentes], primeras), (["PL1", "PL2"], []))
+
+    def test_con_ids_se_conservan_las_demas_pendientes(self):
+        self.guardar(["PL3", "PL1"], dia="2000-01-01")
+        cuota.guardar_pendientes(self.ruta, ["PL2"], procesadas={"PL1", "PL2"})
+        # PL1 se terminó, PL2 quedó pendiente y PL3 no se tocó; el día sigue siendo el de la corrida completa.
+        self.assertEqual(cuota.leer_pendientes(self.ruta), ("2000-01-01", ["PL2", "PL3"]))
+
+    def test_la_primera_corrida_con_ids_no_restringe_la_siguiente(self):
+        cuota.guardar_pendientes(self.ruta, ["PL2"], procesadas={"PL1", "PL2"})
+        self.assertEqual(self.ordenar(), (["PL1", "PL2", "PL3", "PL4"], ["PL2"]))
+
+    def test_el_planificador_respeta_el_orden(self):
+        planificador = cuota.Planificador(presupuesto=10, libro=None)
+        costos = [("barata", {"total": 1}), ("pendiente", {"total": 8}), ("media", {"total": 3})]
+        # Sin prioridad entran las más baratas; con la pendiente primero, ésta entra aunque cueste más.
+        self.assertEqual(planificador.programar(costos), (["barata", "media"], ["pendiente"]))
+        self.assertEqual(planificador.programar(costos, ["pendiente"]), (["pendiente", "barata"], ["media"]))
+
+class PruebaRastreador(PruebaConCarpeta):
+    def test_las_fuentes_con_error_quedan_pendientes(self):
+        def completa():
+            return {"paginas": 1, "videos": 2}
+
+        def rota():
+            raise KeyError("items")
+
+        def sin_cuota():
+            raise cuota.CuotaAgotada("Cuota agotada")
+
+        ejecucion = rastreador.Rastreador()
+        resultados = ejecucion.ejecutar([("PL1", rota), ("PL2", completa), ("PL3", sin_cuota), ("PL4", completa)])
+
+        self.assertEqual([resultado["estado"] for resultado in resultados.values()],
+                         [rastreador.ERROR, rastreador.COMPLETADA, rastreador.SIN_CUOTA, rastreador.NO_INICIADA])
+        self.assertEqual(ejecucion.pendientes(), ["PL1", "PL3", "PL4"])
+        self.assertEqual(ejecucion.con_error(), ["PL1"])
+
+        # El resumen dice qué pasa con ellas.
+        impreso = io.StringIO()
+        with contextlib.redirect_stdout(impreso):
+            rastreador.imprimir_resumen(resultados, 1.0)
+        self.assertIn(rastreador.POLITICA, impreso.getvalue())
+
+    def test_la_siguiente_corrida_del_dia_reintenta_la_fuente_con_error(self):
+        ruta = os.path.join(self.carpeta, "pendientes.json")
+        ejecucion = rastreador.Rastreador()
+        ejecucion.ejecutar([("PL1", lambda: None), ("PL2", lambda: 1 / 0)])
+        cuota.guardar_pendientes(ruta, ejecucion.pendientes())
+
+        fuentes, primeras = trabajo.ordenar_pendientes(playlists("PL1", "PL2"), ruta, self.carpeta)
+        self.assertEqual(([fuente.id for fuente in fuentes], primeras), (["PL2"], ["PL2"]))
+
+class PruebaIds(PruebaConCarpeta):
+    def setUp(self):
+        super().setUp()
+        self.ruta = os.path.join(self.carpeta, "config.json")
+        campos = [{"idVideo": "aaaaaaaaaaa"}, {"idVideo": "bbbbbbbbbbb"}, {"idVideo": "ccccccccccc"},
+                  {"idPlaylist": "PL1", "nombrePlaylist": "PL1", "fechaUnica": "2024-06-30"}]
+        with open(self.ruta, 'w', encoding='utf-8') as archivo:
+            json.dump({"llave": "llave", "campos": campos}, archivo)
+
+    def leer(self, ids):
+        return trabajo.leer_fuentes_desde_json(self.ruta, ids)[1]
+
+    def test_videos_por_id_video(self):
+        fuentes = self.leer(["aaaaaaaaaaa", "ccccccccccc"])
+        self.assertEqual([fuente.id for fuente in fuentes], ["videos"])
+        self.assertEqual(fuentes[0].ids, ["aaaaaaaaaaa", "ccccccccccc"])
+
+    def test_playlist_y_todos_los_videos(self):
+        self.assertEqual([fuente.id for fuente in self.leer(["PL1"])], ["PL1"])
+        fuentes = self.leer(["videos", "PL1"])
+        self.assertEqual([fuente.id for fuente in fuentes], ["PL1", "videos"])
+        self.assertEqual(len(fuentes[1].ids), 3)
+
+    def test_all_no_se_mezcla(self):
+        self.assertEqual(len(self.leer(["All"])), 2)
+        with self.assertRaises(ValueError):
+            self.leer(["All", "PL1"])
+
+if __name__ == "__main__":
+    unittest.main()